@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from education_platform import images
+        from .models import UserProfile
+
+        images.track(UserProfile, 'profile_picture', 'profile_picture_renditions')
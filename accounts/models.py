@@ -14,6 +14,8 @@ class UserProfile(models.Model):
     phone = models.CharField(max_length=15, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Resized copies of profile_picture, kept up to date by education_platform.images
+    profile_picture_renditions = models.JSONField(default=dict, blank=True, editable=False)
     is_profile_complete = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ['resource', 'object_id', 'deleted_at']
+    list_filter = ['resource']
+    search_fields = ['object_id']
+    readonly_fields = ['resource', 'object_id', 'deleted_at']
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+
+
+class ChangefeedConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'changefeed'
+
+    def ready(self):
+        from django.apps import apps
+        from django.db.models.signals import post_delete, post_save
+        from . import events
+        from .models import TRACKED_MODELS, Tombstone, record_tombstone
+
+        for label in TRACKED_MODELS:
+            post_delete.connect(record_tombstone, sender=apps.get_model(label))
+
+        post_save.connect(events.tombstone_saved, sender=Tombstone)
+        post_save.connect(events.upload_saved, sender='students.StudentBulkUpload')
+        post_save.connect(events.student_saved, sender='students.Student')
+        post_save.connect(events.club_saved, sender='clubs.Club')
+        post_save.connect(events.membership_changed, sender='clubs.ClubMember')
+        post_delete.connect(events.membership_changed, sender='clubs.ClubMember')
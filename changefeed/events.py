@@ -0,0 +1,238 @@
+"""
+In-process pub/sub for the event stream, with a database-polling fallback
+
+Writes made in this process are published from model signals once their
+transaction commits. Writes made elsewhere (other workers, management
+commands) are picked up by one DatabasePoller per process, which runs only
+while someone is subscribed and turns the timestamp columns into events. Every event carries the row's
+version (its timestamp), so a change seen by both paths is sent once.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Tombstone
+
+CHANNELS = ['uploads', 'clubs', 'students']
+# Tombstone resource -> channel its deletions are announced on
+DELETION_CHANNELS = {'students.student': 'students', 'clubs.club': 'clubs'}
+UPLOAD_FIELDS = [
+    'id', 'cluster_id', 'file_name', 'status', 'total_students', 'processed_rows',
+    'successful_uploads', 'failed_uploads', 'updated_at',
+]
+STUDENT_FIELDS = ['student_id', 'name', 'cluster_id', 'current_semester', 'is_active', 'updated_at']
+CLUB_FIELDS = ['club_id', 'name', 'max_members', 'is_active', 'updated_at']
+_VERSION_CACHE_SIZE = 10000
+
+
+class Event:
+    def __init__(self, event_id, channel, data):
+        self.id = event_id
+        self.channel = channel
+        self.data = data
+
+    def encode(self):
+        data = json.dumps(self.data, default=str)
+        return f'id: {self.id}\nevent: {self.channel}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """One stream's queue, living on the event loop that created it"""
+
+    def __init__(self, channels, maxsize):
+        self.channels = set(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Runs on self.loop; a client too slow to keep up is told to resync
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self):
+        return await self.queue.get()
+
+    def drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+
+class EventBroker:
+    """Fan events out to subscriptions; safe to publish from any thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {channel: set() for channel in CHANNELS}
+        self._versions = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def has_subscribers(self, channel=None):
+        if channel is None:
+            return any(self._subscriptions.values())
+        return bool(self._subscriptions.get(channel))
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, getattr(settings, 'EVENT_STREAM_QUEUE_SIZE', 100))
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].discard(subscription)
+
+    def publish(self, channel, key, version, data):
+        """
+        Send `data` to the channel's subscribers unless this version of
+        `key` was already sent. Returns True if the event went out.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions[channel])
+            if not subscriptions:
+                return False
+            version_key = (channel, key)
+            previous = self._versions.get(version_key)
+            if previous is not None and version <= previous:
+                return False
+            self._versions[version_key] = version
+            self._versions.move_to_end(version_key)
+            if len(self._versions) > _VERSION_CACHE_SIZE:
+                self._versions.popitem(last=False)
+            event = Event(next(self._ids), channel, data)
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+        return True
+
+
+def _changed(row, key_field):
+    return row[key_field], row['updated_at'], {'type': 'changed', **row}
+
+
+def _deleted(tombstone, key_field):
+    key = tombstone.object_id
+    return ('deleted', key), tombstone.deleted_at, {'type': 'deleted', key_field: key}
+
+
+def publish_club(club_pk):
+    if broker.has_subscribers('clubs'):
+        for row in _club_rows(Q(pk=club_pk)):
+            broker.publish('clubs', *_changed(row, 'club_id'))
+
+
+def publish_deletion(tombstone):
+    channel = DELETION_CHANNELS.get(tombstone.resource)
+    if channel and broker.has_subscribers(channel):
+        key_field = 'student_id' if channel == 'students' else 'club_id'
+        broker.publish(channel, *_deleted(tombstone, key_field))
+
+
+def _club_rows(condition):
+    from clubs.models import Club
+
+    return Club.objects.filter(condition).annotate(
+        member_count=Count('members', filter=Q(members__is_active=True))
+    ).values(*CLUB_FIELDS, 'member_count')
+
+
+class DatabasePoller:
+    """
+    Per-process producer polling the timestamp columns for changes made in
+    other processes. However many streams are open, it issues one set of
+    queries per interval, and only for channels someone is watching.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._task = None
+
+    def ensure_running(self):
+        interval = getattr(settings, 'EVENT_STREAM_POLL_INTERVAL', 2)
+        if interval and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self.run(interval))
+
+    async def run(self, interval):
+        since = timezone.now()
+        while self.broker.has_subscribers():
+            await asyncio.sleep(interval)
+            since = await sync_to_async(self.poll, thread_sensitive=False)(since)
+
+    def poll(self, since):
+        """Publish rows changed at or after `since`; returns the next `since`"""
+        from students.models import Student, StudentBulkUpload
+
+        now = timezone.now()
+        # Look back a little so rows committed late by slow transactions are
+        # not skipped; versions stop them being sent twice
+        start = since - timedelta(seconds=getattr(settings, 'CHANGEFEED_OVERLAP_SECONDS', 5))
+        if self.broker.has_subscribers('uploads'):
+            for row in StudentBulkUpload.objects.filter(updated_at__gte=start).values(*UPLOAD_FIELDS):
+                self.broker.publish('uploads', *_changed(row, 'id'))
+        if self.broker.has_subscribers('students'):
+            for row in Student.objects.filter(updated_at__gte=start).values(*STUDENT_FIELDS):
+                self.broker.publish('students', *_changed(row, 'student_id'))
+        if self.broker.has_subscribers('clubs'):
+            for row in _club_rows(Q(updated_at__gte=start)):
+                self.broker.publish('clubs', *_changed(row, 'club_id'))
+        watched = [resource for resource, channel in DELETION_CHANNELS.items() if self.broker.has_subscribers(channel)]
+        if watched:
+            for tombstone in Tombstone.objects.filter(resource__in=watched, deleted_at__gte=start):
+                publish_deletion(tombstone)
+        return now
+
+
+def upload_saved(sender, instance, using, **kwargs):
+    # Snapshot the row now; publish only once the write is committed
+    if broker.has_subscribers('uploads'):
+        row = {field: getattr(instance, field) for field in UPLOAD_FIELDS}
+        transaction.on_commit(lambda: broker.publish('uploads', *_changed(row, 'id')), using=using)
+
+
+def student_saved(sender, instance, using, **kwargs):
+    if broker.has_subscribers('students'):
+        row = {field: getattr(instance, field) for field in STUDENT_FIELDS}
+        transaction.on_commit(lambda: broker.publish('students', *_changed(row, 'student_id')), using=using)
+
+
+def club_saved(sender, instance, using, **kwargs):
+    if broker.has_subscribers('clubs'):
+        transaction.on_commit(partial(publish_club, instance.pk), using=using)
+
+
+def tombstone_saved(sender, instance, created, using, **kwargs):
+    if created and broker.has_subscribers(DELETION_CHANNELS.get(instance.resource, '')):
+        transaction.on_commit(partial(publish_deletion, instance), using=using)
+
+
+def membership_changed(sender, instance, using, **kwargs):
+    """
+    Joining or leaving changes the club's member_count and the student's
+    current_club, so bump both timestamps for delta sync and the poller.
+    """
+    from clubs.models import Club
+    from students.models import Student
+
+    now = timezone.now()
+    Club.objects.filter(pk=instance.club_id).update(updated_at=now)
+    Student.objects.filter(pk=instance.student_id).update(updated_at=now)
+    if broker.has_subscribers('clubs'):
+        transaction.on_commit(partial(publish_club, instance.club_id), using=using)
+
+
+broker = EventBroker()
+poller = DatabasePoller(broker)
@@ -0,0 +1,19 @@
+"""
+Management command deleting tombstones older than the retention window
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from changefeed.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete tombstones older than CHANGEFEED_TOMBSTONE_RETENTION_DAYS'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.CHANGEFEED_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones older than {cutoff:%Y-%m-%d %H:%M}'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(help_text='Model label, e.g. students.student', max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'changefeed_tombstones',
+                'ordering': ['deleted_at'],
+                'indexes': [models.Index(fields=['resource', 'deleted_at'], name='tombstone_resource_idx')],
+            },
+        ),
+    ]
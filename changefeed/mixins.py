@@ -0,0 +1,134 @@
+"""
+Delta sync for router viewsets: GET <resource>/changes/?changed_since=
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Tombstone
+
+
+class ChangeFeedMixin:
+    """
+    Adds a `changes` list action returning rows whose timestamp is at or
+    after `changed_since`, plus the ids deleted since then (in the field
+    TRACKED_MODELS lists for the model).
+
+    Rows come back in (timestamp, pk) order, a page at a time, using the
+    (timestamp, pk) index on the model. While `has_more` is true the client
+    passes `next` back as query parameters. The final `next` starts slightly
+    before the server's clock (CHANGEFEED_OVERLAP_SECONDS), so rows committed
+    late by a slow transaction are not missed. Clients may therefore see a
+    row twice and should upsert by id.
+
+    Deleted ids are paged the same way with their own cursor on the
+    tombstones' (deleted_at, pk), carried in `next` as deleted_since and
+    deleted_after, so a mass delete is spread over pages instead of being
+    repeated on each of them.
+    """
+    changefeed_timestamp_field = 'updated_at'
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Rows changed and ids deleted since `changed_since` (ISO 8601)"""
+        now = timezone.now()
+        raw = request.query_params.get('changed_since')
+        since = parse_datetime(raw) if raw else None
+        if since is None:
+            return Response(
+                {'error': 'changed_since must be an ISO 8601 timestamp'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        retention = timedelta(days=getattr(settings, 'CHANGEFEED_TOMBSTONE_RETENTION_DAYS', 30))
+        if since < now - retention:
+            return Response(
+                {'error': 'changed_since is older than the tombstone retention window; do a full sync'},
+                status=status.HTTP_410_GONE
+            )
+
+        deleted_since = since
+        raw = request.query_params.get('deleted_since')
+        if raw:
+            deleted_since = parse_datetime(raw)
+            if deleted_since is None:
+                return Response(
+                    {'error': 'deleted_since must be an ISO 8601 timestamp'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(deleted_since):
+                deleted_since = timezone.make_aware(deleted_since)
+        deleted_after = request.query_params.get('deleted_after')
+        if deleted_after:
+            try:
+                deleted_after = int(deleted_after)
+            except ValueError:
+                return Response({'error': 'deleted_after must be a tombstone id'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        field = self.changefeed_timestamp_field
+        after = request.query_params.get('after')
+        if after:
+            try:
+                after = model._meta.pk.to_python(after)
+            except ValidationError:
+                return Response({'error': 'after must be a row id'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(Q(**{f'{field}__gt': since}) | Q(**{field: since, 'pk__gt': after}))
+        else:
+            queryset = queryset.filter(**{f'{field}__gte': since})
+
+        page_size = getattr(settings, 'CHANGEFEED_PAGE_SIZE', 500)
+        rows = list(queryset.order_by(field, 'pk')[:page_size + 1])
+        rows_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        tombstones = Tombstone.objects.filter(resource=model._meta.label_lower)
+        if deleted_after:
+            tombstones = tombstones.filter(
+                Q(deleted_at__gt=deleted_since) | Q(deleted_at=deleted_since, pk__gt=deleted_after)
+            )
+        else:
+            tombstones = tombstones.filter(deleted_at__gte=deleted_since)
+        tombstones = list(
+            tombstones.order_by('deleted_at', 'pk').values_list('pk', 'object_id', 'deleted_at')[:page_size + 1]
+        )
+        deleted_more = len(tombstones) > page_size
+        tombstones = tombstones[:page_size]
+
+        # Until both are exhausted each cursor moves on from its last item;
+        # the final one starts slightly in the past
+        has_more = rows_more or deleted_more
+        overlap = timedelta(seconds=getattr(settings, 'CHANGEFEED_OVERLAP_SECONDS', 5))
+        if not has_more:
+            next_params = {
+                'changed_since': max(since, now - overlap).isoformat(),
+                'deleted_since': max(deleted_since, now - overlap).isoformat(),
+            }
+        else:
+            next_params = {'changed_since': since.isoformat(), 'deleted_since': deleted_since.isoformat()}
+            if after:
+                next_params['after'] = after
+            if deleted_after:
+                next_params['deleted_after'] = deleted_after
+            if rows:
+                last = rows[-1]
+                next_params.update(changed_since=getattr(last, field).isoformat(), after=last.pk)
+            if tombstones:
+                last_pk, _, last_deleted_at = tombstones[-1]
+                next_params.update(deleted_since=last_deleted_at.isoformat(), deleted_after=last_pk)
+
+        return Response({
+            'changed': self.get_serializer(rows, many=True).data,
+            'deleted': [object_id for _, object_id, _ in tombstones],
+            'has_more': has_more,
+            'next': next_params,
+        })
@@ -0,0 +1,35 @@
+from django.db import models
+
+# Models served through ChangeFeedMixin, with the identifier their API
+# exposes; deleting one leaves a tombstone carrying that identifier
+TRACKED_MODELS = {
+    'students.Student': 'student_id',
+    'staff.Staff': 'id',
+    'clubs.Club': 'club_id',
+    'clusters.Cluster': 'cluster_id',
+}
+
+
+class Tombstone(models.Model):
+    """Record of a deleted row, so delta sync clients can drop it too"""
+    resource = models.CharField(max_length=100, help_text="Model label, e.g. students.student")
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'changefeed_tombstones'
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['resource', 'deleted_at'], name='tombstone_resource_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.resource} {self.object_id} deleted {self.deleted_at}"
+
+
+def record_tombstone(sender, instance, using, **kwargs):
+    """post_delete receiver for TRACKED_MODELS (cascades included)"""
+    Tombstone.objects.using(using).create(
+        resource=sender._meta.label_lower,
+        object_id=str(getattr(instance, TRACKED_MODELS[sender._meta.label])),
+    )
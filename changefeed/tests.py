@@ -0,0 +1,146 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from clubs.models import Club, ClubMember
+from clusters.models import Cluster
+from diagnostics.seeding import SeedVolumes, SyntheticDataGenerator
+from students.models import Student
+from . import events
+
+
+@override_settings(CHANGEFEED_PAGE_SIZE=2, REQUEST_TIMING_SAMPLE_RATE=0.0)
+class ChangeFeedPaginationTests(APITestCase):
+    """Changed rows and deleted ids are each paged with their own cursor"""
+
+    def sync(self, since):
+        params = {'changed_since': since.isoformat()}
+        pages = []
+        while True:
+            response = self.client.get('/api/clusters/changes/', params)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            if not response.data['has_more']:
+                return pages
+            params = response.data['next']
+
+    def test_rows_and_tombstones_are_paged(self):
+        since = timezone.now() - timedelta(seconds=1)
+        kept = [Cluster.objects.create(cluster_name=f'Kept {i}', cluster_code=f'K{i}') for i in range(3)]
+        doomed = [Cluster.objects.create(cluster_name=f'Doomed {i}', cluster_code=f'D{i}') for i in range(7)]
+        doomed_ids = {str(cluster.pk) for cluster in doomed}
+        for cluster in doomed:
+            cluster.delete()
+
+        pages = self.sync(since)
+
+        self.assertEqual(len(pages), 4)
+        for page in pages:
+            self.assertLessEqual(len(page['changed']), 2)
+            self.assertLessEqual(len(page['deleted']), 2)
+        changed = [row['cluster_id'] for page in pages for row in page['changed']]
+        deleted = [object_id for page in pages for object_id in page['deleted']]
+        self.assertEqual(sorted(changed), sorted(cluster.pk for cluster in kept))
+        # Each deletion is reported once rather than on every page
+        self.assertEqual(len(deleted), len(doomed_ids))
+        self.assertEqual(set(deleted), doomed_ids)
+
+    def test_final_cursor_overlaps_for_late_commits(self):
+        since = timezone.now() - timedelta(seconds=1)
+        Cluster.objects.create(cluster_name='Only', cluster_code='O1').delete()
+
+        pages = self.sync(since)
+
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0]['deleted'], [pages[0]['deleted'][0]])
+        next_params = pages[0]['next']
+        self.assertIn('deleted_since', next_params)
+        self.assertNotIn('deleted_after', next_params)
+
+    def test_invalid_tombstone_cursor(self):
+        response = self.client.get('/api/clusters/changes/', {
+            'changed_since': timezone.now().isoformat(), 'deleted_since': 'yesterday',
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class Rollback(Exception):
+    pass
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    REQUEST_TIMING_SAMPLE_RATE=0.0,
+)
+class SignalPublishingTests(TestCase):
+    """Model signals publish only committed writes, and only to a watched channel"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataGenerator(
+            SeedVolumes(clusters=1, departments=1, staff=3, students=4, clubs=2, membership_ratio=0.0),
+            prefix='SP', batch_size=100,
+        ).run()
+        cls.student = Student.objects.order_by('pk').first()
+        cls.club = Club.objects.order_by('pk').first()
+
+    def watch(self, *channels):
+        watched = mock.patch.object(
+            events.broker, 'has_subscribers', side_effect=lambda channel=None: channel in channels
+        )
+        published = mock.patch.object(events.broker, 'publish')
+        watched.start()
+        self.addCleanup(watched.stop)
+        self.addCleanup(published.stop)
+        return published.start()
+
+    def test_published_after_commit(self):
+        publish = self.watch('students')
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.student.name = 'Renamed'
+            self.student.save()
+            publish.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        [(channel, key, version, data)] = [call.args for call in publish.call_args_list]
+        self.assertEqual((channel, key, data['name']), ('students', self.student.student_id, 'Renamed'))
+
+    def test_nothing_published_on_rollback(self):
+        publish = self.watch('students', 'clubs')
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, self.assertRaises(Rollback):
+            with transaction.atomic():
+                self.student.save()
+                ClubMember.objects.create(club=self.club, student=self.student)
+                raise Rollback()
+
+        self.assertEqual(callbacks, [])
+        publish.assert_not_called()
+
+    def test_membership_publishes_the_club_with_its_member_count(self):
+        publish = self.watch('clubs')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ClubMember.objects.create(club=self.club, student=self.student)
+
+        [(channel, key, version, data)] = [call.args for call in publish.call_args_list]
+        self.assertEqual((channel, key, data['member_count']), ('clubs', self.club.club_id, 1))
+
+    def test_membership_without_subscribers_only_bumps_timestamps(self):
+        publish = self.watch()
+        before = timezone.now()
+
+        with self.captureOnCommitCallbacks() as callbacks, CaptureQueriesContext(connection) as queries:
+            ClubMember.objects.create(club=self.club, student=self.student)
+
+        self.assertEqual(callbacks, [])
+        publish.assert_not_called()
+        self.assertEqual([query['sql'].split()[0] for query in queries], ['INSERT', 'UPDATE', 'UPDATE'])
+        self.assertGreaterEqual(Club.objects.get(pk=self.club.pk).updated_at, before)
+        self.assertGreaterEqual(Student.objects.get(pk=self.student.pk).updated_at, before)
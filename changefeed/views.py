@@ -0,0 +1,67 @@
+"""
+Server-Sent Events stream of bulk upload progress and club/student changes
+"""
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .events import CHANNELS, broker, poller
+
+
+async def _stream(subscription, upload_id):
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT', 15)
+    try:
+        yield f"retry: {getattr(settings, 'EVENT_STREAM_RETRY_MS', 3000)}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ': keep-alive\n\n'
+                continue
+            if subscription.overflowed:
+                subscription.drain()
+                yield 'event: resync\ndata: {}\n\n'
+                continue
+            if upload_id is not None and event.channel == 'uploads' and event.data['id'] != upload_id:
+                continue
+            yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@require_GET
+async def event_stream(request):
+    """
+    GET /api/events/?channels=uploads,clubs[&upload=<id>]
+
+    Streams `uploads` (bulk upload progress), `clubs` (occupancy and
+    changes) and `students` events. A `resync` event means the client fell
+    behind and should refetch. Served under ASGI only: under WSGI every open
+    stream would hold a worker thread.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Event streams are only served under ASGI'}, status=501)
+
+    channels = [c for c in request.GET.get('channels', ','.join(CHANNELS)).split(',') if c]
+    unknown = sorted(set(channels) - set(CHANNELS))
+    if unknown or not channels:
+        return JsonResponse(
+            {'error': f"Unknown channels: {', '.join(unknown)}. Choose from {', '.join(CHANNELS)}"},
+            status=400
+        )
+    upload_id = request.GET.get('upload')
+    if upload_id is not None:
+        if not upload_id.isdigit():
+            return JsonResponse({'error': 'upload must be an upload id'}, status=400)
+        upload_id = int(upload_id)
+
+    subscription = broker.subscribe(channels)
+    poller.ensure_running()
+    response = StreamingHttpResponse(_stream(subscription, upload_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0001_initial'),
+        ('staff', '0002_staff_staff_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='club',
+            index=models.Index(fields=['updated_at', 'id'], name='clubs_updated_idx'),
+        ),
+    ]
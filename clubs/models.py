@@ -44,12 +44,18 @@ class Club(models.Model):
     class Meta:
         db_table = 'clubs'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='clubs_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} (ID: {str(self.club_id)[:8]})"
 
     @property
     def member_count(self):
+        # ClubViewSet annotates active_member_count to avoid a query per club
+        if hasattr(self, 'active_member_count'):
+            return self.active_member_count
         return self.members.filter(is_active=True).count()
 
     @property
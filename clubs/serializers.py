@@ -1,18 +1,25 @@
 from rest_framework import serializers
 from .models import Club, ClubSettings
 from staff.models import Staff
+from diagnostics.instrumentation import InstrumentedSerializerMixin
+from education_platform.compiled import CompiledListSerializer
+from education_platform.fieldsets import SparseFieldsSerializerMixin
 
-class ClubSerializer(serializers.ModelSerializer):
+class ClubSerializer(InstrumentedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     coordinator_name = serializers.CharField(source='coordinator.name', read_only=True)
     department_name = serializers.CharField(source='coordinator.department.name', read_only=True)
+    member_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Club
         fields = [
             'club_id', 'name', 'description', 'coordinator', 'coordinator_name',
-            'department_name', 'max_members', 'is_active', 'created_at', 'updated_at'
+            'department_name', 'max_members', 'member_count', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['club_id', 'created_at', 'updated_at']
+        # member_count is annotated by ClubViewSet.get_queryset
+        sparse_requires = {'member_count': []}
+        list_serializer_class = CompiledListSerializer
 
     def validate_coordinator(self, value):
         """Ensure coordinator is an active staff member"""
@@ -20,7 +27,7 @@ class ClubSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Coordinator must be an active staff member.")
         return value
 
-class ClubSettingsSerializer(serializers.ModelSerializer):
+class ClubSettingsSerializer(InstrumentedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ClubSettings
         fields = [
@@ -1,15 +1,34 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Count, Q
+from changefeed.mixins import ChangeFeedMixin
+from education_platform.fieldsets import Include, SparseFieldsetMixin
+from staff.serializers import DepartmentSerializer, StaffSerializer
 from .models import Club, ClubSettings
 from .serializers import ClubSerializer, ClubSettingsSerializer
 
-class ClubViewSet(viewsets.ModelViewSet):
+def with_member_counts(queryset):
+    """Annotate active member counts read by Club.member_count"""
+    return queryset.annotate(
+        active_member_count=Count('members', filter=Q(members__is_active=True))
+    )
+
+class ClubViewSet(SparseFieldsetMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     queryset = Club.objects.all()
     serializer_class = ClubSerializer
+    sparse_includes = {
+        'department': Include('coordinator__department', DepartmentSerializer, 'departments'),
+        'coordinator': Include(
+            'coordinator', StaffSerializer, 'staff', select=('coordinator__department',),
+            fields=['id', 'staff_id', 'name', 'email', 'phone', 'department', 'department_name', 'is_active'],
+        ),
+    }
 
     def get_queryset(self):
-        queryset = Club.objects.select_related('coordinator', 'coordinator__department').all()
+        queryset = with_member_counts(
+            Club.objects.select_related('coordinator', 'coordinator__department')
+        )
         is_active = self.request.query_params.get('is_active', None)
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
@@ -18,7 +37,9 @@ class ClubViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def active_clubs(self, request):
         """Get only active clubs for dropdowns"""
-        clubs = Club.objects.filter(is_active=True).select_related('coordinator', 'coordinator__department').order_by('name')
+        clubs = with_member_counts(
+            Club.objects.filter(is_active=True).select_related('coordinator', 'coordinator__department')
+        ).order_by('name')
         serializer = self.get_serializer(clubs, many=True)
         return Response(serializer.data)
 
@@ -31,6 +52,6 @@ class ClubViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(club)
         return Response(serializer.data)
 
-class ClubSettingsViewSet(viewsets.ModelViewSet):
+class ClubSettingsViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = ClubSettings.objects.all()
     serializer_class = ClubSettingsSerializer
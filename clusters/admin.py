@@ -1,3 +1,57 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
 
-# Register your models here.
+from .models import Cluster
+
+
+@admin.register(Cluster)
+class ClusterAdmin(admin.ModelAdmin):
+    list_display = ['cluster_code', 'cluster_name', 'final_semester', 'last_rolled_over_at', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['cluster_code', 'cluster_name']
+    actions = ['preview_rollover', 'roll_over_term']
+
+    @admin.action(description='Preview term rollover (dry run)')
+    def preview_rollover(self, request, queryset):
+        from students import rollover
+
+        for cluster in queryset:
+            self.message_user(request, '; '.join(line.strip() for line in rollover.plan(cluster).lines()))
+
+    @admin.action(description='Roll over term', permissions=['change'])
+    def roll_over_term(self, request, queryset):
+        """Show what the rollover would change, and roll over once confirmed"""
+        from students import rollover
+
+        if request.POST.get('post'):
+            try:
+                reports = rollover.roll_over(list(queryset), force=request.POST.get('force') == 'yes')
+            except rollover.RolledOverRecently as exc:
+                self.message_user(request, f'{exc}; nothing changed.', messages.ERROR)
+                return None
+            for report in reports:
+                self.message_user(
+                    request,
+                    f'{report.cluster.cluster_code}: {sum(report.promoted.values())} promoted, '
+                    f'{report.graduated} graduated, {report.memberships_closed} memberships closed',
+                    messages.SUCCESS,
+                )
+            return None
+
+        opts = self.model._meta
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Roll over term',
+            'subtitle': None,
+            'queryset': queryset,
+            'reports': [rollover.plan(cluster) for cluster in queryset],
+            'recent': [cluster.cluster_code for cluster in queryset if rollover.rolled_over_recently(cluster)],
+            'min_interval_days': getattr(settings, 'ROLLOVER_MIN_INTERVAL_DAYS', 60),
+            'opts': opts,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'media': self.media,
+        }
+        request.current_app = self.admin_site.name
+        return TemplateResponse(request, f'admin/{opts.app_label}/{opts.model_name}/rollover_confirmation.html', context)
@@ -0,0 +1,41 @@
+"""
+Management command archiving or purging a cluster (education_platform.archival)
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clusters.models import Cluster
+from education_platform import archival
+
+
+class Command(BaseCommand):
+    help = 'Deactivate a cluster with its students and their accounts, or delete them with --purge'
+
+    def add_arguments(self, parser):
+        parser.add_argument('code', help='Cluster code')
+        parser.add_argument('--purge', action='store_true', help='Delete instead of deactivating')
+        parser.add_argument('--batch-size', type=int, default=archival.BATCH_SIZE, help='Students per batch')
+        parser.add_argument('--no-input', action='store_false', dest='interactive', help='Do not ask to confirm --purge')
+
+    def handle(self, *args, **options):
+        try:
+            cluster = Cluster.objects.get(cluster_code=options['code'])
+        except Cluster.DoesNotExist:
+            raise CommandError(f"Unknown cluster: {options['code']}")
+        if options['purge'] and options['interactive']:
+            answer = input(f'Delete {cluster.display_name}, its students and their accounts? Type "yes" to continue: ')
+            if answer != 'yes':
+                raise CommandError('Purge cancelled')
+
+        operation = archival.purge_cluster if options['purge'] else archival.archive_cluster
+        start = time.perf_counter()
+        counts = operation(cluster, batch_size=options['batch_size'], progress=self.progress)
+        summary = ', '.join(f'{count} {label}' for label, count in counts.items())
+        verb = 'Purged' if options['purge'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {cluster.cluster_code}: {summary} in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def progress(self, label, done, total):
+        self.stdout.write(f'  {label}: {done}/{total}')
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cluster',
+            index=models.Index(fields=['updated_at', 'cluster_id'], name='clusters_updated_idx'),
+        ),
+    ]
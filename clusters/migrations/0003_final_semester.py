@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0002_cluster_clusters_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cluster',
+            name='final_semester',
+            field=models.PositiveSmallIntegerField(default=6),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0003_final_semester'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cluster',
+            name='last_rolled_over_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
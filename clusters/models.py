@@ -9,6 +9,10 @@ class Cluster(models.Model):
     cluster_name = models.CharField(max_length=100, unique=True)
     cluster_code = models.CharField(max_length=10, unique=True)
     description = models.TextField(blank=True, null=True)
+    # Students in this semester graduate at the term rollover
+    final_semester = models.PositiveSmallIntegerField(default=6)
+    # Set by the term rollover, which refuses to run again soon after
+    last_rolled_over_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -16,6 +20,9 @@ class Cluster(models.Model):
     class Meta:
         ordering = ['cluster_id']
         db_table = 'clusters'
+        indexes = [
+            models.Index(fields=['updated_at', 'cluster_id'], name='clusters_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.cluster_id} - {self.cluster_name}"
@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from diagnostics.instrumentation import InstrumentedSerializerMixin
+from education_platform.compiled import CompiledListSerializer
+from education_platform.fieldsets import SparseFieldsSerializerMixin
 from .models import Cluster
 
-class ClusterSerializer(serializers.ModelSerializer):
+class ClusterSerializer(InstrumentedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     display_name = serializers.ReadOnlyField()
     
     class Meta:
@@ -12,6 +15,8 @@ class ClusterSerializer(serializers.ModelSerializer):
             'updated_at', 'display_name'
         ]
         read_only_fields = ['cluster_id', 'created_at', 'updated_at']
+        sparse_requires = {'display_name': ['cluster_code', 'cluster_name']}
+        list_serializer_class = CompiledListSerializer
 
     def validate_cluster_code(self, value):
         """Ensure cluster code is unique and uppercase"""
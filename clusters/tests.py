@@ -1,3 +1,94 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from changefeed.models import Tombstone
+from clubs.models import ClubMember
+from diagnostics.seeding import SeedVolumes, SyntheticDataGenerator
+from education_platform import archival
+from staff.models import Staff
+from students.models import Student
+from .models import Cluster
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after_first_batch(label, done, total):
+    raise Interrupted()
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    REQUEST_TIMING_SAMPLE_RATE=0.0,
+)
+class ClusterArchivalTests(TestCase):
+    """archive_cluster and purge_cluster on a seeded cluster"""
+
+    @classmethod
+    def setUpTestData(cls):
+        volumes = SeedVolumes(clusters=2, departments=1, staff=5, students=60, clubs=5, membership_ratio=1.0)
+        SyntheticDataGenerator(volumes, prefix='AC', batch_size=100).run()
+        cls.cluster = Cluster.objects.get(cluster_code='AC0000')
+        cls.other = Cluster.objects.get(cluster_code='AC0001')
+        cls.cluster_pk = cls.cluster.pk
+        students = Student.objects.filter(cluster=cls.cluster)
+        cls.superuser = students.first().user
+        cls.superuser.is_superuser = True
+        cls.superuser.save()
+        # An account that is a student in the cluster and a staff member too
+        cls.staff_user = Staff.objects.first().user
+        Student.objects.create(
+            user=cls.staff_user, student_id='ACSTAFF', name='Staff Student', email='staff.student@example.com',
+            cluster=cls.cluster, year_of_admission=2024,
+        )
+        cls.student_pks = set(students.values_list('pk', flat=True))
+        cls.user_ids = set(students.values_list('user_id', flat=True))
+        cls.kept_user_ids = {cls.superuser.pk, cls.staff_user.pk}
+
+    def test_archive(self):
+        other_members = ClubMember.objects.filter(student__cluster=self.other, is_active=True).count()
+
+        counts = archival.archive_cluster(self.cluster, batch_size=7)
+
+        self.cluster.refresh_from_db()
+        self.assertFalse(self.cluster.is_active)
+        self.assertEqual(counts['students'], len(self.student_pks))
+        self.assertFalse(Student.objects.filter(cluster=self.cluster, is_active=True).exists())
+        self.assertFalse(ClubMember.objects.filter(student__cluster=self.cluster, is_active=True).exists())
+        self.assertFalse(ClubMember.objects.filter(student__cluster=self.cluster, left_at__isnull=True).exists())
+        self.assertEqual(
+            set(User.objects.filter(pk__in=self.user_ids, is_active=True).values_list('pk', flat=True)),
+            self.kept_user_ids,
+        )
+        self.assertEqual(counts['users'], len(self.user_ids - self.kept_user_ids))
+        self.assertEqual(ClubMember.objects.filter(student__cluster=self.other, is_active=True).count(), other_members)
+
+    def test_purge(self):
+        self.purged(archival.purge_cluster(self.cluster, batch_size=7))
+
+    def test_purge_again_after_interruption(self):
+        with self.assertRaises(Interrupted):
+            archival.purge_cluster(self.cluster, batch_size=7, progress=interrupt_after_first_batch)
+        self.assertEqual(Student.objects.filter(pk__in=self.student_pks).count(), len(self.student_pks) - 7)
+
+        archival.purge_cluster(self.cluster, batch_size=7)
+
+        self.purged()
+
+    def purged(self, counts=None):
+        if counts is not None:
+            self.assertEqual(counts['students'], len(self.student_pks))
+            self.assertEqual(counts['users'], len(self.user_ids - self.kept_user_ids))
+        self.assertFalse(Cluster.objects.filter(pk=self.cluster_pk).exists())
+        self.assertFalse(Student.objects.filter(pk__in=self.student_pks).exists())
+        self.assertFalse(ClubMember.objects.filter(student_id__in=self.student_pks).exists())
+        # No orphan accounts; the superuser and the staff member's are kept
+        self.assertEqual(set(User.objects.filter(pk__in=self.user_ids).values_list('pk', flat=True)),
+                         self.kept_user_ids)
+        self.assertTrue(Staff.objects.filter(user=self.staff_user).exists())
+        tombstones = Tombstone.objects.filter(resource='students.student')
+        self.assertEqual(tombstones.count(), len(self.student_pks))
+        self.assertEqual(tombstones.values('object_id').distinct().count(), len(self.student_pks))
+        self.assertTrue(Tombstone.objects.filter(resource='clusters.cluster', object_id=str(self.cluster_pk)).exists())
+        self.assertTrue(Student.objects.filter(cluster=self.other).exists())
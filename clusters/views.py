@@ -1,10 +1,12 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from changefeed.mixins import ChangeFeedMixin
+from education_platform.fieldsets import SparseFieldsetMixin
 from .models import Cluster
 from .serializers import ClusterSerializer
 
-class ClusterViewSet(viewsets.ModelViewSet):
+class ClusterViewSet(SparseFieldsetMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     queryset = Cluster.objects.all()
     serializer_class = ClusterSerializer
 
@@ -0,0 +1,53 @@
+from django.contrib import admin
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import ProfileRecord, ProfilingTrigger
+
+
+@admin.register(ProfilingTrigger)
+class ProfilingTriggerAdmin(admin.ModelAdmin):
+    list_display = ['path_prefix', 'method', 'remaining', 'is_active', 'created_at']
+    list_filter = ['is_active']
+
+
+@admin.register(ProfileRecord)
+class ProfileRecordAdmin(admin.ModelAdmin):
+    list_display = [
+        'created_at', 'method', 'path', 'status_code', 'duration_ms',
+        'trigger', 'user', 'download_link'
+    ]
+    list_filter = ['trigger', 'method', 'status_code']
+    search_fields = ['path']
+    readonly_fields = [
+        'method', 'path', 'query_string', 'user', 'status_code', 'duration_ms',
+        'trigger', 'profile_file', 'summary', 'created_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download),
+                name='diagnostics_profilerecord_download',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    @admin.display(description='Profile')
+    def download_link(self, obj):
+        url = reverse('admin:diagnostics_profilerecord_download', args=[obj.pk])
+        return format_html('<a href="{}">Download .prof</a>', url)
+
+    def download(self, request, pk):
+        """Serve the pstats file through the admin so MEDIA_URL need not be public"""
+        record = get_object_or_404(ProfileRecord, pk=pk)
+        return FileResponse(
+            record.profile_file.open('rb'),
+            as_attachment=True,
+            filename=f"profile_{record.pk}.prof",
+        )
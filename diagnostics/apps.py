@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class DiagnosticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'diagnostics'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .instrumentation import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,339 @@
+"""
+Endpoint benchmark scenarios and baseline comparison
+"""
+import hashlib
+import io
+import itertools
+import json
+import statistics
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Optional
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clubs.models import Club, ClubSettings
+from clusters.models import Cluster
+from staff.models import Department, Staff
+from students.models import Student
+
+from .seeding import SeedVolumes, SyntheticDataGenerator
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[['BenchmarkContext'], str]
+    data: Optional[Callable[['BenchmarkContext'], dict]] = None
+    format: str = 'json'
+    max_iterations: Optional[int] = None
+
+
+class BenchmarkContext:
+    """Ids of seeded rows plus a counter for unique values in create scenarios"""
+
+    def __init__(self):
+        self.counter = itertools.count()
+        self.cluster = Cluster.objects.order_by('pk').first()
+        self.department = Department.objects.order_by('pk').first()
+        self.staff = Staff.objects.order_by('pk').first()
+        self.student = Student.objects.order_by('pk').first()
+        self.club = Club.objects.order_by('pk').first()
+        self.club_settings, _ = ClubSettings.objects.get_or_create(pk=1)
+        # Toggle scenarios flip self.staff, so clubs get a coordinator that stays active
+        self.coordinator = Staff.objects.filter(is_active=True).order_by('-pk').first()
+        # Delta sync scenarios ask for what changed after seeding
+        self.changed_since = urlencode({'changed_since': timezone.now().isoformat()})
+        self.retry_upload = None
+
+    def unique(self):
+        return next(self.counter)
+
+    # Destroy scenarios delete a row made for the purpose, so the seed stays intact
+
+    def new_cluster(self):
+        n = self.unique()
+        return Cluster.objects.create(cluster_name=f'Bench Doomed Cluster {n}', cluster_code=f'BX{n}')
+
+    def new_department(self):
+        n = self.unique()
+        return Department.objects.create(name=f'Bench Doomed Department {n}', code=f'BXD{n}')
+
+    def new_staff(self):
+        n = self.unique()
+        return Staff.objects.create(
+            user=User.objects.create(username=f'bench_doomed_staff_{n}'), staff_id=f'BXS{n}',
+            name='Bench Staff', email=f'bxs{n}@bench.example.com', subject_expertise='Benchmarks',
+            qualification='PhD', department=self.department,
+        )
+
+    def new_student(self):
+        n = self.unique()
+        return Student.objects.create(
+            user=User.objects.create(username=f'bench_doomed_student_{n}'), student_id=f'BXT{n}',
+            name=_student_name(n), email=f'bxt{n}@bench.example.com', cluster=self.cluster,
+            year_of_admission=2024,
+        )
+
+    def new_club(self):
+        return Club.objects.create(name=f'Bench Doomed Club {self.unique()}', coordinator=self.coordinator)
+
+    def new_club_settings(self):
+        return ClubSettings.objects.create()
+
+
+def _student_name(n):
+    # Letters only and unlike each other, so rows don't all share one duplicate-detection block
+    digest = hashlib.sha256(str(n).encode()).digest()
+    first, last = (''.join(chr(97 + b % 26) for b in digest[i:i + 7]) for i in (0, 7))
+    return f'{first.title()} {last.title()}'
+
+
+def _student_upload(ctx, rows=10):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['name', 'email', 'phone', 'roll_number', 'year_of_admission', 'current_semester'])
+    for _ in range(rows):
+        n = ctx.unique()
+        ws.append([_student_name(n), f'bench{n}@bench.example.com', '9000000000', f'BR{n}', 2024, 1])
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    output.name = 'bench.xlsx'
+    return {'file': output, 'cluster': ctx.cluster.pk}
+
+
+def _student_upload_retry(ctx):
+    # The same file every time: imported during warmup, then answered from the earlier result
+    if ctx.retry_upload is None:
+        ctx.retry_upload = _student_upload(ctx)['file'].getvalue()
+    output = io.BytesIO(ctx.retry_upload)
+    output.name = 'bench.xlsx'
+    return {'file': output, 'cluster': ctx.cluster.pk}
+
+
+def _staff_upload(ctx, rows=200):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['staff_id', 'name', 'email', 'subject_expertise', 'qualification', 'department_code'])
+    for _ in range(rows):
+        n = ctx.unique()
+        ws.append([f'BSI{n}', f'Bench Staff {n}', f'bsi{n}@bench.example.com', 'Benchmarks', 'PhD', ctx.department.code])
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    output.name = 'bench.xlsx'
+    return {'file': output}
+
+
+SCENARIOS = [
+    # Clusters
+    Scenario('clusters.list', 'get', lambda ctx: '/api/clusters/'),
+    Scenario('clusters.retrieve', 'get', lambda ctx: f'/api/clusters/{ctx.cluster.pk}/'),
+    Scenario('clusters.active_clusters', 'get', lambda ctx: '/api/clusters/active_clusters/'),
+    Scenario('clusters.create', 'post', lambda ctx: '/api/clusters/', lambda ctx: {
+        'cluster_name': f'Bench Cluster {ctx.unique()}', 'cluster_code': f'BC{ctx.unique()}',
+    }),
+    Scenario('clusters.update', 'put', lambda ctx: f'/api/clusters/{ctx.cluster.pk}/', lambda ctx: {
+        'cluster_name': ctx.cluster.cluster_name, 'cluster_code': ctx.cluster.cluster_code,
+        'description': f'Updated {ctx.unique()}',
+    }),
+    Scenario('clusters.partial_update', 'patch', lambda ctx: f'/api/clusters/{ctx.cluster.pk}/', lambda ctx: {
+        'description': f'Patched {ctx.unique()}',
+    }),
+    Scenario('clusters.destroy', 'delete', lambda ctx: f'/api/clusters/{ctx.new_cluster().pk}/'),
+    Scenario('clusters.toggle_status', 'post', lambda ctx: f'/api/clusters/{ctx.cluster.pk}/toggle_status/'),
+    Scenario('clusters.changes', 'get', lambda ctx: f'/api/clusters/changes/?{ctx.changed_since}'),
+    # Departments
+    Scenario('departments.list', 'get', lambda ctx: '/api/departments/'),
+    Scenario('departments.retrieve', 'get', lambda ctx: f'/api/departments/{ctx.department.pk}/'),
+    Scenario('departments.active_departments', 'get', lambda ctx: '/api/departments/active_departments/'),
+    Scenario('departments.create', 'post', lambda ctx: '/api/departments/', lambda ctx: {
+        'name': f'Bench Department {ctx.unique()}', 'code': f'BD{ctx.unique()}',
+    }),
+    Scenario('departments.update', 'put', lambda ctx: f'/api/departments/{ctx.department.pk}/', lambda ctx: {
+        'name': ctx.department.name, 'code': ctx.department.code, 'description': f'Updated {ctx.unique()}',
+    }),
+    Scenario('departments.partial_update', 'patch', lambda ctx: f'/api/departments/{ctx.department.pk}/',
+             lambda ctx: {'description': f'Patched {ctx.unique()}'}),
+    Scenario('departments.destroy', 'delete', lambda ctx: f'/api/departments/{ctx.new_department().pk}/'),
+    # Staff
+    Scenario('staff.list', 'get', lambda ctx: '/api/staff/'),
+    Scenario('staff.retrieve', 'get', lambda ctx: f'/api/staff/{ctx.staff.pk}/'),
+    Scenario('staff.mentors_by_department', 'get', lambda ctx: '/api/staff/mentors_by_department/'),
+    Scenario('staff.create', 'post', lambda ctx: '/api/staff/', lambda ctx: {
+        'staff_id': f'BSTF{ctx.unique()}', 'name': 'Bench Staff', 'email': f'bstaff{ctx.unique()}@bench.example.com',
+        'subject_expertise': 'Benchmarks', 'qualification': 'PhD', 'department': ctx.department.pk,
+    }),
+    Scenario('staff.update', 'put', lambda ctx: f'/api/staff/{ctx.staff.pk}/', lambda ctx: {
+        'staff_id': ctx.staff.staff_id, 'name': ctx.staff.name, 'email': ctx.staff.email,
+        'subject_expertise': f'Benchmarks {ctx.unique()}', 'qualification': 'PhD', 'department': ctx.department.pk,
+    }),
+    Scenario('staff.partial_update', 'patch', lambda ctx: f'/api/staff/{ctx.staff.pk}/', lambda ctx: {
+        'qualification': f'PhD {ctx.unique()}',
+    }),
+    Scenario('staff.destroy', 'delete', lambda ctx: f'/api/staff/{ctx.new_staff().pk}/'),
+    Scenario('staff.toggle_status', 'post', lambda ctx: f'/api/staff/{ctx.staff.pk}/toggle_status/'),
+    Scenario('staff.toggle_mentor_access', 'post', lambda ctx: f'/api/staff/{ctx.staff.pk}/toggle_mentor_access/'),
+    Scenario('staff.changes', 'get', lambda ctx: f'/api/staff/changes/?{ctx.changed_since}'),
+    Scenario('staff.template', 'get', lambda ctx: '/api/staff/template/'),
+    Scenario('staff.bulk_upload', 'post', lambda ctx: '/api/staff/bulk_upload/', _staff_upload,
+             format='multipart', max_iterations=5),
+    # Students
+    Scenario('students.list', 'get', lambda ctx: '/api/students/'),
+    Scenario('students.retrieve', 'get', lambda ctx: f'/api/students/{ctx.student.pk}/'),
+    Scenario('students.create', 'post', lambda ctx: '/api/students/', lambda ctx: {
+        'name': 'Bench Student', 'email': f'bstudent{ctx.unique()}@bench.example.com',
+        'roll_number': f'BSR{ctx.unique()}', 'year_of_admission': 2024, 'current_semester': 1,
+        'cluster': ctx.cluster.pk,
+    }),
+    Scenario('students.update', 'put', lambda ctx: f'/api/students/{ctx.student.pk}/', lambda ctx: {
+        'name': ctx.student.name, 'email': ctx.student.email, 'roll_number': f'BSU{ctx.unique()}',
+        'year_of_admission': ctx.student.year_of_admission, 'current_semester': ctx.student.current_semester,
+        'cluster': ctx.student.cluster_id,
+    }),
+    Scenario('students.partial_update', 'patch', lambda ctx: f'/api/students/{ctx.student.pk}/', lambda ctx: {
+        'phone': f'9{ctx.unique():09d}',
+    }),
+    Scenario('students.destroy', 'delete', lambda ctx: f'/api/students/{ctx.new_student().pk}/'),
+    Scenario('students.toggle_status', 'post', lambda ctx: f'/api/students/{ctx.student.pk}/toggle_status/'),
+    Scenario('students.reset_password', 'post', lambda ctx: f'/api/students/{ctx.student.pk}/reset_password/'),
+    Scenario('students.send_credentials', 'post', lambda ctx: f'/api/students/{ctx.student.pk}/send_credentials/'),
+    Scenario('students.template', 'get', lambda ctx: '/api/students/template/'),
+    Scenario('students.changes', 'get', lambda ctx: f'/api/students/changes/?{ctx.changed_since}'),
+    Scenario('students.bulk_upload', 'post', lambda ctx: '/api/students/bulk_upload/', _student_upload,
+             format='multipart', max_iterations=3),
+    Scenario('students.bulk_upload_retry', 'post', lambda ctx: '/api/students/bulk_upload/',
+             _student_upload_retry, format='multipart'),
+    # Clubs
+    Scenario('clubs.list', 'get', lambda ctx: '/api/clubs/'),
+    Scenario('clubs.retrieve', 'get', lambda ctx: f'/api/clubs/{ctx.club.pk}/'),
+    Scenario('clubs.active_clubs', 'get', lambda ctx: '/api/clubs/active_clubs/'),
+    Scenario('clubs.create', 'post', lambda ctx: '/api/clubs/', lambda ctx: {
+        'name': f'Bench Club {ctx.unique()}', 'coordinator': ctx.coordinator.pk, 'max_members': 50,
+    }),
+    Scenario('clubs.update', 'put', lambda ctx: f'/api/clubs/{ctx.club.pk}/', lambda ctx: {
+        'name': ctx.club.name, 'coordinator': ctx.coordinator.pk, 'max_members': 50 + ctx.unique() % 10,
+    }),
+    Scenario('clubs.partial_update', 'patch', lambda ctx: f'/api/clubs/{ctx.club.pk}/', lambda ctx: {
+        'description': f'Patched {ctx.unique()}',
+    }),
+    Scenario('clubs.destroy', 'delete', lambda ctx: f'/api/clubs/{ctx.new_club().pk}/'),
+    Scenario('clubs.toggle_status', 'post', lambda ctx: f'/api/clubs/{ctx.club.pk}/toggle_status/'),
+    Scenario('clubs.changes', 'get', lambda ctx: f'/api/clubs/changes/?{ctx.changed_since}'),
+    Scenario('club-settings.list', 'get', lambda ctx: '/api/club-settings/'),
+    Scenario('club-settings.retrieve', 'get', lambda ctx: f'/api/club-settings/{ctx.club_settings.pk}/'),
+    Scenario('club-settings.create', 'post', lambda ctx: '/api/club-settings/', lambda ctx: {
+        'is_joining_open': False, 'max_clubs_per_student': 1,
+    }),
+    Scenario('club-settings.update', 'put', lambda ctx: f'/api/club-settings/{ctx.club_settings.pk}/', lambda ctx: {
+        'is_joining_open': False, 'max_clubs_per_student': 1 + ctx.unique() % 3,
+    }),
+    Scenario('club-settings.partial_update', 'patch', lambda ctx: f'/api/club-settings/{ctx.club_settings.pk}/',
+             lambda ctx: {'max_clubs_per_student': 1 + ctx.unique() % 3}),
+    Scenario('club-settings.destroy', 'delete', lambda ctx: f'/api/club-settings/{ctx.new_club_settings().pk}/'),
+]
+
+
+def volumes_for(size):
+    """Scale every table from the number of students"""
+    return SeedVolumes(
+        clusters=max(2, size // 1000),
+        departments=max(2, size // 2000),
+        staff=max(5, size // 20),
+        students=size,
+        clubs=max(3, size // 200),
+    )
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_scenario(client, scenario, ctx, iterations, warmup=2):
+    timings = []
+    queries = 0
+    status_code = None
+    if scenario.max_iterations:
+        iterations = min(iterations, scenario.max_iterations)
+        warmup = min(warmup, 1)
+    for i in range(warmup + iterations):
+        path = scenario.path(ctx)
+        data = scenario.data(ctx) if scenario.data else None
+        kwargs = {}
+        if data is not None:
+            kwargs['data'] = data
+            kwargs['format'] = scenario.format
+        with CaptureQueriesContext(connection) as captured:
+            start = perf_counter()
+            response = getattr(client, scenario.method)(path, **kwargs)
+            elapsed = perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            queries = max(queries, len(captured))
+            status_code = response.status_code
+    return {
+        'status': status_code,
+        'queries': queries,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+def seed(size, seed_value=42):
+    SyntheticDataGenerator(volumes_for(size), seed=seed_value, prefix='BM').run()
+
+
+def compare(results, baseline):
+    """
+    Return a list of human readable regressions: results issuing more
+    queries than the baseline, or whose status code changed.
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if current['status'] != previous['status']:
+            regressions.append(f"{key}: status {previous['status']} -> {current['status']}")
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{key}: queries {previous['queries']} -> {current['queries']}")
+    return regressions
+
+
+def slowdowns(results, baseline, threshold, noise_ms):
+    """
+    Return the results whose p95 exceeds the baseline by more than
+    `threshold` (a fraction) and by more than `noise_ms`. Timings vary
+    between machines and runs, so these are reported rather than failing.
+    """
+    slower = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        limit = previous['p95_ms'] * (1 + threshold)
+        if current['p95_ms'] > limit and current['p95_ms'] - previous['p95_ms'] > noise_ms:
+            slower.append(f"{key}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+    return slower
+
+
+def load_baseline(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle).get('results', {})
+    except FileNotFoundError:
+        return {}
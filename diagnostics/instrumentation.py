@@ -0,0 +1,108 @@
+"""
+Per-request metrics collected while a sampled request is being handled
+"""
+import contextvars
+import re
+from collections import Counter
+from time import perf_counter
+
+_current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+# Collapse IN (%s, %s, ...) lists so the same lookup with a different
+# number of ids still counts as one query shape.
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def sql_shape(sql):
+    """Normalise a parameterised SQL string into its query shape"""
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def current_metrics():
+    """Return the metrics of the request being handled, or None if unsampled"""
+    return _current_metrics.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every database connection.
+
+    Connections are per thread, and under ASGI queries run in executor
+    threads, so the wrapper lives on the connection and looks up the
+    request's metrics through the context variable, which sync_to_async
+    carries across threads.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver adding record_query to new connections"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class RequestMetrics:
+    """Query, SQL time and serializer time counters for one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.view_started = None
+        self.view_time = 0.0
+        self.shapes = Counter()
+        self._serializer_depth = 0
+        self._token = None
+
+    def activate(self):
+        self._token = _current_metrics.set(self)
+        return self
+
+    def deactivate(self):
+        if self._token is not None:
+            _current_metrics.reset(self._token)
+            self._token = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Time one query of the request (called through record_query)"""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += perf_counter() - start
+            self.queries += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    def repeated_shapes(self, threshold):
+        """Query shapes executed at least `threshold` times (likely N+1)"""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+class InstrumentedSerializerMixin:
+    """
+    Serializer mixin that adds representation time to the current request.
+
+    Only the outermost call is timed, so nested serializers and list
+    children are not counted twice. Unsampled requests pay a single
+    context variable lookup.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current_metrics.get()
+        if metrics is None or metrics._serializer_depth:
+            return super().to_representation(instance)
+
+        metrics._serializer_depth += 1
+        start = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics._serializer_depth -= 1
+            metrics.serializer_time += perf_counter() - start
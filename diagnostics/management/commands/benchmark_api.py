@@ -0,0 +1,104 @@
+"""
+Management command to benchmark every API endpoint against a throwaway SQLite database
+"""
+import json
+import platform
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from diagnostics import benchmarks
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'benchmark_baseline.json'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every viewset action at several data sizes and compare with a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000', help='Comma separated student counts to seed')
+        parser.add_argument('--iterations', type=int, default=15)
+        parser.add_argument('--only', default='', help='Run only scenarios whose name starts with this prefix')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--output', help='Also write this run to a JSON file')
+        parser.add_argument('--update-baseline', action='store_true', help='Overwrite the baseline with this run')
+        parser.add_argument('--threshold', type=float, default=0.5, help='Reported p95 slowdown as a fraction')
+        parser.add_argument('--noise-ms', type=float, default=2.0, help='Ignore p95 changes smaller than this')
+        parser.add_argument(
+            '--fail-on-timing', action='store_true',
+            help='Fail on p95 slowdowns too, not only on query count and status changes'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The benchmark suite runs against SQLite only.')
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        scenarios = [s for s in benchmarks.SCENARIOS if s.name.startswith(options['only'])]
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Triggers are loaded by the first request only; a refresh mid-run would
+            # add a query to whichever scenario happened to be running
+            with override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0, PROFILING_TRIGGER_REFRESH=10 ** 6, DEBUG=False):
+                results = self.run_sizes(sizes, scenarios, options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        run = {
+            'meta': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'sizes': sizes,
+                'iterations': options['iterations'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(run, indent=2, sort_keys=True) + '\n')
+
+        if options['update_baseline']:
+            Path(options['baseline']).write_text(json.dumps(run, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        baseline = benchmarks.load_baseline(options['baseline'])
+        if not baseline:
+            self.stdout.write(self.style.WARNING('No baseline found; run with --update-baseline to record one.'))
+            return
+        regressions = benchmarks.compare(results, baseline)
+        slower = benchmarks.slowdowns(results, baseline, options['threshold'], options['noise_ms'])
+        if options['fail_on_timing']:
+            regressions += slower
+        else:
+            for slowdown in slower:
+                self.stdout.write(self.style.WARNING(f"  {slowdown}"))
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"  {regression}"))
+            raise CommandError(f'{len(regressions)} performance regression(s) against the baseline.')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def run_sizes(self, sizes, scenarios, iterations):
+        results = {}
+        for size in sizes:
+            call_command('flush', interactive=False, verbosity=0)
+            benchmarks.seed(size)
+            ctx = benchmarks.BenchmarkContext()
+            client = APIClient()
+            self.stdout.write(self.style.SUCCESS(f'Size {size}'))
+            for scenario in scenarios:
+                result = benchmarks.run_scenario(client, scenario, ctx, iterations)
+                results[f'{scenario.name}@{size}'] = result
+                self.stdout.write(
+                    f"  {scenario.name:<36} {result['status']}  "
+                    f"p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                    f"queries {result['queries']}"
+                )
+        return results
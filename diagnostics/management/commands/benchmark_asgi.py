@@ -0,0 +1,150 @@
+"""
+Management command comparing the async read endpoints under ASGI with the DRF
+endpoints under WSGI
+"""
+import asyncio
+import statistics
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from diagnostics import benchmarks
+
+# (label, async endpoint, equivalent DRF endpoint)
+ENDPOINTS = [
+    ('active_clusters', '/api/async/clusters/active/', '/api/clusters/active_clusters/'),
+    ('active_departments', '/api/async/departments/active/', '/api/departments/active_departments/'),
+    ('active_clubs', '/api/async/clubs/active/', '/api/clubs/active_clubs/'),
+    ('mentors_by_department', '/api/async/staff/mentors/', '/api/staff/mentors_by_department/'),
+]
+
+
+def _summary(latencies, elapsed, peak_bytes, concurrency):
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': benchmarks.percentile(latencies, 95) * 1000,
+        'kib_per_inflight': peak_bytes / 1024 / concurrency,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrency and memory per in-flight request: async views under ASGI vs DRF under WSGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=2000, help='Students to seed (other tables scale)')
+        parser.add_argument('--concurrency', default='1,10,50', help='Comma separated in-flight request counts')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and concurrency')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The benchmark runs against a throwaway SQLite database only.')
+        levels = [int(level) for level in options['concurrency'].split(',') if level]
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0, PROFILING_TRIGGER_REFRESH=3600, DEBUG=False):
+                benchmarks.seed(options['size'])
+                self.compare(levels, options['requests'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def compare(self, levels, total):
+        wsgi_app = get_wsgi_application()
+        asgi_app = get_asgi_application()
+        self.stdout.write(
+            f"{'endpoint':<24}{'conc':>6}  {'mode':<22}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'KiB/in-flight':>15}{'threads':>9}"
+        )
+        for label, async_path, sync_path in ENDPOINTS:
+            for concurrency in levels:
+                runs = [
+                    ('WSGI + DRF', lambda: self.run_wsgi(wsgi_app, sync_path, concurrency, total)),
+                    ('ASGI + DRF (threaded)', lambda: self.run_asgi(asgi_app, sync_path, concurrency, total)),
+                    ('ASGI + async view', lambda: self.run_asgi(asgi_app, async_path, concurrency, total)),
+                ]
+                for mode, run in runs:
+                    result, threads = run()
+                    self.stdout.write(
+                        f"{label:<24}{concurrency:>6}  {mode:<22}{result['rps']:>9.0f}"
+                        f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                        f"{result['kib_per_inflight']:>15.1f}{threads:>9}"
+                    )
+
+    def run_wsgi(self, app, path, concurrency, total):
+        factory = RequestFactory()
+        peak_threads = threading.active_count()
+
+        def call(_):
+            nonlocal peak_threads
+            environ = factory.get(path).environ
+            start = perf_counter()
+            body = b''.join(app(environ, lambda status, headers: None))
+            if not body:
+                raise CommandError(f'Empty response from {path}')
+            peak_threads = max(peak_threads, threading.active_count())
+            return perf_counter() - start
+
+        tracemalloc.start()
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(call, range(total)))
+        elapsed = perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return _summary(latencies, elapsed, peak, concurrency), peak_threads
+
+    def run_asgi(self, app, path, concurrency, total):
+        peak_threads = threading.active_count()
+
+        async def call(semaphore):
+            nonlocal peak_threads
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': b'', 'root_path': '', 'headers': [(b'host', b'testserver')],
+                'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            }
+            request_sent = False
+            finished = asyncio.Event()
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # Django listens for a disconnect until the response is sent
+                await finished.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.body' and not message.get('more_body'):
+                    finished.set()
+
+            async with semaphore:
+                start = perf_counter()
+                await app(scope, receive, send)
+                peak_threads = max(peak_threads, threading.active_count())
+                return perf_counter() - start
+
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(call(semaphore) for _ in range(total)))
+
+        tracemalloc.start()
+        started = perf_counter()
+        latencies = asyncio.run(main())
+        elapsed = perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return _summary(latencies, elapsed, peak, concurrency), peak_threads
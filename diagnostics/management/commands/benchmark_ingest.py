@@ -0,0 +1,135 @@
+"""
+Management command comparing parse time and peak memory of the student bulk
+upload formats (students.bulk_import.iter_upload)
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from students.bulk_import import COLUMNS
+
+# Each probe parses one file in a fresh interpreter and prints a JSON report
+# as its last stdout line. RSS growth misses memory the imports freed and the
+# parse reused, so one more probe traces allocations (pandas and numpy
+# report theirs to tracemalloc) without being timed.
+_PROBE = (
+    "import json, resource, sys, time, tracemalloc\n"
+    "import django\n"
+    "django.setup()\n"
+    "import pandas, openpyxl\n"
+    "from django.core.files import File\n"
+    "from students.bulk_import import iter_upload\n"
+    "{preload}"
+    "class Spooled(File):\n"
+    "    # Like an upload Django spooled to disk\n"
+    "    def temporary_file_path(self):\n"
+    "        return self.file.name\n"
+    "before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    "if {trace}:\n"
+    "    tracemalloc.start()\n"
+    "with open({path!r}, 'rb') as handle:\n"
+    "    start = time.perf_counter()\n"
+    "    # Chunk by chunk, as the upload view reads it\n"
+    "    rows = sum(len(chunk) for chunk in iter_upload(Spooled(handle, name={path!r})))\n"
+    "    seconds = time.perf_counter() - start\n"
+    "print(json.dumps({{\n"
+    "    'rows': rows, 'seconds': seconds,\n"
+    "    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before,\n"
+    "    'traced_kb': tracemalloc.get_traced_memory()[1] // 1024,\n"
+    "}}))\n"
+)
+FILES = {'xlsx': 'students.xlsx', 'csv': 'students.csv', 'parquet': 'students.parquet', 'arrow': 'students.arrow'}
+
+
+def _pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class Command(BaseCommand):
+    help = 'Compare parse time and peak memory of Excel, CSV, Parquet and Arrow student uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Students in each file')
+        parser.add_argument('--formats', default=','.join(FILES), help='Comma separated formats to compare')
+        parser.add_argument('--runs', type=int, default=3, help='Parses per format; the best time is reported')
+
+    def handle(self, *args, **options):
+        formats = options['formats'].split(',')
+        unknown = [name for name in formats if name not in FILES]
+        if unknown:
+            raise CommandError(f"Unknown formats: {', '.join(unknown)}")
+        if not _pyarrow_available():
+            skipped = [name for name in formats if name in ('parquet', 'arrow')]
+            if skipped:
+                self.stdout.write(f"pyarrow is not installed, skipping {', '.join(skipped)}")
+            formats = [name for name in formats if name not in skipped]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self.write_files(Path(tmp), formats, options['rows'])
+            self.stdout.write(
+                f"{'format':<10}{'size':>10}{'rows':>9}{'parse':>10}{'rows/s':>10}"
+                f"{'RSS growth':>12}{'peak alloc':>12}"
+            )
+            for name in formats:
+                reports = [self.run_probe(paths[name], name) for _ in range(options['runs'])]
+                best = min(reports, key=lambda report: report['seconds'])
+                rss = max(report['rss_kb'] for report in reports)
+                traced = self.run_probe(paths[name], name, trace=True)['traced_kb']
+                self.stdout.write(
+                    f"{name:<10}{paths[name].stat().st_size / 2 ** 20:>8.1f}MB{best['rows']:>9}"
+                    f"{best['seconds']:>9.2f}s{best['rows'] / best['seconds']:>10.0f}"
+                    f"{rss / 1024:>10.1f}MB{traced / 1024:>10.1f}MB"
+                )
+
+    def write_files(self, directory, formats, rows):
+        import pandas as pd
+
+        rng = random.Random(0)
+        df = pd.DataFrame(
+            [
+                [f'Student {i}', f'student{i}@ingest.example.com', f'9{rng.randrange(10 ** 9):09d}',
+                 f'IR{i:06d}', rng.randint(2020, 2025), rng.randint(1, 8)]
+                for i in range(rows)
+            ],
+            # Headers as the template writes them
+            columns=[column.replace('_', ' ').title() for column in COLUMNS],
+        )
+        paths = {name: directory / FILES[name] for name in formats}
+        if 'xlsx' in paths:
+            from openpyxl import Workbook
+
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet()
+            ws.append(list(df.columns))
+            for row in df.itertuples(index=False):
+                ws.append(list(row))
+            wb.save(paths['xlsx'])
+        if 'csv' in paths:
+            df.to_csv(paths['csv'], index=False)
+        if 'parquet' in paths:
+            df.to_parquet(paths['parquet'], index=False)
+        if 'arrow' in paths:
+            df.to_feather(paths['arrow'])
+        return paths
+
+    def run_probe(self, path, name, trace=False):
+        preload = 'import pyarrow, pyarrow.parquet\n' if name in ('parquet', 'arrow') else ''
+        code = _PROBE.format(path=str(path), preload=preload, trace=trace)
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'education_platform.settings')}
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if result.returncode:
+            raise CommandError(f'Parsing {name} failed:\n{result.stderr[-2000:]}')
+        return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,130 @@
+"""
+Management command showing how the SQLite connection profile behaves while
+bulk uploads write and admins keep reading
+"""
+import statistics
+import tempfile
+import threading
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from clusters.models import Cluster
+from diagnostics import benchmarks
+from students.models import Student
+
+PROFILES = {
+    # Django's defaults: rollback journal, deferred transactions, 5 s timeout
+    'stock': {},
+    'production': settings.SQLITE_OPTIONS,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare read latency and lock errors during bulk writes for the stock and production SQLite profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds to run each profile')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+        parser.add_argument('--writers', type=int, default=2, help='Concurrent bulk upload threads')
+        parser.add_argument('--batch-size', type=int, default=500, help='Students written per transaction')
+        parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma separated profiles to run')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<12}{'rows/s':>9}{'write err':>11}{'reads':>8}"
+            f"{'read p50':>10}{'read p95':>10}{'read max':>10}{'read err':>10}"
+        )
+        for profile in options['profiles'].split(','):
+            with tempfile.TemporaryDirectory() as tmp:
+                alias = self.register(profile, Path(tmp) / 'bench.sqlite3')
+                try:
+                    result = self.run_profile(alias, options)
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+            self.stdout.write(
+                f"{profile:<12}{result['rows'] / options['duration']:>9.0f}{result['write_errors']:>11}"
+                f"{len(result['latencies']):>8}{result['p50_ms']:>8.1f}ms{result['p95_ms']:>8.1f}ms"
+                f"{result['max_ms']:>8.1f}ms{result['read_errors']:>10}"
+            )
+
+    def register(self, profile, path):
+        alias = f'sqlite_bench_{profile}'
+        databases = {**settings.DATABASES, alias: {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': path, 'OPTIONS': dict(PROFILES[profile]),
+        }}
+        connections.settings[alias] = connections.configure_settings(databases)[alias]
+        call_command('migrate', database=alias, verbosity=0)
+        return alias
+
+    def run_profile(self, alias, options):
+        cluster = Cluster.objects.using(alias).create(cluster_name=alias, cluster_code='BENCH')
+        stop = threading.Event()
+        lock = threading.Lock()
+        result = {'rows': 0, 'write_errors': 0, 'read_errors': 0, 'latencies': []}
+
+        def write(worker):
+            batch = 0
+            while not stop.is_set():
+                batch += 1
+                tag = f'{worker}-{batch}'
+                try:
+                    with transaction.atomic(using=alias):
+                        # Like the bulk upload, look for existing rows before inserting
+                        Student.objects.using(alias).filter(email__startswith=f'bench{tag}-').exists()
+                        users = User.objects.using(alias).bulk_create([
+                            User(username=f'bench{tag}-{i}', password='!')
+                            for i in range(options['batch_size'])
+                        ])
+                        Student.objects.using(alias).bulk_create([
+                            Student(
+                                user=user, student_id=f'B{tag}-{i}', name=user.username,
+                                email=f'{user.username}@bench.example.com', cluster=cluster,
+                                year_of_admission=2024,
+                            )
+                            for i, user in enumerate(users)
+                        ])
+                except OperationalError:
+                    with lock:
+                        result['write_errors'] += 1
+                else:
+                    with lock:
+                        result['rows'] += options['batch_size']
+            connections[alias].close()
+
+        def read():
+            while not stop.is_set():
+                start = perf_counter()
+                try:
+                    list(Student.objects.using(alias).select_related('cluster').order_by('-pk')[:50])
+                    Student.objects.using(alias).filter(is_active=True).count()
+                except OperationalError:
+                    with lock:
+                        result['read_errors'] += 1
+                    continue
+                with lock:
+                    result['latencies'].append(perf_counter() - start)
+            connections[alias].close()
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(options['writers'])]
+        threads += [threading.Thread(target=read) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        stop.wait(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        latencies = result['latencies'] or [0.0]
+        result.update(
+            p50_ms=statistics.median(latencies) * 1000,
+            p95_ms=benchmarks.percentile(latencies, 95) * 1000,
+            max_ms=max(latencies) * 1000,
+        )
+        return result
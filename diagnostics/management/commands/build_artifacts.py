@@ -0,0 +1,36 @@
+"""
+Management command rendering generated downloads (upload templates) into
+ARTIFACT_ROOT at deploy time, so workers serve them without building them
+"""
+import os
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from education_platform import artifacts
+
+
+class Command(BaseCommand):
+    help = 'Render upload templates and other generated downloads into ARTIFACT_ROOT'
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'ARTIFACT_ROOT', None):
+            raise CommandError('ARTIFACT_ROOT is not set')
+        # Templates are defined next to the views serving them
+        import_module(settings.ROOT_URLCONF)
+
+        current = set()
+        for template in artifacts.TEMPLATES.values():
+            path = template.write()
+            current.add(path)
+            self.stdout.write(f'{template.filename}: {path.name} ({path.stat().st_size} bytes)')
+
+        # Files of earlier schema versions
+        for template in artifacts.TEMPLATES.values():
+            stem, extension = os.path.splitext(template.filename)
+            for path in template.path.parent.glob(f'{stem}-*{extension}'):
+                if path not in current:
+                    path.unlink()
+                    self.stdout.write(f'Removed {path.name}')
+        self.stdout.write(self.style.SUCCESS('Artifacts built'))
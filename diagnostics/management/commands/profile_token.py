@@ -0,0 +1,20 @@
+"""
+Management command to mint a signed X-Profile-Token header value
+"""
+from django.core.management.base import BaseCommand
+from diagnostics.profiling import make_profile_token
+
+
+class Command(BaseCommand):
+    help = 'Create a signed X-Profile-Token that profiles requests under a path prefix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path_prefix', help='e.g. /api/students/bulk_upload/')
+
+    def handle(self, *args, **options):
+        token = make_profile_token(options['path_prefix'])
+        self.stdout.write(token)
+        self.stderr.write(
+            f"Send it as 'X-Profile-Token: {token}'. Captures appear under "
+            "Diagnostics > Profile records in the admin."
+        )
@@ -0,0 +1,72 @@
+"""
+Management command to seed a large synthetic dataset for load testing
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from clusters.models import Cluster
+from diagnostics.seeding import SeedVolumes, SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create a deterministic synthetic dataset (clusters, staff, students, clubs, memberships)'
+
+    def add_arguments(self, parser):
+        defaults = SeedVolumes()
+        parser.add_argument('--clusters', type=int, default=defaults.clusters)
+        parser.add_argument('--departments', type=int, default=defaults.departments)
+        parser.add_argument('--staff', type=int, default=defaults.staff)
+        parser.add_argument('--students', type=int, default=defaults.students)
+        parser.add_argument('--clubs', type=int, default=defaults.clubs)
+        parser.add_argument(
+            '--membership-ratio', type=float, default=defaults.membership_ratio,
+            help='Fraction of students that join a club'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='RNG seed; same seed gives the same data')
+        parser.add_argument('--prefix', default='LT', help='Prefix for all generated codes and usernames')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password', default='loadtest123', help='Password shared by all generated users')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['clusters'] < 1 or options['departments'] < 1:
+            raise CommandError('At least one cluster and one department are required.')
+        if Cluster.objects.filter(cluster_code__startswith=options['prefix']).exists():
+            raise CommandError(
+                f"Data with prefix '{options['prefix']}' already exists. Use a different --prefix."
+            )
+
+        volumes = SeedVolumes(
+            clusters=options['clusters'],
+            departments=options['departments'],
+            staff=options['staff'],
+            students=options['students'],
+            clubs=options['clubs'],
+            membership_ratio=options['membership_ratio'],
+        )
+        generator = SyntheticDataGenerator(
+            volumes,
+            seed=options['seed'],
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            password=options['password'],
+            progress=self.report_progress,
+        )
+
+        self.stdout.write(self.style.SUCCESS('Seeding synthetic data...'))
+        start = time.perf_counter()
+        counts = generator.run()
+        elapsed = time.perf_counter() - start
+
+        total_rows = sum(counts.values())
+        for label, count in counts.items():
+            self.stdout.write(f"  {label}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Created {total_rows} rows in {elapsed:.1f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/s)'
+            )
+        )
+
+    def report_progress(self, label, done, total):
+        if self.verbosity >= 2 or done == total:
+            self.stdout.write(f"  {label}: {done}/{total}")
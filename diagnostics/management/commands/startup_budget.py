@@ -0,0 +1,102 @@
+"""
+Management command to profile project startup and enforce a startup-time budget
+"""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Each probe runs in a fresh interpreter and prints a JSON report as its last stdout line
+_REPORT = (
+    "import json, resource, sys\n"
+    "deferred = {deferred!r}\n"
+    "print(json.dumps({{\n"
+    "    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,\n"
+    "    'loaded_deferred': sorted(m for m in deferred if m in sys.modules),\n"
+    "}}))\n"
+)
+PROBES = {
+    # What `manage.py check` does, including URLconf and view imports
+    'check': (
+        "import sys\n"
+        "from django.core.management import execute_from_command_line\n"
+        "execute_from_command_line(['manage.py', 'check', '--verbosity', '0'])\n"
+    ),
+    # A WSGI worker booting and importing the URLconf before its first request
+    'wsgi': (
+        "from importlib import import_module\n"
+        "from education_platform.wsgi import application\n"
+        "from django.conf import settings\n"
+        "import_module(settings.ROOT_URLCONF)\n"
+    ),
+}
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def parse_importtime(stderr):
+    """Return [(cumulative_us, self_us, module)] for top-level imports"""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match and len(match.group(3)) == 1:
+            rows.append((int(match.group(2)), int(match.group(1)), match.group(4)))
+    return sorted(rows, reverse=True)
+
+
+class Command(BaseCommand):
+    help = 'Profile imports with -X importtime and check startup time against STARTUP_BUDGETS_MS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Runs per probe; the median is compared')
+        parser.add_argument('--top', type=int, default=15, help='Slowest top-level imports to list')
+
+    def handle(self, *args, **options):
+        budgets = getattr(settings, 'STARTUP_BUDGETS_MS', {})
+        deferred = getattr(settings, 'STARTUP_DEFERRED_MODULES', [])
+        failures = []
+
+        for name, code in PROBES.items():
+            timings, report, stderr = self.run_probe(code + _REPORT.format(deferred=deferred), options['runs'])
+            median_ms = statistics.median(timings)
+            budget = budgets.get(name)
+            verdict = '' if budget is None else f' (budget {budget} ms)'
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: median {median_ms:.0f} ms over {len(timings)} runs, "
+                f"peak RSS {report['rss_kb'] / 1024:.1f} MiB{verdict}"
+            ))
+            for cumulative, own, module in parse_importtime(stderr)[:options['top']]:
+                self.stdout.write(f"  {cumulative / 1000:>8.1f} ms  {own / 1000:>7.1f} ms self  {module}")
+
+            if budget is not None and median_ms > budget:
+                failures.append(f'{name} took {median_ms:.0f} ms, over its {budget} ms budget')
+            if report['loaded_deferred']:
+                failures.append(
+                    f"{name} imported deferred modules at startup: {', '.join(report['loaded_deferred'])}"
+                )
+
+        if failures:
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f'  {failure}'))
+            raise CommandError('Startup budget exceeded.')
+        self.stdout.write(self.style.SUCCESS('Startup within budget.'))
+
+    def run_probe(self, code, runs):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'education_platform.settings')}
+        timings = []
+        for _ in range(runs):
+            start = perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', code],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            timings.append((perf_counter() - start) * 1000)
+            if result.returncode:
+                raise CommandError(f'Startup probe failed:\n{result.stderr[-2000:]}')
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        return timings, report, result.stderr
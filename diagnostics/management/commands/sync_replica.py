@@ -0,0 +1,47 @@
+"""
+Management command keeping the local SQLite read replica in step with the primary
+"""
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the replica aliases with the online backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true', help='Keep copying until interrupted')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between copies with --watch')
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas:
+            raise CommandError('No replicas configured; set DJANGO_SQLITE_REPLICA=1 for the local stand-in.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite' or any(connections[alias].vendor != 'sqlite' for alias in replicas):
+            raise CommandError('sync_replica only copies between SQLite files; use real replication elsewhere.')
+
+        while True:
+            started = time.perf_counter()
+            for alias in replicas:
+                self.copy(primary.settings_dict['NAME'], connections[alias].settings_dict['NAME'])
+            if options['verbosity'] > 1 or not options['watch']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Synced {', '.join(replicas)} in {(time.perf_counter() - started) * 1000:.0f} ms"
+                ))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source_name, target_name):
+        # The backup API copies a consistent snapshot while the primary stays writable
+        source = sqlite3.connect(str(source_name))
+        target = sqlite3.connect(str(target_name))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,233 @@
+"""
+Diagnostics middleware: request timing and on-demand profiling
+"""
+import cProfile
+import json
+import logging
+import random
+import threading
+from time import monotonic, perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db.models import F
+
+from .instrumentation import RequestMetrics
+from .models import ProfilingTrigger
+from .profiling import PROFILE_HEADER, save_profile, verify_profile_token
+
+logger = logging.getLogger('diagnostics.timing')
+
+
+class RequestTimingMiddleware:
+    """
+    Record query count, SQL time, serializer time and view time per request.
+
+    Sampling is controlled by REQUEST_TIMING_SAMPLE_RATE (0.0 - 1.0) and is
+    independent of DEBUG, so a small fraction of production traffic can be
+    profiled continuously. Query shapes repeated at least
+    REQUEST_TIMING_NPLUSONE_THRESHOLD times are reported as likely N+1.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0.0)
+        self.nplusone_threshold = getattr(settings, 'REQUEST_TIMING_NPLUSONE_THRESHOLD', 5)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # Keep the view hook on the event loop instead of a thread hop
+            self.process_view = self.aprocess_view
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics().activate()
+        request._request_metrics = metrics
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.deactivate()
+        self.finish(request, response, metrics, start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics().activate()
+        request._request_metrics = metrics
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.deactivate()
+        self.finish(request, response, metrics, start)
+        return response
+
+    def finish(self, request, response, metrics, start):
+        end = perf_counter()
+        if metrics.view_started is not None:
+            metrics.view_time = end - metrics.view_started
+        self.report(request, response, metrics, end - start)
+
+    @staticmethod
+    def mark_view_start(request):
+        metrics = getattr(request, '_request_metrics', None)
+        if metrics is not None:
+            metrics.view_started = perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.mark_view_start(request)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.mark_view_start(request)
+
+    def report(self, request, response, metrics, total):
+        repeated = metrics.repeated_shapes(self.nplusone_threshold)
+        timings = [
+            f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'serializer;dur={metrics.serializer_time * 1000:.2f}',
+            f'view;dur={metrics.view_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ]
+        if repeated:
+            timings.append(f'nplusone;desc="{len(repeated)} repeated query shapes"')
+        existing = response.get('Server-Timing')
+        if existing:
+            timings.insert(0, existing)
+        response.headers['Server-Timing'] = ', '.join(timings)
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            'serializer_ms': round(metrics.serializer_time * 1000, 2),
+            'view_ms': round(metrics.view_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
+        if repeated:
+            record['nplusone'] = [
+                {'sql': shape, 'count': count} for shape, count in repeated
+            ]
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+
+class ProfilingMiddleware:
+    """
+    Run a request under cProfile when asked to.
+
+    A request is profiled when it carries a valid X-Profile-Token header
+    (see the profile_token management command) or matches an active
+    ProfilingTrigger set up in the admin. Triggers are re-read at most every
+    PROFILING_TRIGGER_REFRESH seconds, so unprofiled requests only pay a
+    header lookup and a clock read.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.refresh_interval = getattr(settings, 'PROFILING_TRIGGER_REFRESH', 10)
+        # The trigger cache is shared by the worker's threads (and sync_to_async calls)
+        self._lock = threading.Lock()
+        self._triggers = []
+        self._triggers_expire = 0.0
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trigger = self.header_trigger(request)
+        if trigger is None:
+            if self.refresh_due():
+                self.refresh_triggers()
+            trigger = self.toggle_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        record = save_profile(request, response, profiler, perf_counter() - start, trigger)
+        response.headers['X-Profile-Id'] = str(record.pk)
+        return response
+
+    async def __acall__(self, request):
+        trigger = self.header_trigger(request)
+        if trigger is None:
+            if self.refresh_due():
+                await sync_to_async(self.refresh_triggers)()
+            if self.matching_triggers(request):
+                trigger = await sync_to_async(self.toggle_trigger)(request)
+        if trigger is None:
+            return await self.get_response(request)
+
+        # Under ASGI the profile also sees other work on the event loop
+        profiler = cProfile.Profile()
+        start = perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        record = await sync_to_async(save_profile)(
+            request, response, profiler, perf_counter() - start, trigger
+        )
+        response.headers['X-Profile-Id'] = str(record.pk)
+        return response
+
+    @staticmethod
+    def header_trigger(request):
+        token = request.META.get(PROFILE_HEADER)
+        if token and verify_profile_token(token, request.path):
+            return 'header'
+        return None
+
+    def refresh_due(self):
+        return monotonic() >= self._triggers_expire
+
+    def refresh_triggers(self):
+        triggers = list(ProfilingTrigger.objects.filter(is_active=True, remaining__gt=0))
+        with self._lock:
+            self._triggers = triggers
+            self._triggers_expire = monotonic() + self.refresh_interval
+
+    def matching_triggers(self, request):
+        with self._lock:
+            triggers = list(self._triggers)
+        return [trigger for trigger in triggers if trigger.matches(request)]
+
+    def toggle_trigger(self, request):
+        for candidate in self.matching_triggers(request):
+            if self.claim(candidate):
+                return 'toggle'
+        return None
+
+    def claim(self, trigger):
+        # Decrement atomically so concurrent workers never overshoot the count
+        claimed = ProfilingTrigger.objects.filter(
+            pk=trigger.pk, is_active=True, remaining__gt=0
+        ).update(remaining=F('remaining') - 1)
+        if not claimed:
+            with self._lock:
+                if trigger in self._triggers:
+                    self._triggers.remove(trigger)
+        return bool(claimed)
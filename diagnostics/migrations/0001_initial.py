@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfilingTrigger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path_prefix', models.CharField(help_text='e.g. /api/students/bulk_upload/', max_length=255)),
+                ('method', models.CharField(blank=True, help_text='Leave blank to match any method', max_length=10)),
+                ('remaining', models.PositiveIntegerField(default=1, help_text='Number of requests still to profile')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'profiling_triggers',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProfileRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=255)),
+                ('query_string', models.TextField(blank=True)),
+                ('status_code', models.IntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('trigger', models.CharField(choices=[('header', 'Signed header'), ('toggle', 'Admin toggle')], max_length=10)),
+                ('profile_file', models.FileField(upload_to='profiles/')),
+                ('summary', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'profile_records',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class ProfilingTrigger(models.Model):
+    """Admin toggle that profiles the next matching requests"""
+    path_prefix = models.CharField(max_length=255, help_text="e.g. /api/students/bulk_upload/")
+    method = models.CharField(max_length=10, blank=True, help_text="Leave blank to match any method")
+    remaining = models.PositiveIntegerField(default=1, help_text="Number of requests still to profile")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'profiling_triggers'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method or 'ANY'} {self.path_prefix} ({self.remaining} left)"
+
+    def matches(self, request):
+        if self.method and self.method.upper() != request.method:
+            return False
+        return request.path.startswith(self.path_prefix)
+
+
+class ProfileRecord(models.Model):
+    """A cProfile capture of a single request with its metadata"""
+    TRIGGERS = (
+        ('header', 'Signed header'),
+        ('toggle', 'Admin toggle'),
+    )
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    query_string = models.TextField(blank=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    status_code = models.IntegerField()
+    duration_ms = models.FloatField()
+    trigger = models.CharField(max_length=10, choices=TRIGGERS)
+    profile_file = models.FileField(upload_to='profiles/')
+    summary = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'profile_records'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,55 @@
+"""
+On-demand cProfile captures of individual production requests
+"""
+import io
+import marshal
+import pstats
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+
+from .models import ProfileRecord
+
+PROFILE_HEADER = 'HTTP_X_PROFILE_TOKEN'
+_SIGNING_SALT = 'diagnostics.profiling'
+
+
+def make_profile_token(path_prefix):
+    """Sign a path prefix so requests under it can be profiled via X-Profile-Token"""
+    return signing.TimestampSigner(salt=_SIGNING_SALT).sign(path_prefix)
+
+
+def verify_profile_token(token, path):
+    """Return True if the token is valid, unexpired and covers the request path"""
+    max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+    try:
+        path_prefix = signing.TimestampSigner(salt=_SIGNING_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return path.startswith(path_prefix)
+
+
+def save_profile(request, response, profiler, duration, trigger):
+    """Store the profile as a marshalled pstats file alongside request metadata"""
+    profiler.create_stats()
+    # Marshal first: building a pstats.Stats from the profiler empties it
+    data = marshal.dumps(profiler.stats)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(30)
+
+    user = getattr(request, 'user', None)
+    record = ProfileRecord(
+        method=request.method,
+        path=request.path,
+        query_string=request.META.get('QUERY_STRING', ''),
+        user=user if user is not None and user.is_authenticated else None,
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        trigger=trigger,
+        summary=summary.getvalue(),
+    )
+    file_name = f"{request.method.lower()}{request.path.replace('/', '_')}.prof"
+    record.profile_file.save(file_name, ContentFile(data), save=False)
+    record.save()
+    return record
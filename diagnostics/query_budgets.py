@@ -0,0 +1,90 @@
+"""
+Declarative per-endpoint query budgets for the router-generated API routes
+
+Budgets are keyed by (URL name, HTTP method). Every GET route and every
+body-less POST detail action registered through a router must appear here;
+diagnostics.tests fails when a new route is added without a budget, when an
+endpoint exceeds its budget, or when its query count grows with the data.
+"""
+from django.urls import URLResolver, get_resolver
+
+QUERY_BUDGETS = {
+    # Clusters
+    ('cluster-list', 'get'): 1,
+    ('cluster-detail', 'get'): 1,
+    ('cluster-active-clusters', 'get'): 1,
+    ('cluster-toggle-status', 'post'): 2,
+    # Delta sync: changed rows plus tombstones
+    ('cluster-changes', 'get'): 2,
+    # Departments
+    ('department-list', 'get'): 1,
+    ('department-detail', 'get'): 1,
+    ('department-active-departments', 'get'): 1,
+    # Staff
+    ('staff-list', 'get'): 1,
+    ('staff-detail', 'get'): 1,
+    ('staff-mentors-by-department', 'get'): 1,
+    ('staff-template', 'get'): 0,
+    ('staff-toggle-status', 'post'): 2,
+    ('staff-toggle-mentor-access', 'post'): 2,
+    ('staff-changes', 'get'): 2,
+    # Students: the student row plus the prefetched active memberships
+    ('student-list', 'get'): 2,
+    ('student-detail', 'get'): 2,
+    ('student-template', 'get'): 0,
+    ('student-toggle-status', 'post'): 3,
+    ('student-reset-password', 'post'): 4,
+    ('student-send-credentials', 'post'): 3,
+    ('student-changes', 'get'): 3,
+    # Clubs: member counts are annotated onto the club query
+    ('club-list', 'get'): 1,
+    ('club-detail', 'get'): 1,
+    ('club-active-clubs', 'get'): 1,
+    ('club-toggle-status', 'post'): 2,
+    ('club-changes', 'get'): 2,
+    # Club settings
+    ('clubsettings-list', 'get'): 1,
+    ('clubsettings-detail', 'get'): 1,
+}
+
+
+def router_routes():
+    """
+    Return {url_name: (viewset class, {method: action})} for every route
+    generated by a DRF router in the root URLconf.
+    """
+    routes = {}
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+                continue
+            actions = getattr(pattern.callback, 'actions', None)
+            if actions and pattern.name not in routes:
+                routes[pattern.name] = (pattern.callback.cls, actions)
+
+    walk(get_resolver().url_patterns)
+    return routes
+
+
+def budgeted_endpoints():
+    """
+    Return (url_name, method, is_detail) for every route that needs a budget:
+    all GET routes and the body-less POST detail actions.
+    """
+    endpoints = []
+    for name, (viewset, actions) in router_routes().items():
+        is_detail = name.endswith('-detail') or _is_detail_action(viewset, actions)
+        for method in actions:
+            if method == 'get' or (method == 'post' and is_detail):
+                endpoints.append((name, method, is_detail))
+    return endpoints
+
+
+def _is_detail_action(viewset, actions):
+    for action_name in actions.values():
+        handler = getattr(viewset, action_name, None)
+        if getattr(handler, 'detail', False):
+            return True
+    return False
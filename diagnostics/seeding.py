@@ -0,0 +1,216 @@
+"""
+Deterministic synthetic data for load and capacity testing
+"""
+import random
+from dataclasses import dataclass
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from clubs.models import Club, ClubMember
+from clusters.models import Cluster
+from staff.models import Department, Staff
+from students.models import Student
+from students.phonetic import name_key
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Arjun', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Krishna',
+    'Meera', 'Nikhil', 'Priya', 'Rahul', 'Riya', 'Rohan', 'Sanjana', 'Shreya',
+    'Siddharth', 'Sneha', 'Tanvi', 'Varun', 'Vikram', 'Zara', 'John', 'Sarah',
+]
+LAST_NAMES = [
+    'Sharma', 'Patel', 'Reddy', 'Iyer', 'Nair', 'Gupta', 'Singh', 'Kumar',
+    'Das', 'Menon', 'Rao', 'Joshi', 'Khan', 'Thomas', 'Smith', 'Fernandes',
+]
+SUBJECTS = [
+    'Data Structures', 'Accounting', 'Economics', 'Statistics', 'Literature',
+    'Physics', 'Marketing', 'Databases', 'Finance', 'History',
+]
+
+
+@dataclass
+class SeedVolumes:
+    clusters: int = 10
+    departments: int = 10
+    staff: int = 500
+    students: int = 100_000
+    clubs: int = 50
+    membership_ratio: float = 0.6
+
+
+class SyntheticDataGenerator:
+    """
+    Bulk-insert a configurable synthetic dataset.
+
+    Every row is derived from a seeded RNG and a row index, so the same
+    seed and volumes always produce the same data. All generated codes and
+    usernames carry `prefix` so a seeded dataset never collides with real
+    rows. Passwords share one precomputed hash instead of running the
+    password hasher per user.
+    """
+
+    def __init__(self, volumes, seed=42, prefix='LT', batch_size=5000,
+                 password='loadtest123', progress=None):
+        self.volumes = volumes
+        self.seed = seed
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.password_hash = make_password(password)
+        self.progress = progress or (lambda label, done, total: None)
+
+    def run(self):
+        rng = random.Random(self.seed)
+        clusters = self.create_clusters()
+        departments = self.create_departments()
+        staff_ids = self.create_staff(rng, departments, clusters)
+        club_ids = self.create_clubs(rng, staff_ids)
+        student_ids = self.create_students(rng, clusters)
+        memberships = self.create_memberships(rng, club_ids, student_ids)
+        return {
+            'clusters': len(clusters),
+            'departments': len(departments),
+            'staff': len(staff_ids),
+            'clubs': len(club_ids),
+            'students': len(student_ids),
+            'memberships': memberships,
+            'users': len(staff_ids) + len(student_ids),
+        }
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def create_clusters(self):
+        clusters = [
+            Cluster(
+                cluster_name=f"{self.prefix} Programme {i:04d}",
+                cluster_code=f"{self.prefix}{i:04d}",
+                description='Synthetic load-test cluster',
+            )
+            for i in range(self.volumes.clusters)
+        ]
+        created = Cluster.objects.bulk_create(clusters)
+        self.progress('clusters', len(created), self.volumes.clusters)
+        return created
+
+    def create_departments(self):
+        departments = [
+            Department(
+                name=f"{self.prefix} Department {i:04d}",
+                code=f"{self.prefix}D{i:04d}",
+                description='Synthetic load-test department',
+            )
+            for i in range(self.volumes.departments)
+        ]
+        created = Department.objects.bulk_create(departments)
+        self.progress('departments', len(created), self.volumes.departments)
+        return created
+
+    def create_users(self, usernames):
+        users = [
+            User(
+                username=username,
+                email=email,
+                first_name=first_name,
+                last_name=last_name,
+                password=self.password_hash,
+            )
+            for username, email, first_name, last_name in usernames
+        ]
+        return [user.pk for user in User.objects.bulk_create(users)]
+
+    def random_name(self, rng):
+        return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+    def create_staff(self, rng, departments, clusters):
+        staff_ids = []
+        total = self.volumes.staff
+        for batch in self.batches(total):
+            names = [self.random_name(rng) for _ in batch]
+            with transaction.atomic():
+                user_ids = self.create_users(
+                    (f"{self.prefix.lower()}_staff_{i}", f"staff{i}@{self.prefix.lower()}.example.com", first, last)
+                    for i, (first, last) in zip(batch, names)
+                )
+                rows = []
+                for i, user_id, (first, last) in zip(batch, user_ids, names):
+                    mentor = rng.random() < 0.2
+                    rows.append(Staff(
+                        user_id=user_id,
+                        staff_id=f"{self.prefix}STF{i:06d}",
+                        name=f"{first} {last}",
+                        email=f"staff{i}@{self.prefix.lower()}.example.com",
+                        subject_expertise=rng.choice(SUBJECTS),
+                        qualification='PhD',
+                        department=rng.choice(departments),
+                        departmental_access_enabled=rng.random() < 0.5,
+                        mentor_access_enabled=mentor,
+                        mentor_cluster=rng.choice(clusters) if mentor and clusters else None,
+                    ))
+                staff_ids.extend(staff.pk for staff in Staff.objects.bulk_create(rows))
+            self.progress('staff', len(staff_ids), total)
+        return staff_ids
+
+    def create_clubs(self, rng, staff_ids):
+        if not staff_ids:
+            return []
+        clubs = [
+            Club(
+                name=f"{self.prefix} Club {i:04d}",
+                description='Synthetic load-test club',
+                coordinator_id=rng.choice(staff_ids),
+                max_members=rng.choice([25, 50, 100, 500]),
+            )
+            for i in range(self.volumes.clubs)
+        ]
+        created = [club.pk for club in Club.objects.bulk_create(clubs)]
+        self.progress('clubs', len(created), self.volumes.clubs)
+        return created
+
+    def create_students(self, rng, clusters):
+        student_ids = []
+        total = self.volumes.students
+        for batch in self.batches(total):
+            names = [self.random_name(rng) for _ in batch]
+            with transaction.atomic():
+                user_ids = self.create_users(
+                    (f"{self.prefix.lower()}_student_{i}", f"student{i}@{self.prefix.lower()}.example.com", first, last)
+                    for i, (first, last) in zip(batch, names)
+                )
+                rows = []
+                for i, user_id, (first, last) in zip(batch, user_ids, names):
+                    rows.append(Student(
+                        user_id=user_id,
+                        student_id=f"{self.prefix}{i:08d}",
+                        name=f"{first} {last}",
+                        name_key=name_key(f"{first} {last}"),
+                        email=f"student{i}@{self.prefix.lower()}.example.com",
+                        phone=f"9{rng.randrange(10 ** 9):09d}",
+                        cluster=rng.choice(clusters),
+                        roll_number=f"{self.prefix}R{i:08d}",
+                        year_of_admission=rng.randint(2020, 2025),
+                        current_semester=rng.randint(1, 6),
+                    ))
+                student_ids.extend(student.pk for student in Student.objects.bulk_create(rows))
+            self.progress('students', len(student_ids), total)
+        return student_ids
+
+    def create_memberships(self, rng, club_ids, student_ids):
+        if not club_ids:
+            return 0
+        created = 0
+        for batch in self.batches(len(student_ids)):
+            rows = [
+                ClubMember(
+                    club_id=rng.choice(club_ids),
+                    student_id=student_ids[i],
+                    is_representative=rng.random() < 0.02,
+                )
+                for i in batch
+                if rng.random() < self.volumes.membership_ratio
+            ]
+            with transaction.atomic():
+                created += len(ClubMember.objects.bulk_create(rows))
+            self.progress('memberships', created, len(student_ids))
+        return created
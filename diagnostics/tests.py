@@ -0,0 +1,307 @@
+import json
+import random
+import tempfile
+from io import StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from clubs.models import Club, ClubMember, ClubSettings
+from clubs.views import ClubViewSet
+from clusters.models import Cluster
+from clusters.views import ClusterViewSet
+from staff.models import Department, Staff
+from staff.views import StaffViewSet
+from students.models import Student
+from students.views import StudentViewSet
+from .instrumentation import RequestMetrics, sql_shape
+from .management.commands.startup_budget import parse_importtime
+from .middleware import ProfilingMiddleware
+from .models import ProfileRecord, ProfilingTrigger
+from .query_budgets import QUERY_BUDGETS, budgeted_endpoints, router_routes
+from .seeding import SeedVolumes, SyntheticDataGenerator
+
+
+def seed(size, prefix):
+    volumes = SeedVolumes(
+        clusters=2, departments=2, staff=size, students=size, clubs=size, membership_ratio=1.0
+    )
+    SyntheticDataGenerator(volumes, prefix=prefix, batch_size=100).run()
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    REQUEST_TIMING_SAMPLE_RATE=0.0,
+    PROFILING_TRIGGER_REFRESH=3600,
+)
+class QueryBudgetTests(APITestCase):
+    """Every router endpoint stays within its query budget at N and 10N rows"""
+    N = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        ClubSettings.objects.create()
+        seed(cls.N, 'QA')
+
+    def setUp(self):
+        # The first request loads ProfilingMiddleware's trigger cache
+        self.client.get(reverse('api_status'))
+
+    def count_queries(self, name, method, is_detail):
+        viewset, _ = router_routes()[name]
+        kwargs = {}
+        if is_detail:
+            kwargs['pk'] = viewset.queryset.model.objects.order_by('pk').first().pk
+        params = {}
+        if name.endswith('-changes'):
+            params['changed_since'] = (timezone.now() - timedelta(days=1)).isoformat()
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(reverse(name, kwargs=kwargs), params)
+        self.assertLess(response.status_code, 400, f'{method.upper()} {name}: {response.status_code}')
+        return len(captured)
+
+    def test_every_router_endpoint_has_a_budget(self):
+        missing = [
+            (name, method) for name, method, _ in budgeted_endpoints()
+            if (name, method) not in QUERY_BUDGETS
+        ]
+        self.assertEqual(missing, [], 'Add these endpoints to QUERY_BUDGETS')
+
+    def test_query_counts_stay_within_budget_and_constant(self):
+        endpoints = budgeted_endpoints()
+        small = {
+            (name, method): self.count_queries(name, method, is_detail)
+            for name, method, is_detail in endpoints
+        }
+        seed(self.N * 9, 'QB')
+        for name, method, is_detail in endpoints:
+            with self.subTest(endpoint=name, method=method):
+                large = self.count_queries(name, method, is_detail)
+                self.assertEqual(
+                    small[(name, method)], large,
+                    f'{method.upper()} {name} issues more queries as rows grow (N+1)'
+                )
+                self.assertLessEqual(large, QUERY_BUDGETS[(name, method)])
+
+
+class CompiledSerializerTests(APITestCase):
+    """
+    Lists rendered by CompiledListSerializer match DRF's field-by-field
+    output, on randomized rows and random sparse fieldsets, both from model
+    instances and through values().
+    """
+    SEED = 20260611
+    TRIALS = 15
+    VIEWSETS = [StudentViewSet, StaffViewSet, ClubViewSet, ClusterViewSet]
+    TEXT = 'abcXYZ 0123-_.@éßñüçøå中文ह'
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(12, 'QC')
+
+    def text(self, rng, size=12):
+        return ''.join(rng.choice(self.TEXT) for _ in range(rng.randint(1, size)))
+
+    def moment(self, rng):
+        value = datetime(1990, 1, 1, tzinfo=dt_timezone.utc) + timedelta(seconds=rng.randrange(3_000_000_000))
+        return value.replace(microsecond=rng.choice([0, rng.randrange(1_000_000)]))
+
+    def maybe(self, rng, value):
+        return rng.choice([None, '', value])
+
+    def randomize(self, rng):
+        """Write random and edge-case values over the seeded rows (names stay unique, as they order lists)"""
+        clusters = list(Cluster.objects.values_list('pk', flat=True))
+        for pk in clusters:
+            Cluster.objects.filter(pk=pk).update(
+                cluster_name=f'{pk}{self.text(rng, 30)}', description=self.maybe(rng, self.text(rng, 60)),
+                is_active=rng.random() < 0.5, created_at=self.moment(rng), updated_at=self.moment(rng),
+            )
+        for pk in Department.objects.values_list('pk', flat=True):
+            Department.objects.filter(pk=pk).update(name=self.text(rng, 30))
+        for pk in Staff.objects.values_list('pk', flat=True):
+            Staff.objects.filter(pk=pk).update(
+                name=f'{self.text(rng)}{pk}', phone=self.maybe(rng, self.text(rng, 15)),
+                photo=self.maybe(rng, f'staff_photos/{pk}.png'),
+                mentor_cluster_id=rng.choice([None] + clusters), is_active=rng.random() < 0.5,
+                date_joined=self.moment(rng), last_updated=self.moment(rng),
+            )
+        for pk in Student.objects.values_list('pk', flat=True):
+            Student.objects.filter(pk=pk).update(
+                name=f'{self.text(rng)}{pk}', phone=self.maybe(rng, self.text(rng, 15)),
+                roll_number=self.maybe(rng, self.text(rng, 20)), current_semester=rng.randint(-5, 2**31 - 1),
+                is_active=rng.random() < 0.5, can_change_club=rng.random() < 0.5,
+                created_at=self.moment(rng), updated_at=self.moment(rng),
+            )
+        for pk in Club.objects.values_list('pk', flat=True):
+            Club.objects.filter(pk=pk).update(
+                name=f'{self.text(rng)}{pk}', description=self.maybe(rng, self.text(rng, 60)), max_members=rng.randint(0, 500),
+                updated_at=self.moment(rng),
+            )
+        for pk in ClubMember.objects.values_list('pk', flat=True):
+            ClubMember.objects.filter(pk=pk).update(is_active=rng.random() < 0.7)
+
+    def assert_same_output(self, viewset_class, rng, trial):
+        request = Request(APIRequestFactory().get('/'))
+        view = viewset_class(request=request, format_kwarg=None, kwargs={}, action='list')
+        serializer_class = view.get_serializer_class()
+        context = view.get_serializer_context()
+        readable = [name for name, field in serializer_class().fields.items() if not field.write_only]
+        fields = rng.choice([None, rng.sample(readable, rng.randint(1, len(readable)))])
+        kwargs = {'context': context} if fields is None else {'context': context, 'fields': fields}
+
+        queryset = view.get_queryset()
+        expected = [list(serializer_class(obj, **kwargs).data.items()) for obj in queryset]
+        from_instances = serializer_class(list(queryset.all()), many=True, **kwargs).data
+        from_queryset = serializer_class(queryset.all(), many=True, **kwargs).data
+        with self.subTest(seed=self.SEED, viewset=viewset_class.__name__, trial=trial, fields=fields):
+            self.assertEqual([list(row.items()) for row in from_instances], expected)
+            self.assertEqual([list(row.items()) for row in from_queryset], expected)
+
+    def test_compiled_lists_match_drf(self):
+        rng = random.Random(self.SEED)
+        for trial in range(self.TRIALS):
+            self.randomize(rng)
+            with timezone.override(rng.choice(['UTC', 'Asia/Kolkata'])):
+                for viewset_class in self.VIEWSETS:
+                    self.assert_same_output(viewset_class, rng, trial)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1.0, REQUEST_TIMING_NPLUSONE_THRESHOLD=3, PROFILING_TRIGGER_REFRESH=3600)
+class RequestTimingTests(APITestCase):
+    """Sampled requests report their queries and timings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Cluster.objects.create(cluster_name='Timing', cluster_code='TM')
+
+    def test_sampled_request_reports_timings(self):
+        with self.assertLogs('diagnostics.timing', 'INFO') as logs, CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/clusters/')
+
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'serializer;dur=', 'view;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record['method'], record['path'], record['status']), ('GET', '/api/clusters/', 200))
+        self.assertEqual(record['queries'], len(captured))
+        self.assertIn(f'desc="{len(captured)} queries"', timing)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_not_timed(self):
+        self.client = self.client_class()
+        response = self.client.get('/api/clusters/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_repeated_query_shapes(self):
+        def run(sql, params, many, context):
+            return None
+
+        metrics = RequestMetrics()
+        for ids in ([1], [1, 2], [1, 2, 3]):
+            sql = 'SELECT * FROM students WHERE id IN (%s)' % ', '.join(['%s'] * len(ids))
+            metrics(run, sql, ids, False, {})
+        metrics(run, 'SELECT 1', (), False, {})
+
+        self.assertEqual(sql_shape('x IN (%s, %s)'), 'x IN (...)')
+        self.assertEqual(metrics.queries, 4)
+        self.assertEqual(metrics.repeated_shapes(3), [('SELECT * FROM students WHERE id IN (...)', 3)])
+
+
+@override_settings(PROFILING_TRIGGER_REFRESH=3600)
+class ProfilingTriggerTests(TestCase):
+    """An admin trigger profiles its number of matching requests, then drops out of the cache"""
+
+    def test_trigger_is_used_up(self):
+        trigger = ProfilingTrigger.objects.create(path_prefix='/api/clusters/', method='GET', remaining=2)
+        middleware = ProfilingMiddleware(lambda request: HttpResponse('ok'))
+        factory = RequestFactory()
+
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            profiled = [
+                middleware(factory.get(path)).has_header('X-Profile-Id')
+                for path in ['/api/clusters/', '/api/students/', '/api/clusters/1/', '/api/clusters/']
+            ]
+
+        self.assertEqual(profiled, [True, False, True, False])
+        self.assertEqual(ProfileRecord.objects.filter(trigger='toggle').count(), 2)
+        trigger.refresh_from_db()
+        self.assertEqual(trigger.remaining, 0)
+        self.assertEqual(middleware.matching_triggers(factory.get('/api/clusters/')), [])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SeedLoadDataTests(TestCase):
+    """seed_load_data creates the requested volumes, the same rows for the same seed"""
+    VOLUMES = ['--clusters', '2', '--departments', '2', '--staff', '6', '--students', '40',
+               '--clubs', '3', '--membership-ratio', '0.5', '--batch-size', '7']
+
+    def seed(self, prefix, rng_seed=42):
+        call_command('seed_load_data', *self.VOLUMES, '--prefix', prefix, '--seed', str(rng_seed), stdout=StringIO())
+        return list(
+            Student.objects.filter(student_id__startswith=prefix)
+            .order_by('student_id').values_list('name', 'current_semester', 'cluster__cluster_code')
+        )
+
+    @staticmethod
+    def unprefixed(rows, prefix):
+        return [(name, semester, code[len(prefix):]) for name, semester, code in rows]
+
+    def test_volumes_and_determinism(self):
+        first = self.seed('SA')
+
+        self.assertEqual(len(first), 40)
+        self.assertEqual(Cluster.objects.filter(cluster_code__startswith='SA').count(), 2)
+        self.assertEqual(Department.objects.filter(code__startswith='SA').count(), 2)
+        self.assertEqual(Staff.objects.filter(staff_id__startswith='SA').count(), 6)
+        self.assertEqual(Club.objects.filter(name__startswith='SA ').count(), 3)
+        members = ClubMember.objects.filter(student__student_id__startswith='SA').count()
+        self.assertTrue(0 < members < 40)
+        self.assertEqual(User.objects.filter(username__startswith='sa_').count(), 46)
+        self.assertTrue(User.objects.get(username='sa_student_0').check_password('loadtest123'))
+
+        same = self.seed('SB')
+        other = self.seed('SC', rng_seed=7)
+        self.assertEqual(self.unprefixed(same, 'SB'), self.unprefixed(first, 'SA'))
+        self.assertNotEqual(self.unprefixed(other, 'SC'), self.unprefixed(first, 'SA'))
+
+    def test_existing_prefix_is_refused(self):
+        self.seed('SD')
+        with self.assertRaises(CommandError):
+            self.seed('SD')
+
+
+@override_settings(STARTUP_BUDGETS_MS={'check': 60_000, 'wsgi': 60_000})
+class StartupBudgetTests(SimpleTestCase):
+    """Startup probes run in fresh interpreters; deferred modules must not load there"""
+
+    def test_deferred_modules_stay_unloaded(self):
+        out = StringIO()
+        call_command('startup_budget', runs=1, top=3, stdout=out)
+        self.assertIn('Startup within budget.', out.getvalue())
+
+    @override_settings(STARTUP_DEFERRED_MODULES=['pandas', 'rest_framework'])
+    def test_eager_import_fails(self):
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('startup_budget', runs=1, top=0, stdout=out)
+        self.assertIn('imported deferred modules at startup: rest_framework', out.getvalue())
+
+    def test_parse_importtime(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   _io\n'
+            'import time:      3000 |      45000 | django\n'
+            'import time:       500 |        900 | json\n'
+        )
+        self.assertEqual(parse_importtime(stderr), [(45000, 3000, 'django'), (900, 500, 'json')])
@@ -0,0 +1,184 @@
+"""
+Archiving and purging clusters and departments
+
+Deleting a cluster or department through the ORM collects every student,
+staff member, club and membership below it into memory and deletes them row
+by row, firing a signal per row, and leaves their User accounts behind.
+These operations walk the tree in batches of `batch_size` primary keys
+(keyset pagination, so memory stays bounded however large the cluster):
+
+- archive_* soft-deactivates: students or staff, their clubs (for a
+  department) and User accounts get is_active=False, active club memberships
+  are closed (left_at). Nothing is deleted, and the rows get new timestamps
+  so delta sync and the event stream see the change.
+- purge_* hard-deletes: memberships, clubs, students or staff and finally
+  their User accounts, each batch with a few set-based DELETEs in its own
+  transaction. Tombstones are written in bulk in place of the per-row
+  post_delete signal. A purge interrupted part way can simply be run again.
+
+User accounts are left alone when they are superusers or still belong to
+another student or staff record. `progress(label, done, total)` is called
+after every batch.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from changefeed.models import TRACKED_MODELS, Tombstone
+from clubs.models import Club, ClubMember
+from staff.models import Staff
+from students.models import Student, StudentBulkUpload
+
+BATCH_SIZE = 1000
+
+
+def _batches(queryset, fields, batch_size):
+    """Lists of (pk, *fields) tuples, `batch_size` rows at a time in pk order"""
+    last = None
+    while True:
+        page = queryset.order_by('pk')
+        if last is not None:
+            page = page.filter(pk__gt=last)
+        rows = list(page.values_list('pk', *fields)[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def _noop(label, done, total):
+    pass
+
+
+def _delete(queryset):
+    # One DELETE, bypassing the collector: dependents are removed before
+    # and tombstones are written in bulk instead of by post_delete
+    return queryset._raw_delete(queryset.db)
+
+
+def _tombstones(model, identifiers):
+    Tombstone.objects.bulk_create(
+        Tombstone(resource=model._meta.label_lower, object_id=str(identifier)) for identifier in identifiers
+    )
+
+
+def _removable_users(user_ids):
+    return User.objects.filter(pk__in=user_ids, is_superuser=False)
+
+
+def _delete_users(user_ids):
+    # Their students and staff are gone by now; the collector only has
+    # profiles, sessions and permission links left to clear, batch by batch
+    users = _removable_users(user_ids).filter(student__isnull=True, staff__isnull=True)
+    return users.delete()[1].get(User._meta.label, 0)
+
+
+def _close_memberships(memberships, now):
+    """Close active memberships, bumping their clubs and students for delta sync"""
+    memberships = memberships.filter(is_active=True)
+    Club.objects.filter(pk__in=memberships.values('club_id')).update(updated_at=now)
+    Student.objects.filter(pk__in=memberships.values('student_id')).update(updated_at=now)
+    return memberships.update(is_active=False, left_at=now)
+
+
+def _delete_memberships(memberships, now):
+    Club.objects.filter(pk__in=memberships.values('club_id')).update(updated_at=now)
+    Student.objects.filter(pk__in=memberships.values('student_id')).update(updated_at=now)
+    return _delete(memberships)
+
+
+def archive_cluster(cluster, batch_size=BATCH_SIZE, progress=None):
+    """Deactivate `cluster`, its students and their accounts; returns counts"""
+    progress = progress or _noop
+    students = Student.objects.filter(cluster=cluster)
+    total = students.count()
+    counts = {'students': 0, 'memberships': 0, 'users': 0}
+    for rows in _batches(students, ['user_id'], batch_size):
+        now = timezone.now()
+        pks = [pk for pk, _ in rows]
+        with transaction.atomic():
+            counts['memberships'] += _close_memberships(ClubMember.objects.filter(student_id__in=pks), now)
+            Student.objects.filter(pk__in=pks).update(
+                is_active=False, can_change_club=False, club_change_expires_at=None, updated_at=now
+            )
+            # Still signing in as staff: leave those accounts active
+            users = _removable_users([user_id for _, user_id in rows]).filter(staff__isnull=True)
+            counts['users'] += users.update(is_active=False)
+        counts['students'] += len(rows)
+        progress('students', counts['students'], total)
+    cluster.is_active = False
+    cluster.save(update_fields=['is_active', 'updated_at'])
+    return counts
+
+
+def purge_cluster(cluster, batch_size=BATCH_SIZE, progress=None):
+    """Delete `cluster`, its students, memberships, uploads and accounts; returns counts"""
+    progress = progress or _noop
+    students = Student.objects.filter(cluster=cluster)
+    total = students.count()
+    counts = {'students': 0, 'memberships': 0, 'users': 0}
+    for rows in _batches(students, ['user_id', TRACKED_MODELS['students.Student']], batch_size):
+        now = timezone.now()
+        pks = [pk for pk, _, _ in rows]
+        with transaction.atomic():
+            counts['memberships'] += _delete_memberships(ClubMember.objects.filter(student_id__in=pks), now)
+            _tombstones(Student, [identifier for _, _, identifier in rows])
+            _delete(Student.objects.filter(pk__in=pks))
+            counts['users'] += _delete_users([user_id for _, user_id, _ in rows])
+        counts['students'] += len(rows)
+        progress('students', counts['students'], total)
+    with transaction.atomic():
+        _delete(StudentBulkUpload.objects.filter(cluster=cluster))
+        Staff.objects.filter(mentor_cluster=cluster).update(
+            mentor_cluster=None, mentor_access_enabled=False, last_updated=timezone.now()
+        )
+        cluster.delete()
+    return counts
+
+
+def archive_department(department, batch_size=BATCH_SIZE, progress=None):
+    """Deactivate `department`, its staff, their clubs and accounts; returns counts"""
+    progress = progress or _noop
+    staff = Staff.objects.filter(department=department)
+    total = staff.count()
+    counts = {'staff': 0, 'clubs': 0, 'memberships': 0, 'users': 0}
+    for rows in _batches(staff, ['user_id'], batch_size):
+        now = timezone.now()
+        pks = [pk for pk, _ in rows]
+        clubs = Club.objects.filter(coordinator_id__in=pks)
+        with transaction.atomic():
+            counts['memberships'] += _close_memberships(ClubMember.objects.filter(club__in=clubs), now)
+            counts['clubs'] += clubs.filter(is_active=True).update(is_active=False, updated_at=now)
+            Staff.objects.filter(pk__in=pks).update(is_active=False, last_updated=now)
+            # Still signing in as students: leave those accounts active
+            users = _removable_users([user_id for _, user_id in rows]).filter(student__isnull=True)
+            counts['users'] += users.update(is_active=False)
+        counts['staff'] += len(rows)
+        progress('staff', counts['staff'], total)
+    department.is_active = False
+    department.save(update_fields=['is_active'])
+    return counts
+
+
+def purge_department(department, batch_size=BATCH_SIZE, progress=None):
+    """Delete `department`, its staff, their clubs, memberships and accounts; returns counts"""
+    progress = progress or _noop
+    staff = Staff.objects.filter(department=department)
+    total = staff.count()
+    counts = {'staff': 0, 'clubs': 0, 'memberships': 0, 'users': 0}
+    for rows in _batches(staff, ['user_id'], batch_size):
+        now = timezone.now()
+        pks = [pk for pk, _ in rows]
+        with transaction.atomic():
+            for club_rows in _batches(Club.objects.filter(coordinator_id__in=pks), ['club_id'], batch_size):
+                club_pks = [pk for pk, _ in club_rows]
+                counts['memberships'] += _delete_memberships(ClubMember.objects.filter(club_id__in=club_pks), now)
+                _tombstones(Club, [club_id for _, club_id in club_rows])
+                counts['clubs'] += _delete(Club.objects.filter(pk__in=club_pks))
+            _tombstones(Staff, pks)
+            _delete(Staff.objects.filter(pk__in=pks))
+            counts['users'] += _delete_users([user_id for _, user_id in rows])
+        counts['staff'] += len(rows)
+        progress('staff', counts['staff'], total)
+    department.delete()
+    return counts
@@ -0,0 +1,108 @@
+"""
+Generated downloads that only change with the code
+
+A SpreadsheetTemplate describes an upload template by its sheet title,
+headers and sample rows. The workbook is rendered at most once per process,
+or once at deploy time by `manage.py build_artifacts`, which writes it under
+ARTIFACT_ROOT for every worker to read. Its version is a hash of that
+schema, so a change to the headers gets a new file and a new ETag. A
+download is a copy of the cached bytes, sent with Cache-Control and a weak
+ETag; a client presenting the ETag in If-None-Match gets a 304.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Bump when render() changes, so files built by an older deploy are not reused
+RENDER_VERSION = 1
+
+# Every template defined so far, by file name
+TEMPLATES = {}
+
+
+class SpreadsheetTemplate:
+    """An .xlsx upload template: bold, centred title-cased headers, then sample rows"""
+
+    def __init__(self, filename, title, headers, samples):
+        self.filename = filename
+        self.title = title
+        self.headers = list(headers)
+        self.samples = [list(row) for row in samples]
+        schema = json.dumps([RENDER_VERSION, title, self.headers, self.samples])
+        self.version = hashlib.sha256(schema.encode()).hexdigest()[:16]
+        # Weak: zip entries carry the time they were written, so two builds
+        # of the same version are equivalent but not byte-identical
+        self.etag = f'W/"{self.version}"'
+        self._content = None
+        self._lock = threading.Lock()
+        TEMPLATES[filename] = self
+
+    @property
+    def path(self):
+        """Where build_artifacts writes this version, or None without ARTIFACT_ROOT"""
+        root = getattr(settings, 'ARTIFACT_ROOT', None)
+        if not root:
+            return None
+        stem, extension = os.path.splitext(self.filename)
+        return Path(root) / f'{stem}-{self.version}{extension}'
+
+    @property
+    def content(self):
+        if self._content is None:
+            with self._lock:
+                if self._content is None:
+                    path = self.path
+                    self._content = path.read_bytes() if path and path.is_file() else self.render()
+        return self._content
+
+    def render(self):
+        # Imported on demand: openpyxl adds noticeable startup time to every worker
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment, Font
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = self.title
+        for col, header in enumerate(self.headers, 1):
+            cell = ws.cell(row=1, column=col, value=header.replace('_', ' ').title())
+            cell.font = Font(bold=True)
+            cell.alignment = Alignment(horizontal='center')
+        for row in self.samples:
+            ws.append(row)
+        for column in ws.columns:
+            width = max(len(str(cell.value or '')) for cell in column)
+            ws.column_dimensions[column[0].column_letter].width = min(width + 2, 50)
+
+        output = io.BytesIO()
+        wb.save(output)
+        return output.getvalue()
+
+    def write(self):
+        """Render into ARTIFACT_ROOT (atomically) and return the path"""
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f'.{path.name}.{os.getpid()}')
+        partial.write_bytes(self.render())
+        os.replace(partial, path)
+        with self._lock:
+            self._content = None
+        return path
+
+    def response(self, request):
+        """Download response, or 304 Not Modified if the client has this version"""
+        response = get_conditional_response(request, etag=self.etag)
+        if response is None:
+            response = HttpResponse(self.content, content_type=XLSX_CONTENT_TYPE)
+            response['Content-Disposition'] = f'attachment; filename="{self.filename}"'
+        response['ETag'] = self.etag
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'ARTIFACT_MAX_AGE', 3600))
+        return response
@@ -0,0 +1,112 @@
+"""
+Native async read-only endpoints for high fan-in traffic under ASGI
+
+These mirror the dropdown actions of the DRF viewsets but use Django's async
+ORM, so under an ASGI server they run on the event loop instead of taking a
+worker thread each. Serializers only run over already-loaded rows.
+"""
+import asyncio
+
+from django.db.models import Count, Prefetch, Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from clubs.models import Club, ClubMember
+from clubs.serializers import ClubSerializer
+from clusters.models import Cluster
+from clusters.serializers import ClusterSerializer
+from staff.models import Department, Staff
+from staff.serializers import DepartmentSerializer, StaffSerializer
+from students.models import Student
+from students.serializers import StudentSerializer
+
+
+async def _fetch(queryset):
+    return [obj async for obj in queryset]
+
+
+@require_GET
+async def active_clusters(request):
+    """Active clusters for dropdowns"""
+    clusters = await _fetch(Cluster.objects.filter(is_active=True).order_by('cluster_id'))
+    return JsonResponse(ClusterSerializer(clusters, many=True, context={'request': request}).data, safe=False)
+
+
+@require_GET
+async def active_departments(request):
+    """Active departments for dropdowns"""
+    departments = await _fetch(Department.objects.filter(is_active=True))
+    return JsonResponse(DepartmentSerializer(departments, many=True, context={'request': request}).data, safe=False)
+
+
+@require_GET
+async def active_clubs(request):
+    """Active clubs for dropdowns"""
+    clubs = await _fetch(
+        Club.objects.filter(is_active=True)
+        .select_related('coordinator', 'coordinator__department')
+        .annotate(active_member_count=Count('members', filter=Q(members__is_active=True)))
+        .order_by('name')
+    )
+    return JsonResponse(ClubSerializer(clubs, many=True, context={'request': request}).data, safe=False)
+
+
+@require_GET
+async def mentors_by_department(request):
+    """Staff who can act as mentors, optionally for one department"""
+    queryset = Staff.objects.filter(
+        is_active=True,
+        departmental_access_enabled=True
+    ).select_related('department', 'mentor_cluster')
+    department_id = request.GET.get('department_id')
+    if department_id:
+        queryset = queryset.filter(department_id=department_id)
+    staff = await _fetch(queryset)
+    return JsonResponse(StaffSerializer(staff, many=True, context={'request': request}).data, safe=False)
+
+
+async def _counts(model, **extra):
+    counts = await model.objects.aaggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_active=True)),
+        **extra
+    )
+    return counts
+
+
+@require_GET
+async def dashboard_stats(request):
+    """Totals for the admin dashboard cards"""
+    clusters, departments, staff, students, clubs = await asyncio.gather(
+        _counts(Cluster),
+        _counts(Department),
+        _counts(Staff, mentors=Count('pk', filter=Q(mentor_access_enabled=True))),
+        _counts(Student),
+        _counts(Club),
+    )
+    return JsonResponse({
+        'clusters': clusters,
+        'departments': departments,
+        'staff': staff,
+        'students': students,
+        'clubs': clubs,
+    })
+
+
+@require_GET
+async def my_student_profile(request):
+    """Student self-service: the logged-in student's own record"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    try:
+        student = await Student.objects.select_related('user', 'cluster').prefetch_related(
+            Prefetch(
+                'club_memberships',
+                queryset=ClubMember.objects.filter(is_active=True).select_related('club'),
+                to_attr='active_memberships',
+            )
+        ).aget(user=user)
+    except Student.DoesNotExist:
+        return JsonResponse({'error': 'No student record for this account'}, status=404)
+    return JsonResponse(StudentSerializer(student, context={'request': request}).data)
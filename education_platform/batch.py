@@ -0,0 +1,162 @@
+"""
+Batch endpoint running several API calls in one round trip
+
+Sub-requests are resolved and dispatched in-process, without the middleware
+stack, CORS preflights or per-call session lookups. They share the batch
+request's authenticated user and run in order, so later entries see earlier
+writes.
+"""
+import io
+import json
+import logging
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve, reverse
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+def _validate(data):
+    """Return an error message for a malformed batch body, or None"""
+    if not isinstance(data, dict):
+        return 'The body must be an object with a requests list'
+    entries = data.get('requests')
+    if not isinstance(entries, list) or not entries:
+        return 'requests must be a non-empty list'
+    limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+    if len(entries) > limit:
+        return f'A batch may contain at most {limit} requests'
+    batch_path = reverse('api_batch')
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            return f'requests[{index}] must be an object'
+        if str(entry.get('method', 'GET')).upper() not in METHODS:
+            return f"requests[{index}]: method must be one of {', '.join(sorted(METHODS))}"
+        path = urlsplit(str(entry.get('path', ''))).path
+        if not path.startswith('/api/') or path == batch_path:
+            return f'requests[{index}]: path must be an API path other than the batch endpoint'
+    return None
+
+
+def _sub_request(parent, method, path, body):
+    """Build a request for one entry, reusing the batch request's headers and user"""
+    url = urlsplit(path)
+    payload = b'' if body is None else json.dumps(body).encode()
+    environ = {key: value for key, value in parent.META.items() if not key.startswith('wsgi.')}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': io.BytesIO(payload),
+        'wsgi.url_scheme': parent.scheme,
+    })
+    request = WSGIRequest(environ)
+    user = parent.user
+
+    async def auser():
+        return user
+
+    request.user = user
+    request.auser = auser
+    request.session = parent._request.session
+    # DRF's forced authentication hook: the batch was authenticated (and
+    # CSRF-checked) once, so sub-requests don't authenticate again
+    request._force_auth_user = user
+    request._force_auth_token = parent.auth
+    return request
+
+
+def _result(status_code, body=None, error=None):
+    """One entry of the batch response, JSON encoded"""
+    entry = {'status': status_code, 'body': body}
+    if error:
+        entry['error'] = error
+    return json.dumps(entry).encode()
+
+
+def _encode(response):
+    if getattr(response, 'streaming', False):
+        return _result(response.status_code, error='Streaming responses are not batched')
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    content_type = response.get('Content-Type', '')
+    if 'json' in content_type:
+        # Splice the rendered JSON in as is rather than parsing and re-rendering it
+        body = response.content or b'null'
+        return b'{"status": %d, "body": %s}' % (response.status_code, body)
+    if content_type.startswith('text/'):
+        return _result(response.status_code, response.content.decode(response.charset))
+    return _result(response.status_code, error='Binary responses are not batched')
+
+
+def _render(responses, status_code=status.HTTP_200_OK, **extra):
+    """Assemble the batch response from already encoded entries"""
+    head = json.dumps(extra).encode()[1:-1]
+    body = b'{%s%s"responses": [%s]}' % (head, b', ' if head else b'', b', '.join(code for code, _ in responses))
+    return HttpResponse(body, status=status_code, content_type='application/json')
+
+
+def _execute(parent, entry):
+    method = str(entry.get('method', 'GET')).upper()
+    path = entry['path']
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return _result(status.HTTP_404_NOT_FOUND, {'error': 'Not found'}), status.HTTP_404_NOT_FOUND
+    request = _sub_request(parent, method, path, entry.get('body'))
+    try:
+        if iscoroutinefunction(match.func):
+            response = async_to_sync(match.func)(request, *match.args, **match.kwargs)
+        else:
+            response = match.func(request, *match.args, **match.kwargs)
+        return _encode(response), response.status_code
+    except Exception:
+        logger.exception('Batch sub-request %s %s failed', method, path)
+        code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        return _result(code, {'error': 'Internal server error'}), code
+
+
+@api_view(['POST'])
+def batch(request):
+    """
+    Run several API calls in one request.
+
+    Body: {"requests": [{"method": "GET", "path": "/api/staff/"},
+                        {"method": "POST", "path": "/api/clusters/", "body": {...}}],
+           "transactional": false}
+
+    Returns {"responses": [{"status": ..., "body": ...}, ...]} in order.
+    With "transactional": true, all entries run in one database transaction.
+    The first entry with a 4xx/5xx status stops the batch and rolls it back,
+    and the batch answers 400 with "committed": false. Side effects outside
+    the database, such as emails, are not rolled back.
+    """
+    error = _validate(request.data)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    entries = request.data['requests']
+
+    if not request.data.get('transactional'):
+        return _render([_execute(request, entry) for entry in entries])
+
+    responses = []
+    with transaction.atomic():
+        for entry in entries:
+            responses.append(_execute(request, entry))
+            if responses[-1][1] >= 400:
+                transaction.set_rollback(True)
+                return _render(responses, status.HTTP_400_BAD_REQUEST, committed=False)
+    return _render(responses, committed=True)
@@ -0,0 +1,276 @@
+"""
+Compiled read path for ModelSerializer lists
+
+DRF renders every row field by field: get_attribute walks the source with
+Mapping and callable checks, a missing relation raises and catches
+SkipField, and to_representation is one more method call per value. On
+large list responses that is most of the CPU time. CompiledListSerializer
+derives a plan from the child serializer's fields once per list, with the
+source paths and conversions resolved up front, and renders every row with
+it. The output is the same as the child serializer's. A field whose
+conversion is not known here uses its own to_representation, and one with
+its own get_attribute is read through it.
+
+When the list is an unevaluated queryset and every field reads a column
+(directly, across forward relations, or an annotation), rows are fetched
+with values() and no model instances are built.
+"""
+import datetime
+from functools import cached_property
+from operator import attrgetter, itemgetter
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db.models import QuerySet
+from django.db.models.manager import BaseManager
+from rest_framework import ISO_8601, fields, relations, serializers
+from rest_framework.fields import SkipField, empty
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+from diagnostics.instrumentation import InstrumentedSerializerMixin
+
+_UTC_KEYS = {'UTC', 'Etc/UTC'}
+_DRF_LOOKUPS = {
+    fields.Field.get_attribute, fields.ModelField.get_attribute,
+    relations.RelatedField.get_attribute, relations.ManyRelatedField.get_attribute,
+}
+
+
+def _same(value):
+    return value
+
+
+def _boolean(field):
+    slow = field.to_representation
+
+    def boolean(value):
+        return value if value.__class__ is bool else slow(value)
+    return boolean
+
+
+def _datetime(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    utc = field_timezone is datetime.timezone.utc or getattr(field_timezone, 'key', None) in _UTC_KEYS
+    if output_format is None or output_format.lower() != ISO_8601 or not utc:
+        return field.to_representation
+    slow = field.to_representation
+
+    def iso_utc(value):
+        # Database datetimes arrive in UTC already, so only the suffix changes
+        if value.__class__ is not datetime.datetime or value.tzinfo is not datetime.timezone.utc:
+            return slow(value)
+        return value.isoformat()[:-6] + 'Z'
+    return iso_utc
+
+
+def _converter(field):
+    """Return (function rendering a non-None value, whether it is exact for values() rows)"""
+    method = type(field).to_representation
+    if method is fields.CharField.to_representation:
+        return str, True
+    if method is fields.IntegerField.to_representation:
+        return int, True
+    if method is fields.BooleanField.to_representation:
+        return _boolean(field), True
+    if method is fields.DateTimeField.to_representation:
+        return _datetime(field), True
+    if method is fields.UUIDField.to_representation and field.uuid_format == 'hex_verbose':
+        return str, True
+    if method is fields.ReadOnlyField.to_representation:
+        return _same, True
+    return field.to_representation, False
+
+
+def _forward_model(model, attrs):
+    """Model holding the last of `attrs` if every other attr is a forward relation, else None"""
+    for attr in attrs[:-1]:
+        try:
+            relation = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not relation.concrete or not (relation.many_to_one or relation.one_to_one):
+            return None
+        model = relation.related_model
+    return model
+
+
+def _field_attribute(field):
+    """DRF's own attribute lookup, with pk-only relations resolved to None"""
+    def get(obj):
+        value = field.get_attribute(obj)
+        return None if isinstance(value, PKOnlyObject) and value.pk is None else value
+    return get
+
+
+def _missing(field):
+    """What DRF does with a field whose source crosses an empty relation"""
+    def get(row):
+        if field.default is not empty:
+            return field.get_default()
+        if field.allow_null:
+            return None
+        raise SkipField()
+    return get
+
+
+def _guarded(key, guards, missing):
+    def get(row):
+        for guard in guards:
+            if row[guard] is None:
+                return missing(row)
+        return row[key]
+    return get
+
+
+class CompiledSerializer:
+    """
+    Renderer derived from a bound serializer's readable fields.
+
+    Call it with a model instance, or use `values_rows()` to render a
+    queryset through values(). `columns` is None when some field cannot be
+    read from values() rows.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.plan = []
+        self.row_plan = []
+        self.columns = []
+        for field in serializer._readable_fields:
+            self.add(serializer, field)
+
+    def add(self, serializer, field):
+        name = field.field_name
+        if isinstance(field, serializers.SerializerMethodField):
+            self.plan.append((name, _same, getattr(serializer, field.method_name), field))
+            self.columns = None
+            return
+        if type(field).get_attribute not in _DRF_LOOKUPS:
+            # Not necessarily its source's value, so neither a column nor an attribute
+            self.plan.append((name, _field_attribute(field), _converter(field)[0], field))
+            self.columns = None
+            return
+
+        attrs = field.source_attrs
+        model = _forward_model(self.model, attrs) if attrs else None
+        try:
+            model_field = model._meta.get_field(attrs[-1]) if model is not None else None
+        except FieldDoesNotExist:
+            model_field = None
+
+        if (isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None
+                and len(attrs) == 1 and model_field is not None and model_field.concrete
+                and (model_field.many_to_one or model_field.one_to_one)):
+            # Like DRF's pk-only optimization: read the id without loading the object
+            self.plan.append((name, attrgetter(model_field.attname), _same, field))
+            self.add_column(field, attrs, _same)
+            return
+
+        convert, exact_for_rows = _converter(field)
+        if model_field is not None and model_field.concrete and not model_field.is_relation:
+            self.plan.append((name, attrgetter('.'.join(attrs)), convert, field))
+            if exact_for_rows:
+                self.add_column(field, attrs, convert)
+            else:
+                self.columns = None
+        elif model is not None and isinstance(getattr(model, attrs[-1], None), (property, cached_property)):
+            self.plan.append((name, attrgetter('.'.join(attrs)), convert, field))
+            self.add_annotation(field, attrs, convert, exact_for_rows)
+        else:
+            self.plan.append((name, _field_attribute(field), convert, field))
+            self.add_annotation(field, attrs, convert, exact_for_rows)
+
+    def add_column(self, field, attrs, convert):
+        if self.columns is None:
+            return
+        if len(attrs) > 1 and field.required:
+            # DRF raises rather than skipping; leave that to the instance path
+            self.columns = None
+            return
+        key = '__'.join(attrs)
+        guards = ['__'.join(attrs[:depth]) for depth in range(1, len(attrs))]
+        self.columns.extend(guards + [key])
+        get = _guarded(key, guards, _missing(field)) if guards else itemgetter(key)
+        self.row_plan.append((field.field_name, get, convert))
+
+    def add_annotation(self, field, attrs, convert, exact_for_rows):
+        # A single-attr source may name a queryset annotation; values_rows()
+        # checks that it does before using values()
+        if self.columns is None or len(attrs) != 1 or not exact_for_rows:
+            self.columns = None
+            return
+        self.row_plan.append((field.field_name, itemgetter(attrs[0]), convert))
+        self.columns.append(attrs[0])
+
+    def __call__(self, obj):
+        ret = {}
+        for name, get, convert, field in self.plan:
+            try:
+                value = get(obj)
+            except (AttributeError, ObjectDoesNotExist):
+                # A relation on the path is empty; let the field apply its rules
+                try:
+                    value = _field_attribute(field)(obj)
+                except SkipField:
+                    continue
+            except SkipField:
+                continue
+            ret[name] = None if value is None else convert(value)
+        return ret
+
+    def render_row(self, row):
+        ret = {}
+        for name, get, convert in self.row_plan:
+            try:
+                value = get(row)
+            except SkipField:
+                continue
+            ret[name] = None if value is None else convert(value)
+        return ret
+
+    def values_rows(self, queryset):
+        """Render `queryset` through values(), or return None if it can't be"""
+        # Without an ORDER BY (e.g. Meta.ordering dropped by an aggregate's
+        # GROUP BY) the values() query could return rows in another order
+        if self.columns is None or not queryset.ordered:
+            return None
+        model_columns = {field.name for field in self.model._meta.concrete_fields}
+        for column in self.columns:
+            if '__' not in column and column not in model_columns and column not in queryset.query.annotations:
+                return None
+        rows = queryset.prefetch_related(None).values(*dict.fromkeys(self.columns))
+        return [self.render_row(row) for row in rows]
+
+
+def compilable(serializer):
+    """True unless the serializer customizes to_representation"""
+    for klass in type(serializer).__mro__:
+        if klass is serializers.Serializer:
+            return True
+        if 'to_representation' in vars(klass) and klass is not InstrumentedSerializerMixin:
+            return False
+    return False
+
+
+class CompiledListMixin:
+    def to_representation(self, data):
+        if not compilable(self.child):
+            return super().to_representation(data)
+        if isinstance(data, BaseManager):
+            data = data.all()
+        compiled = CompiledSerializer(self.child)
+        if isinstance(data, QuerySet) and data._result_cache is None:
+            rows = compiled.values_rows(data)
+            if rows is not None:
+                return rows
+        return [compiled(item) for item in data]
+
+
+class CompiledListSerializer(InstrumentedSerializerMixin, CompiledListMixin, serializers.ListSerializer):
+    """
+    list_serializer_class rendering rows with a CompiledSerializer.
+
+    Set it in the serializer's Meta; many=True then renders with the
+    compiled plan, and writes are untouched.
+    """
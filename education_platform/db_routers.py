@@ -0,0 +1,79 @@
+"""
+Database router sending reads to replicas and writes to the primary
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_routing_state = contextvars.ContextVar('replica_routing_state', default=None)
+
+
+class RoutingState:
+    """Per-request routing flags, shared with sync_to_async threads by reference"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def begin_request(pinned=False):
+    """Start routing for a request; returns the token for end_request"""
+    state = RoutingState(pinned)
+    return state, _routing_state.set(state)
+
+
+def end_request(token):
+    _routing_state.reset(token)
+
+
+def pin_to_primary():
+    """Send every following read in this request (or command) to the primary"""
+    state = _routing_state.get()
+    if state is None:
+        state = RoutingState()
+        _routing_state.set(state)
+    state.pinned = True
+    return state
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to a random alias from DATABASE_REPLICAS and writes to the
+    primary. After the first write, reads in the same request stay on the
+    primary; ReplicaPinningMiddleware extends that to the client's next
+    requests for REPLICA_PIN_SECONDS so just-written rows are visible.
+
+    Models of REPLICA_PRIMARY_APPS (sessions, admin log, diagnostics) are
+    read and written on the primary and their writes pin nothing: a session
+    is saved on most authenticated requests, which would otherwise keep all
+    logged-in traffic off the replicas.
+    """
+
+    def __init__(self):
+        self.replicas = list(getattr(settings, 'DATABASE_REPLICAS', []))
+        self.primary_apps = frozenset(getattr(settings, 'REPLICA_PRIMARY_APPS', ()))
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or model._meta.app_label in self.primary_apps:
+            return DEFAULT_DB_ALIAS
+        state = _routing_state.get()
+        if state is not None and state.pinned:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in self.primary_apps:
+            pin_to_primary().wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db not in self.replicas
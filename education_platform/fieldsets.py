@@ -0,0 +1,203 @@
+"""
+Sparse fieldsets (?fields=) and compound includes (?include=) for the API
+
+`?fields=name,email` trims the serialized fields and narrows the queryset to
+the columns and joins those fields need. Each field's `source` is resolved
+against the model; method fields and properties declare what they read in
+the serializer's `Meta.sparse_requires`, using model paths or prefetch names.
+A field that cannot be resolved leaves the columns alone (the output is
+still trimmed).
+
+`?include=cluster,club` embeds the related objects once each, under
+`included`, next to the usual payload under `data`.
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+
+
+class SparseFieldsSerializerMixin:
+    """Serializer accepting `fields=[...]` to drop every other field"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+@dataclass
+class Include:
+    """A related object a viewset can embed with ?include="""
+    path: str  # select_related path or prefetch name that loads the objects
+    serializer: type
+    collection: str  # key under `included`
+    fields: Optional[list] = None
+    getter: Optional[Callable] = None  # obj -> related object(s); defaults to following `path`
+    select: tuple = ()  # further select_related paths the included serializer reads
+
+    def related(self, obj):
+        if self.getter is not None:
+            return self.getter(obj)
+        for attr in self.path.split('__'):
+            obj = getattr(obj, attr, None)
+        return obj
+
+
+def _prefetch_name(lookup):
+    return lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+
+
+def _resolve(model, path):
+    """Return the select_related path `path` traverses, or None if not a column"""
+    parts = path.split('__')
+    for depth, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if depth == len(parts) - 1:
+            return '__'.join(parts[:-1]) if field.concrete else None
+        if not (field.many_to_one or field.one_to_one) or not field.concrete:
+            return None
+        model = field.related_model
+    return None
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet mixin handling ?fields= and ?include= on GET requests.
+
+    `sparse_includes` maps include names to Include declarations.
+    """
+    sparse_includes = {}
+    sparse_fields = None
+    sparse_include = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method != 'GET':
+            return
+        fields = request.query_params.get('fields')
+        if fields:
+            self.sparse_fields = [name for name in fields.split(',') if name]
+            available = [
+                name for name, field in self.get_serializer_class()().fields.items()
+                if not field.write_only
+            ]
+            unknown = [name for name in self.sparse_fields if name not in available]
+            if unknown:
+                raise ParseError(
+                    f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}"
+                )
+        include = request.query_params.get('include')
+        if include:
+            self.sparse_include = [name for name in include.split(',') if name]
+            unknown = [name for name in self.sparse_include if name not in self.sparse_includes]
+            if unknown:
+                raise ParseError(
+                    f"Unknown includes: {', '.join(unknown)}. "
+                    f"Available: {', '.join(self.sparse_includes) or 'none'}"
+                )
+
+    def get_serializer(self, *args, **kwargs):
+        if self.sparse_fields is not None:
+            kwargs.setdefault('fields', self.sparse_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.sparse_fields is None and not self.sparse_include:
+            return queryset
+        includes = [self.sparse_includes[name] for name in self.sparse_include]
+        prefetches = {_prefetch_name(lookup): lookup for lookup in queryset._prefetch_related_lookups}
+        select = set()
+        for include in includes:
+            if include.path not in prefetches:
+                select.add(include.path)
+            select.update(include.select)
+
+        if self.sparse_fields is None:
+            return queryset.select_related(*select) if select else queryset
+        columns = self.sparse_columns(queryset.model, prefetches)
+        if columns is None:
+            return queryset.select_related(*select) if select else queryset
+
+        only, needed_prefetches = columns
+        needed_prefetches |= {include.path for include in includes if include.path in prefetches}
+        # Included objects are serialized in full: name each loaded relation in
+        # only() without any path below it, or Django defers its other columns
+        full = {path for path in select if not any(path.startswith(f'{other}__') for other in select)}
+        only = {path for path in only if not any(path.startswith(f'{other}__') for other in full)} | full
+        select |= {_resolve(queryset.model, path) for path in only} - {'', None}
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        kept = [prefetches[name] for name in prefetches if name in needed_prefetches]
+        if kept:
+            queryset = queryset.prefetch_related(*kept)
+        return queryset.only(*only)
+
+    def sparse_columns(self, model, prefetches):
+        """
+        Return (only() paths, prefetch names) needed by the requested fields,
+        or None when a field's dependencies are unknown.
+        """
+        serializer = self.get_serializer_class()
+        requires = getattr(serializer.Meta, 'sparse_requires', {})
+        fields = serializer().fields
+        only, needed_prefetches = {model._meta.pk.name}, set()
+        for name in self.sparse_fields:
+            if name in requires:
+                paths = requires[name]
+            elif fields[name].source == '*':
+                return None
+            else:
+                paths = [fields[name].source.replace('.', '__')]
+            for path in paths:
+                if path in prefetches:
+                    needed_prefetches.add(path)
+                elif _resolve(model, path) is None:
+                    return None
+                else:
+                    only.add(path)
+        return only, needed_prefetches
+
+    def list(self, request, *args, **kwargs):
+        if not self.sparse_include:
+            return super().list(request, *args, **kwargs)
+        rows = list(self.filter_queryset(self.get_queryset()))
+        serializer = self.get_serializer(rows, many=True)
+        return Response({'data': serializer.data, 'included': self.included(rows)})
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.sparse_include:
+            return super().retrieve(request, *args, **kwargs)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response({'data': serializer.data, 'included': self.included([instance])})
+
+    def included(self, rows):
+        """Serialize each included related object once"""
+        included = {}
+        for name in self.sparse_include:
+            include = self.sparse_includes[name]
+            objects = {}
+            for row in rows:
+                related = include.related(row)
+                if related is None:
+                    continue
+                for obj in related if isinstance(related, (list, tuple)) else [related]:
+                    objects.setdefault(obj.pk, obj)
+            serializer = include.serializer(
+                list(objects.values()), many=True, fields=include.fields,
+                context=self.get_serializer_context()
+            )
+            included[include.collection] = serializer.data
+        return included
@@ -0,0 +1,171 @@
+"""
+Resized, metadata-free renditions of uploaded photos
+
+When a tracked image field changes, the photo is decoded once and resized
+into each of IMAGE_RENDITIONS (longest side in pixels), then re-encoded
+(WebP by default) without EXIF, GPS, ICC or other metadata. Rendition
+names carry a hash of the source bytes, so a URL changes whenever the
+photo does and can be cached indefinitely; an identical upload reuses the
+files already written.
+
+Rendering runs on a small thread pool once the saving transaction commits
+(Pillow releases the GIL while decoding, resizing and encoding). The
+result lands in a JSON field next to the image, {"source": <image name>,
+<rendition>: <storage name>, ...}; until then callers fall back to the
+original image.
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+RENDITION_DIR = 'renditions'
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png', 'AVIF': 'avif'}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def renditions():
+    return getattr(settings, 'IMAGE_RENDITIONS', {'thumb': 64, 'small': 160, 'medium': 480})
+
+
+def render(data, storage):
+    """
+    Write the renditions of the image in `data` to `storage`, skipping any
+    that already exist, and return {rendition: storage name}.
+    """
+    image_format = getattr(settings, 'IMAGE_RENDITION_FORMAT', 'WEBP')
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    sizes = renditions()
+    names = {
+        name: f'{RENDITION_DIR}/{digest[:2]}/{digest}-{size}.{EXTENSIONS[image_format]}'
+        for name, size in sizes.items()
+    }
+    missing = {name: path for name, path in names.items() if not storage.exists(path)}
+    if not missing:
+        return names
+
+    with Image.open(io.BytesIO(data)) as source:
+        # Let JPEG decode at a reduced scale when the photo is much larger
+        largest = max(sizes[name] for name in missing)
+        source.draft('RGB', (largest * 2, largest * 2))
+        # Apply the EXIF orientation before the metadata is dropped
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha and image_format != 'JPEG' else 'RGB')
+        image.info = {}
+        # Largest first, each resized from the previous one
+        for name in sorted(missing, key=sizes.get, reverse=True):
+            size = sizes[name]
+            image.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, quality=getattr(settings, 'IMAGE_RENDITION_QUALITY', 80))
+            names[name] = storage.save(missing[name], ContentFile(buffer.getvalue()))
+    return names
+
+
+def build(model, pk, image_field, renditions_field, source):
+    """Render `source` and record the renditions on the row, if it still shows that image"""
+    close_old_connections()
+    try:
+        storage = model._meta.get_field(image_field).storage
+        result = {'source': source}
+        try:
+            with storage.open(source, 'rb') as file:
+                result.update(render(file.read(), storage))
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+            # Recorded without renditions so it isn't retried; the original is served
+            logger.warning('Could not render %s for %s %s', source, model._meta.label, pk, exc_info=True)
+        changes = {renditions_field: result}
+        # Bump auto_now timestamps so delta sync and the event stream see the new URLs
+        now = timezone.now()
+        changes.update({field.name: now for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)})
+        model._default_manager.filter(pk=pk, **{image_field: source}).update(**changes)
+    except Exception:
+        logger.exception('Building renditions of %s for %s %s failed', source, model._meta.label, pk)
+    finally:
+        close_old_connections()
+
+
+def pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2),
+                thread_name_prefix='renditions',
+            )
+    return _pool
+
+
+def schedule(*args):
+    if getattr(settings, 'IMAGE_RENDITION_WORKERS', 2):
+        pool().submit(build, *args)
+    else:
+        build(*args)
+
+
+def image_saved(sender, instance, image_field, renditions_field, using, raw=False, **kwargs):
+    if raw:
+        return
+    source = getattr(instance, image_field).name or ''
+    current = getattr(instance, renditions_field) or {}
+    if source == current.get('source', ''):
+        return
+    if current:
+        # The old renditions belong to the previous photo
+        sender._default_manager.using(using).filter(pk=instance.pk).update(**{renditions_field: {}})
+        setattr(instance, renditions_field, {})
+    if source:
+        transaction.on_commit(
+            partial(schedule, sender, instance.pk, image_field, renditions_field, source), using=using
+        )
+
+
+def track(model, image_field, renditions_field):
+    """Keep `renditions_field` in step with `image_field` on every save of `model`"""
+    post_save.connect(
+        partial(image_saved, image_field=image_field, renditions_field=renditions_field),
+        sender=model, weak=False, dispatch_uid=f'renditions:{model._meta.label}.{image_field}',
+    )
+
+
+def rendition_url(file, renditions, name):
+    """URL of rendition `name` of `file`, or of the original until it's rendered"""
+    if not file:
+        return None
+    path = renditions.get(name) if renditions and renditions.get('source') == file.name else None
+    return file.storage.url(path) if path else file.url
+
+
+class RenditionsField(serializers.Field):
+    """Read-only {rendition: URL} for a renditions JSON field; {} while pending"""
+
+    def __init__(self, storage=None, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.storage = storage or default_storage
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for name, path in value.items():
+            if name == 'source':
+                continue
+            url = self.storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request is not None else url
+        return urls
@@ -0,0 +1,256 @@
+"""
+Project-wide middleware for the education platform API
+"""
+import gzip
+import hashlib
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+from . import db_routers
+
+
+class _GzipStream:
+    def __init__(self):
+        # wbits=31 produces a gzip container rather than a raw zlib stream
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=5)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, chunk):
+        return (
+            self._compressor.compress(chunk)
+            + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def _available_codecs():
+    codecs = {
+        'gzip': (gzip_compress, _GzipStream),
+    }
+    if brotli is not None:
+        codecs['br'] = (lambda data: brotli.compress(data, quality=5), _BrotliStream)
+    if zstandard is not None:
+        codecs['zstd'] = (lambda data: zstandard.ZstdCompressor(level=3).compress(data), _ZstdStream)
+    return codecs
+
+
+def gzip_compress(data):
+    """Gzip a payload with a fixed mtime so identical bodies compress identically"""
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def parse_accept_encoding(header):
+    """Return a dict of coding -> q-value from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses using the best encoding the client accepts.
+
+    Brotli and zstd are offered when their packages are installed, gzip is
+    always available. Only COMPRESSION_CONTENT_TYPES are compressed, so HTML
+    pages with CSRF tokens (admin, browsable API) stay uncompressed and out
+    of reach of BREACH. Bodies smaller than COMPRESSION_MIN_SIZE are sent as-is,
+    streaming responses are compressed chunk by chunk, and compressed bodies
+    of successful GET responses are cached by content hash so repeated list
+    payloads are not recompressed.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.codecs = _available_codecs()
+        preference = getattr(settings, 'COMPRESSION_ENCODINGS', ['br', 'zstd', 'gzip'])
+        self.preference = [coding for coding in preference if coding in self.codecs]
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.content_types = tuple(getattr(settings, 'COMPRESSION_CONTENT_TYPES', ('application/json',)))
+        self.cache_alias = getattr(settings, 'COMPRESSION_CACHE_ALIAS', 'default')
+        self.cache_timeout = getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 300)
+        self.cache_max_size = getattr(settings, 'COMPRESSION_CACHE_MAX_SIZE', 5 * 1024 * 1024)
+
+    def choose_encoding(self, request):
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wildcard = accepted.get('*', 0.0)
+        best, best_quality = None, 0.0
+        for coding in self.preference:
+            quality = accepted.get(coding, wildcard)
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        return best
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(self.content_types):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = self.choose_encoding(request)
+        if coding is None:
+            return response
+
+        compress, stream_class = self.codecs[coding]
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._compress_async(
+                    response.streaming_content, stream_class
+                )
+            else:
+                response.streaming_content = self._compress_stream(
+                    response.streaming_content, stream_class
+                )
+            del response.headers['Content-Length']
+        else:
+            compressed = self._compress_body(request, response, coding, compress)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A compressed body is no longer byte-identical to the original
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
+
+    def _compress_body(self, request, response, coding, compress):
+        content = response.content
+        cacheable = (
+            request.method == 'GET'
+            and response.status_code == 200
+            and len(content) <= self.cache_max_size
+            and 'no-store' not in response.get('Cache-Control', '')
+        )
+        if not cacheable:
+            return compress(content)
+
+        cache = caches[self.cache_alias]
+        key = f'compressed:{coding}:{hashlib.sha256(content).hexdigest()}'
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(content)
+            cache.set(key, compressed, self.cache_timeout)
+        return compressed
+
+    @staticmethod
+    def _compress_stream(chunks, stream_class):
+        stream = stream_class()
+        for chunk in chunks:
+            data = stream.compress(bytes(chunk))
+            if data:
+                yield data
+        yield stream.finish()
+
+    @staticmethod
+    async def _compress_async(chunks, stream_class):
+        stream = stream_class()
+        async for chunk in chunks:
+            data = stream.compress(bytes(chunk))
+            if data:
+                yield data
+        yield stream.finish()
+
+
+class ReplicaPinningMiddleware:
+    """
+    Keep a client's reads on the primary right after it writes.
+
+    Unsafe methods are pinned to the primary for the whole request. A request
+    that writes sets a short-lived cookie, and requests carrying that cookie
+    are pinned too, so a just-created student is visible on the next page
+    load even if the replicas lag behind.
+    """
+    sync_capable = True
+    async_capable = True
+    unsafe_methods = frozenset(['POST', 'PUT', 'PATCH', 'DELETE'])
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie_name = getattr(settings, 'REPLICA_PIN_COOKIE', 'db_primary_pin')
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def pinned(self, request):
+        return request.method in self.unsafe_methods or self.cookie_name in request.COOKIES
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = db_routers.begin_request(self.pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            db_routers.end_request(token)
+        return self.set_pin_cookie(state, response)
+
+    async def __acall__(self, request):
+        state, token = db_routers.begin_request(self.pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_routers.end_request(token)
+        return self.set_pin_cookie(state, response)
+
+    def set_pin_cookie(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax'
+            )
+        return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,15 +50,21 @@ INSTALLED_APPS = [
     'students',
     'clubs',
     'clusters',
+    'diagnostics',
+    'changefeed',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'education_platform.middleware.CompressionMiddleware',
+    'education_platform.middleware.ReplicaPinningMiddleware',
+    'diagnostics.middleware.RequestTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'diagnostics.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,13 +92,64 @@ WSGI_APPLICATION = 'education_platform.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Production SQLite profile, opted into with DJANGO_SQLITE_PROFILE=production
+# and applied on every new connection: WAL lets reads proceed while an upload
+# writes, busy_timeout waits for the write lock instead of failing with
+# "database is locked", and BEGIN IMMEDIATE takes that lock up front so a
+# transaction never fails halfway when upgrading to a write. Development and
+# tests keep Django's defaults.
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=10000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-32000',
+    'PRAGMA temp_store=MEMORY',
+]
+SQLITE_OPTIONS = {
+    'init_command': ';'.join(SQLITE_PRAGMAS),
+    'transaction_mode': 'IMMEDIATE',
+}
+SQLITE_PRODUCTION = os.environ.get('DJANGO_SQLITE_PROFILE') == 'production'
+# The production profile reuses connections across requests (checked before
+# reuse). ASGI servers run each request on a fresh thread, so set
+# DJANGO_CONN_MAX_AGE=0 there.
+CONN_MAX_AGE = int(os.environ.get('DJANGO_CONN_MAX_AGE', 600 if SQLITE_PRODUCTION else 0))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS if SQLITE_PRODUCTION else {},
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': SQLITE_PRODUCTION,
+        # Tests always get a throwaway in-memory database, never db.sqlite3
+        'TEST': {'NAME': ':memory:'},
     }
 }
 
+# Read replicas: every alias other than 'default' receives read traffic.
+# DJANGO_SQLITE_REPLICA=1 adds a local stand-in, db_replica.sqlite3, which
+# `manage.py sync_replica` copies from the primary.
+if os.environ.get('DJANGO_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS if SQLITE_PRODUCTION else {},
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': SQLITE_PRODUCTION,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['education_platform.db_routers.PrimaryReplicaRouter']
+# After a write, the client's reads stay on the primary for this long
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'db_primary_pin'
+# Apps kept on the primary whose writes don't pin the request (session
+# saves, admin log entries, profiling records)
+REPLICA_PRIMARY_APPS = ['sessions', 'admin', 'diagnostics']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,6 +194,21 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Photo renditions (education_platform.images): name -> longest side in pixels.
+# Names are content hashed, so they can be served with a far-future
+# Cache-Control: immutable.
+IMAGE_RENDITIONS = {'thumb': 64, 'small': 160, 'medium': 480}
+IMAGE_RENDITION_FORMAT = 'WEBP'
+IMAGE_RENDITION_QUALITY = 80
+# Background threads rendering them; 0 renders inline when the save commits
+IMAGE_RENDITION_WORKERS = int(os.environ.get('DJANGO_IMAGE_WORKERS', 2))
+
+# Generated downloads such as upload templates (education_platform.artifacts).
+# `manage.py build_artifacts` renders them here at deploy time; without the
+# files each worker renders them once on first request.
+ARTIFACT_ROOT = BASE_DIR / 'artifacts'
+ARTIFACT_MAX_AGE = 3600
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -163,6 +236,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-profile-token',
 ]
 
 # REST Framework settings
@@ -176,6 +250,106 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Response compression
+# Encodings in order of preference; br and zstd are used only when the
+# brotli / zstandard packages are installed.
+COMPRESSION_ENCODINGS = ['br', 'zstd', 'gzip']
+COMPRESSION_MIN_SIZE = 1024
+# Only these content types are compressed: API payloads and exports. HTML
+# pages carry CSRF tokens, which compression would expose to BREACH, and
+# images, XLSX and the event stream gain nothing from it.
+COMPRESSION_CONTENT_TYPES = [
+    'application/json',
+    'text/csv',
+]
+COMPRESSION_CACHE_ALIAS = 'default'
+COMPRESSION_CACHE_TIMEOUT = 300
+COMPRESSION_CACHE_MAX_SIZE = 5 * 1024 * 1024
+
+# Request instrumentation
+# Fraction of requests (0.0 - 1.0) that get Server-Timing headers and a
+# structured timing log line. Independent of DEBUG so production traffic
+# can be sampled continuously.
+REQUEST_TIMING_SAMPLE_RATE = 0.05
+# Identical query shapes repeated this many times in one request are
+# logged as a likely N+1.
+REQUEST_TIMING_NPLUSONE_THRESHOLD = 5
+
+# On-demand profiling: requests carrying a signed X-Profile-Token header
+# (manage.py profile_token <path>) or matching an active ProfilingTrigger
+# are run under cProfile and stored as ProfileRecord rows.
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_TRIGGER_REFRESH = 10
+
+# Startup budget checked by `manage.py startup_budget`: median wall time of
+# `manage.py check` and of a WSGI worker loading the URLconf, plus modules
+# that must only be imported on demand.
+STARTUP_BUDGETS_MS = {
+    'check': 1500,
+    'wsgi': 1200,
+}
+STARTUP_DEFERRED_MODULES = ['pandas', 'openpyxl', 'numpy']
+
+# Delta sync (GET <resource>/changes/?changed_since=): rows per page, how far
+# before the server clock the final cursor starts, and how long tombstones
+# for deleted rows are kept (older cursors must do a full sync).
+CHANGEFEED_PAGE_SIZE = 500
+CHANGEFEED_OVERLAP_SECONDS = 5
+CHANGEFEED_TOMBSTONE_RETENTION_DAYS = 30
+
+# Event stream (GET /api/events/, ASGI only). Changes made in other processes
+# are found by polling every EVENT_STREAM_POLL_INTERVAL seconds while anyone
+# is subscribed (0 turns polling off for single-process deployments).
+EVENT_STREAM_POLL_INTERVAL = 2
+EVENT_STREAM_HEARTBEAT = 15
+EVENT_STREAM_RETRY_MS = 3000
+EVENT_STREAM_QUEUE_SIZE = 100
+BULK_UPLOAD_PROGRESS_EVERY = 25
+# An upload still "processing" after this many seconds without progress is
+# taken to have died, and the same file may be uploaded again
+BULK_UPLOAD_STALE_AFTER = 600
+# Name similarity (Dice coefficient of character trigrams, 0-1) at which an
+# uploaded student is flagged as a likely duplicate (students.duplicates)
+STUDENT_DUPLICATE_THRESHOLD = 0.7
+
+# Import endpoints (education_platform.uploads): largest request accepted,
+# size above which the file is spooled to FILE_UPLOAD_TEMP_DIR rather than
+# kept in memory, and imports running at once per worker process
+BULK_UPLOAD_MAX_BYTES = int(os.environ.get('DJANGO_BULK_UPLOAD_MAX_BYTES', 20 * 2 ** 20))
+BULK_UPLOAD_SPOOL_BYTES = int(os.environ.get('DJANGO_BULK_UPLOAD_SPOOL_BYTES', 2 ** 20))
+BULK_UPLOAD_CONCURRENCY = int(os.environ.get('DJANGO_BULK_UPLOAD_CONCURRENCY', 2))
+FILE_UPLOAD_TEMP_DIR = os.environ.get('DJANGO_FILE_UPLOAD_TEMP_DIR') or None
+
+# Seconds between sweeps of `manage.py sweep_club_grants --watch`
+CLUB_GRANT_SWEEP_INTERVAL = float(os.environ.get('DJANGO_CLUB_GRANT_SWEEP_INTERVAL', 60))
+
+# Days after a cluster's term rollover during which another one is refused
+# unless forced (students.rollover)
+ROLLOVER_MIN_INTERVAL_DAYS = 60
+
+# Most sub-requests accepted by POST /api/batch/
+BATCH_MAX_REQUESTS = 20
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'diagnostics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'students.grants': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 # Email settings (configure with your SMTP details)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -0,0 +1,526 @@
+import gzip
+import io
+import json
+import tempfile
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile, TemporaryUploadedFile
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from clubs.models import Club
+from clusters.models import Cluster
+from diagnostics.seeding import SeedVolumes, SyntheticDataGenerator
+from openpyxl import load_workbook
+from PIL import Image
+
+from staff.models import Department, Staff
+from staff.serializers import StaffSerializer
+from students.bulk_import import UploadFormatError
+from students.models import Student
+from . import artifacts, db_routers, images, uploads
+from .middleware import CompressionMiddleware, ReplicaPinningMiddleware, parse_accept_encoding
+
+PAYLOAD = json.dumps([{'name': f'Student {i}', 'email': f'student{i}@example.com'} for i in range(100)]).encode()
+
+
+@override_settings(
+    COMPRESSION_ENCODINGS=['br', 'zstd', 'gzip'], COMPRESSION_MIN_SIZE=1024,
+    COMPRESSION_CONTENT_TYPES=['application/json', 'text/csv'],
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Encoding negotiation and which responses get compressed"""
+
+    def respond(self, response, accept='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        # Only gzip is guaranteed; br and zstd depend on optional packages
+        middleware.preference = ['gzip']
+        return middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept))
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding('gzip;q=0.5, br, identity;q=0, zstd;q=abc'),
+            {'gzip': 0.5, 'br': 1.0, 'identity': 0.0, 'zstd': 0.0},
+        )
+
+    def test_negotiation(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        middleware.preference = ['br', 'gzip']
+        for header, expected in [
+            ('gzip, br', 'br'), ('gzip, br;q=0.5', 'gzip'), ('*', 'br'), ('*;q=0, gzip', 'gzip'),
+            ('gzip;q=0', None), ('identity', None), ('', None),
+        ]:
+            with self.subTest(header=header):
+                request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(middleware.choose_encoding(request), expected)
+
+    def test_json_is_compressed(self):
+        response = self.respond(HttpResponse(PAYLOAD, content_type='application/json', headers={'ETag': '"v1"'}))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), PAYLOAD)
+
+    def test_not_compressed(self):
+        cases = {
+            'html': (HttpResponse(PAYLOAD, content_type='text/html; charset=utf-8'), 'gzip'),
+            'small': (HttpResponse(b'{}', content_type='application/json'), 'gzip'),
+            'not accepted': (HttpResponse(PAYLOAD, content_type='application/json'), 'identity'),
+            'encoded': (HttpResponse(PAYLOAD, content_type='application/json',
+                                     headers={'Content-Encoding': 'br'}), 'gzip'),
+        }
+        for name, (original, accept) in cases.items():
+            with self.subTest(name):
+                response = self.respond(original, accept)
+                self.assertEqual(response.content, PAYLOAD if name != 'small' else b'{}')
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_csv_stream_is_compressed_chunk_by_chunk(self):
+        rows = [f'{i},Student {i}\n'.encode() for i in range(500)]
+        response = self.respond(StreamingHttpResponse(iter(rows), content_type='text/csv'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(rows))
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    REQUEST_TIMING_SAMPLE_RATE=0.0, PROFILING_TRIGGER_REFRESH=3600,
+)
+class AsyncViewTests(TestCase):
+    """The async endpoints, run through the ASGI request handler, answer like their DRF actions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataGenerator(
+            SeedVolumes(clusters=3, departments=2, staff=8, students=10, clubs=4, membership_ratio=1.0),
+            prefix='AV', batch_size=100,
+        ).run()
+        Cluster.objects.filter(cluster_code='AV0002').update(is_active=False)
+        cls.student = Student.objects.select_related('user').order_by('pk').first()
+
+    async def same_as_drf(self, async_path, drf_path):
+        response = await self.async_client.get(async_path)
+        self.assertEqual(response.status_code, 200)
+        expected = await sync_to_async(self.client.get)(drf_path)
+        self.assertEqual(response.json(), expected.json())
+        return response.json()
+
+    async def test_dropdowns_match_drf(self):
+        clusters = await self.same_as_drf('/api/async/clusters/active/', '/api/clusters/active_clusters/')
+        self.assertEqual(len(clusters), 2)
+        await self.same_as_drf('/api/async/departments/active/', '/api/departments/active_departments/')
+        await self.same_as_drf('/api/async/clubs/active/', '/api/clubs/active_clubs/')
+        department = await Department.objects.order_by('pk').afirst()
+        await self.same_as_drf(
+            f'/api/async/staff/mentors/?department_id={department.pk}',
+            f'/api/staff/mentors_by_department/?department_id={department.pk}',
+        )
+
+    async def test_dashboard_stats(self):
+        response = await self.async_client.get('/api/async/stats/')
+
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertEqual(stats['clusters'], {'total': 3, 'active': 2})
+        self.assertEqual(stats['students']['total'], 10)
+        self.assertEqual(stats['clubs']['total'], await Club.objects.acount())
+        self.assertIn('mentors', stats['staff'])
+
+    async def test_my_student_profile(self):
+        response = await self.async_client.get('/api/async/students/me/')
+        self.assertEqual(response.status_code, 401)
+
+        await self.async_client.aforce_login(await User.objects.acreate(username='not_a_student'))
+        response = await self.async_client.get('/api/async/students/me/')
+        self.assertEqual(response.status_code, 404)
+
+        await self.async_client.aforce_login(self.student.user)
+        response = await self.async_client.get('/api/async/students/me/')
+        self.assertEqual(response.status_code, 200)
+        expected = await sync_to_async(self.client.get)(f'/api/students/{self.student.pk}/')
+        self.assertEqual(response.json(), expected.json())
+
+    async def test_only_get(self):
+        response = await self.async_client.post('/api/async/stats/')
+        self.assertEqual(response.status_code, 405)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    REQUEST_TIMING_SAMPLE_RATE=0.0, PROFILING_TRIGGER_REFRESH=3600,
+)
+class SparseFieldsetTests(TestCase):
+    """?fields= trims the output and the query; ?include= embeds related objects once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataGenerator(
+            SeedVolumes(clusters=2, departments=1, staff=3, students=12, clubs=3, membership_ratio=1.0),
+            prefix='SF', batch_size=100,
+        ).run()
+
+    def get(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/students/', params)
+        self.assertEqual(response.status_code, 200)
+        # The profiling middleware's first trigger refresh is not the view's
+        return response.json(), [query['sql'] for query in queries if 'profiling_triggers' not in query['sql']]
+
+    def test_fields_trim_output_and_columns(self):
+        rows, queries = self.get({'fields': 'name,email'})
+
+        self.assertEqual(len(rows), 12)
+        self.assertEqual({tuple(row) for row in rows}, {('name', 'email')})
+        [select] = [sql for sql in queries if 'FROM "students"' in sql]
+        columns = select.split(' FROM ')[0]
+        self.assertIn('"students"."email"', columns)
+        self.assertNotIn('"students"."phone"', columns)
+        self.assertNotIn('JOIN', select)
+        self.assertFalse([sql for sql in queries if 'club_members' in sql])
+
+    def test_fields_keep_what_method_fields_need(self):
+        rows, queries = self.get({'fields': 'name,current_club,cluster_name'})
+
+        self.assertEqual({frozenset(row) for row in rows}, {frozenset(['name', 'current_club', 'cluster_name'])})
+        self.assertTrue(all(row['current_club'] and row['cluster_name'] for row in rows))
+        [select] = [sql for sql in queries if 'FROM "students"' in sql]
+        self.assertIn('JOIN "clusters"', select)
+        self.assertNotIn('auth_user', select)
+        self.assertTrue([sql for sql in queries if 'FROM "club_members"' in sql])
+
+    def test_unknown_fields_and_includes(self):
+        for params, message in [
+            ({'fields': 'name,nope'}, 'Unknown fields: nope'),
+            ({'fields': 'password'}, 'Unknown fields: password'),
+            ({'include': 'mentor'}, 'Unknown includes: mentor'),
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get('/api/students/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, response.json()['detail'])
+
+    def test_include_embeds_each_related_object_once(self):
+        body, queries = self.get({'fields': 'student_id,cluster', 'include': 'cluster,club'})
+
+        self.assertEqual(len(body['data']), 12)
+        clusters = body['included']['clusters']
+        self.assertEqual(sorted(cluster['cluster_code'] for cluster in clusters), ['SF0000', 'SF0001'])
+        self.assertEqual({row['cluster'] for row in body['data']}, {cluster['cluster_id'] for cluster in clusters})
+        club_ids = [club['club_id'] for club in body['included']['clubs']]
+        self.assertEqual(len(club_ids), len(set(club_ids)))
+        self.assertLessEqual(len(club_ids), 3)
+        self.assertEqual(len(queries), 2)
+
+        student = Student.objects.order_by('pk').first()
+        response = self.client.get(f'/api/students/{student.pk}/', {'include': 'cluster'})
+        self.assertEqual(response.json()['included']['clusters'][0]['cluster_id'], student.cluster_id)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0, PROFILING_TRIGGER_REFRESH=3600, BATCH_MAX_REQUESTS=4)
+class BatchTests(TestCase):
+    """POST /api/batch/ runs its entries in order, optionally in one transaction"""
+
+    def batch(self, body):
+        return self.client.post('/api/batch/', json.dumps(body), content_type='application/json')
+
+    def test_entries_run_in_order(self):
+        response = self.batch({'requests': [
+            {'method': 'POST', 'path': '/api/clusters/', 'body': {'cluster_name': 'Batch', 'cluster_code': 'BT'}},
+            {'path': '/api/clusters/active_clusters/'},
+            {'path': '/api/nope/'},
+            {'method': 'POST', 'path': '/api/clusters/active_clusters/'},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([entry['status'] for entry in responses], [201, 200, 404, 405])
+        self.assertEqual(responses[0]['body']['cluster_code'], 'BT')
+        self.assertIn('BT', [cluster['cluster_code'] for cluster in responses[1]['body']])
+        self.assertNotIn('committed', response.json())
+
+    def test_transactional_batch_rolls_back_on_failure(self):
+        entries = [
+            {'method': 'POST', 'path': '/api/clusters/', 'body': {'cluster_name': 'First', 'cluster_code': 'T1'}},
+            {'method': 'POST', 'path': '/api/clusters/', 'body': {'cluster_name': 'Again', 'cluster_code': 'T1'}},
+            {'path': '/api/clusters/'},
+        ]
+        response = self.batch({'requests': entries, 'transactional': True})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIs(response.json()['committed'], False)
+        self.assertEqual([entry['status'] for entry in response.json()['responses']], [201, 400])
+        self.assertFalse(Cluster.objects.filter(cluster_code='T1').exists())
+
+        response = self.batch({'requests': entries[:1], 'transactional': True})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.json()['committed'], True)
+        self.assertTrue(Cluster.objects.filter(cluster_code='T1').exists())
+
+    def test_malformed_batches(self):
+        entry = {'path': '/api/clusters/'}
+        for body, message in [
+            ([entry], 'The body must be an object'),
+            ({'requests': []}, 'non-empty list'),
+            ({'requests': [entry] * 5}, 'at most 4 requests'),
+            ({'requests': [entry, 'x']}, 'requests[1] must be an object'),
+            ({'requests': [{'method': 'HEAD', 'path': '/api/clusters/'}]}, 'method must be one of'),
+            ({'requests': [{'path': '/admin/'}]}, 'other than the batch endpoint'),
+            ({'requests': [{'method': 'POST', 'path': '/api/batch/?x=1'}]}, 'other than the batch endpoint'),
+        ]:
+            with self.subTest(body=body):
+                response = self.batch(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, response.json()['error'])
+
+
+def photo(size=(1200, 900), color='teal', image_format='JPEG'):
+    """A photo carrying EXIF orientation and GPS tags"""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+    exif[0x8825] = {2: (51.0, 30.0, 0.0)}  # GPSInfo: latitude
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format, exif=exif)
+    return buffer.getvalue()
+
+
+@override_settings(
+    IMAGE_RENDITIONS={'thumb': 64, 'medium': 480}, IMAGE_RENDITION_FORMAT='WEBP', IMAGE_RENDITION_WORKERS=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], REQUEST_TIMING_SAMPLE_RATE=0.0,
+)
+class ImageRenditionTests(TestCase):
+    """Photos are resized into metadata-free renditions once the save commits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataGenerator(
+            SeedVolumes(clusters=1, departments=1, staff=1, students=0, clubs=0), prefix='IR', batch_size=100,
+        ).run()
+        cls.staff = Staff.objects.get()
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        media_root = self.settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def test_render(self):
+        storage = FileSystemStorage(self.media_root)
+
+        names = images.render(photo(), storage)
+
+        self.assertEqual(set(names), {'thumb', 'medium'})
+        for name, size in [('thumb', 64), ('medium', 480)]:
+            with storage.open(names[name]) as file, Image.open(file) as rendition:
+                self.assertEqual(rendition.format, 'WEBP')
+                # Rotated by the EXIF orientation, then scaled to the longest side
+                self.assertEqual(rendition.size, (size * 3 // 4, size))
+                self.assertFalse(rendition.getexif())
+                self.assertNotIn('icc_profile', rendition.info)
+        # The same photo reuses the files already written
+        self.assertEqual(images.render(photo(), storage), names)
+        self.assertNotEqual(images.render(photo(color='red'), storage), names)
+
+    def test_photo_change_builds_renditions_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.staff.photo = SimpleUploadedFile('face.jpg', photo())
+            self.staff.save()
+            self.assertEqual(Staff.objects.get(pk=self.staff.pk).photo_renditions, {})
+
+        self.assertEqual(len(callbacks), 1)
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.photo_renditions['source'], self.staff.photo.name)
+        urls = StaffSerializer(self.staff).data['photo_thumbnails']
+        self.assertEqual(set(urls), {'thumb', 'medium'})
+        self.assertTrue(urls['thumb'].endswith('-64.webp'))
+        self.assertEqual(self.staff.display_name_with_photo['photo'], urls['thumb'])
+
+        # Saving without changing the photo leaves the renditions alone
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.staff.save()
+        self.assertEqual(callbacks, [])
+
+    def test_unreadable_photo_falls_back_to_the_original(self):
+        with self.assertLogs('education_platform.images', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            self.staff.photo = SimpleUploadedFile('face.jpg', b'not an image')
+            self.staff.save()
+
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.photo_renditions, {'source': self.staff.photo.name})
+        self.assertEqual(self.staff.display_name_with_photo['photo'], self.staff.photo.url)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0, PROFILING_TRIGGER_REFRESH=3600, ARTIFACT_MAX_AGE=600)
+class ArtifactTests(TestCase):
+    """Upload templates are served with a version ETag and built once at deploy time"""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+
+    def template(self, headers=('name', 'email')):
+        template = artifacts.SpreadsheetTemplate('test.xlsx', 'Test', headers, [['Ann', 'ann@example.com']])
+        self.addCleanup(artifacts.TEMPLATES.pop, 'test.xlsx', None)
+        return template
+
+    def test_download_and_not_modified(self):
+        response = self.client.get('/api/students/template/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], artifacts.XLSX_CONTENT_TYPE)
+        self.assertIn('filename="students_template.xlsx"', response['Content-Disposition'])
+        self.assertIn('max-age=600', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        sheet = load_workbook(io.BytesIO(response.content)).active
+        self.assertEqual(sheet.cell(1, 1).value, 'Name')
+
+        response = self.client.get('/api/students/template/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('max-age=600', response['Cache-Control'])
+
+        response = self.client.get('/api/students/template/', HTTP_IF_NONE_MATCH='W/"older"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_version_follows_the_schema(self):
+        template = self.template()
+
+        self.assertEqual(self.template().etag, template.etag)
+        self.assertNotEqual(self.template(headers=('name', 'phone')).etag, template.etag)
+
+    def test_build_artifacts(self):
+        with override_settings(ARTIFACT_ROOT=self.root):
+            template = self.template()
+            stale = template.path.with_name('test-0000000000000000.xlsx')
+            stale.write_bytes(b'old')
+
+            call_command('build_artifacts', stdout=io.StringIO())
+
+            self.assertTrue(template.path.is_file())
+            self.assertFalse(stale.exists())
+            # A worker reads the built file instead of rendering it again
+            template.path.write_bytes(b'built')
+            self.assertEqual(self.template().content, b'built')
+
+        with override_settings(ARTIFACT_ROOT=None):
+            self.assertEqual(load_workbook(io.BytesIO(self.template().content)).active.title, 'Test')
+
+
+@override_settings(
+    REQUEST_TIMING_SAMPLE_RATE=0.0, PROFILING_TRIGGER_REFRESH=3600,
+    BULK_UPLOAD_MAX_BYTES=4096, BULK_UPLOAD_SPOOL_BYTES=1024,
+)
+class UploadLimitTests(TestCase):
+    """Import actions refuse oversized bodies, spool large files and cap concurrent imports"""
+
+    def setUp(self):
+        # A fresh pool of two slots for each test
+        patcher = mock.patch.object(uploads, '_slots', threading.BoundedSemaphore(2))
+        self.slots = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, size, cluster='none'):
+        csv = SimpleUploadedFile('students.csv', b'x' * size)
+        return self.client.post('/api/students/bulk_upload/', {'file': csv, 'cluster': cluster})
+
+    def test_too_large_from_content_length(self):
+        response = self.upload(5000)
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()['detail'], 'Uploads are limited to 4.0\xa0KB')
+        # The slot was never taken
+        self.assertTrue(self.slots.acquire(blocking=False) and self.slots.acquire(blocking=False))
+
+    def test_too_large_from_the_running_total(self):
+        handler = uploads.SizeLimitUploadHandler()
+        handler.handle_raw_input(None, {}, None, b'boundary')
+        self.assertEqual(handler.receive_data_chunk(b'x' * 4000, 0), b'x' * 4000)
+
+        with self.assertRaises(uploads.UploadTooLarge):
+            # The second file of the request: the limit is for the whole body
+            handler.receive_data_chunk(b'x' * 100, 0)
+        with self.assertRaises(uploads.UploadTooLarge):
+            handler.handle_raw_input(None, {}, 4097, b'boundary')
+
+    def test_busy_when_slots_are_taken(self):
+        self.slots.acquire()
+        self.slots.acquire()
+
+        response = self.upload(10)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        # Other actions are not limited
+        self.assertEqual(self.client.get('/api/students/').status_code, 200)
+
+    def test_slot_is_released_and_large_files_spooled(self):
+        received = []
+
+        def read(file, file_format):
+            received.append(type(file))
+            raise UploadFormatError('stop here')
+
+        cluster = Cluster.objects.create(cluster_name='Limits', cluster_code='LM')
+        with mock.patch('students.views.iter_upload', side_effect=read):
+            for size in [100, 2000]:
+                self.assertEqual(self.upload(size, cluster.pk).status_code, 400)
+
+        self.assertEqual(received, [InMemoryUploadedFile, TemporaryUploadedFile])
+        self.assertTrue(self.slots.acquire(blocking=False) and self.slots.acquire(blocking=False))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PRIMARY_APPS=['sessions'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Reads go to replicas until the request writes an app model"""
+
+    def setUp(self):
+        self.router = db_routers.PrimaryReplicaRouter()
+        self.state, token = db_routers.begin_request()
+        self.addCleanup(db_routers.end_request, token)
+
+    def test_reads_use_replicas_until_a_write(self):
+        self.assertEqual(self.router.db_for_read(Student), 'replica')
+        self.assertEqual(self.router.db_for_write(Student), 'default')
+        self.assertTrue(self.state.wrote)
+        self.assertEqual(self.router.db_for_read(Student), 'default')
+
+    def test_session_writes_do_not_pin(self):
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.assertEqual(self.router.db_for_write(Session), 'default')
+        self.assertFalse(self.state.wrote)
+        self.assertEqual(self.router.db_for_read(Student), 'replica')
+
+    def test_pin_cookie_follows_app_writes_only(self):
+        def view(model):
+            def get_response(request):
+                self.router.db_for_write(model)
+                return HttpResponse()
+            return ReplicaPinningMiddleware(get_response)
+
+        request = RequestFactory().get('/')
+        self.assertNotIn('db_primary_pin', view(Session)(request).cookies)
+        self.assertIn('db_primary_pin', view(Student)(request).cookies)
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    def test_tests_use_an_in_memory_database(self):
+        self.assertIn('mode=memory', str(connection.settings_dict['NAME']))
@@ -0,0 +1,120 @@
+"""
+Bounded memory for file import endpoints
+
+Viewsets list their import actions in `upload_actions`. For those actions:
+
+- Requests larger than BULK_UPLOAD_MAX_BYTES are refused with 413, from the
+  Content-Length before anything is read, or as soon as a body without one
+  goes over.
+- Files above BULK_UPLOAD_SPOOL_BYTES are written to a temporary file
+  (FILE_UPLOAD_TEMP_DIR) instead of being held in memory, and the readers
+  parse them from disk.
+- At most BULK_UPLOAD_CONCURRENCY imports run at once in a worker process;
+  further ones get 503 with Retry-After instead of queueing behind them.
+"""
+import os
+import threading
+from io import UnsupportedOperation
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from rest_framework import exceptions, status
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def max_bytes():
+    return getattr(settings, 'BULK_UPLOAD_MAX_BYTES', 20 * 2 ** 20)
+
+
+class UploadTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_code = 'upload_too_large'
+
+    def __init__(self):
+        super().__init__(f'Uploads are limited to {filesizeformat(max_bytes())}')
+
+
+class UploadsBusy(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many imports are running; try again shortly.'
+    default_code = 'uploads_busy'
+    wait = 5  # sent as Retry-After
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Refuse the request once more than BULK_UPLOAD_MAX_BYTES arrive; passes data on"""
+    received = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > max_bytes():
+            raise UploadTooLarge()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        # `start` is the offset in the current file; the limit is for the request
+        self.received += len(raw_data)
+        if self.received > max_bytes():
+            raise UploadTooLarge()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class SpoolingUploadHandler(MemoryFileUploadHandler):
+    """Django's in-memory handler with BULK_UPLOAD_SPOOL_BYTES as its limit"""
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        stream = getattr(input_data, '_stream', input_data)
+        try:
+            content_length = stream.seek(0, os.SEEK_END)
+        except (UnsupportedOperation, AttributeError):
+            pass
+        else:
+            stream.seek(0)
+        limit = getattr(settings, 'BULK_UPLOAD_SPOOL_BYTES', 2 ** 20)
+        self.activated = content_length is not None and content_length <= limit
+
+
+def slots():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(getattr(settings, 'BULK_UPLOAD_CONCURRENCY', 2))
+    return _slots
+
+
+class UploadLimitMixin:
+    """ViewSet mixin applying the size, spooling and concurrency limits to `upload_actions`"""
+    upload_actions = ()
+    upload_slot = False
+
+    def initial(self, request, *args, **kwargs):
+        if self.action in self.upload_actions:
+            try:
+                content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                content_length = 0
+            if content_length > max_bytes():
+                raise UploadTooLarge()
+            if not slots().acquire(blocking=False):
+                raise UploadsBusy()
+            self.upload_slot = True
+            # Before authentication, whose CSRF check parses the body
+            request._request.upload_handlers = [
+                SizeLimitUploadHandler(request._request),
+                SpoolingUploadHandler(request._request),
+                TemporaryFileUploadHandler(request._request),
+            ]
+        super().initial(request, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.upload_slot:
+                self.upload_slot = False
+                slots().release()
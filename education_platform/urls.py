@@ -18,16 +18,25 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from . import views
+from . import views, async_views, batch
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/status/', views.api_status, name='api_status'),
+    path('api/batch/', batch.batch, name='api_batch'),
+    # Async read endpoints (served natively under ASGI)
+    path('api/async/clusters/active/', async_views.active_clusters, name='async_active_clusters'),
+    path('api/async/departments/active/', async_views.active_departments, name='async_active_departments'),
+    path('api/async/clubs/active/', async_views.active_clubs, name='async_active_clubs'),
+    path('api/async/staff/mentors/', async_views.mentors_by_department, name='async_mentors_by_department'),
+    path('api/async/stats/', async_views.dashboard_stats, name='async_dashboard_stats'),
+    path('api/async/students/me/', async_views.my_student_profile, name='async_my_student_profile'),
     path('api/', include('clusters.urls')),
     path('api/', include('staff.urls')),
     path('api/', include('students.urls')),
     path('api/', include('clubs.urls')),
     path('api/', include('accounts.urls')),
+    path('api/', include('changefeed.urls')),
 ]
 
 # Serve media files during development
@@ -28,12 +28,18 @@ const StaffManagement = () => {
     setLoading(true);
     setError(null);
     try {
-      const [staffResponse, departmentsResponse] = await Promise.all([
-        apiService.getStaff(),
-        apiService.getDepartments()
+      const response = await apiService.batch([
+        { method: 'GET', path: '/api/staff/' },
+        { method: 'GET', path: '/api/departments/' }
       ]);
-      setStaffList(staffResponse.data || []);
-      setDepartments(departmentsResponse.data || []);
+      const [staffResponse, departmentsResponse] = response.data.responses;
+      // The batch itself succeeds even when a sub-request fails
+      const failed = response.data.responses.find((entry) => entry.status >= 400);
+      if (failed) {
+        throw new Error(`Batch sub-request failed with status ${failed.status}`);
+      }
+      setStaffList(staffResponse.body || []);
+      setDepartments(departmentsResponse.body || []);
     } catch (error) {
       console.error('Error loading data:', error);
       setError('Failed to load data. Please try again.');
@@ -142,6 +148,55 @@ const StaffManagement = () => {
     }
   };
 
+  // Bulk import from the spreadsheet template
+  const [showImportModal, setShowImportModal] = useState(false);
+  const [importFile, setImportFile] = useState(null);
+  const [importResult, setImportResult] = useState(null);
+  const [importing, setImporting] = useState(false);
+
+  const handleDownloadTemplate = async () => {
+    try {
+      const response = await apiService.downloadStaffTemplate();
+      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'staff_template.xlsx';
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error downloading template:', error);
+      setError('Failed to download the staff template');
+    }
+  };
+
+  const handleImport = async (e) => {
+    e.preventDefault();
+    if (!importFile) {
+      setError('Choose an .xlsx file to import');
+      return;
+    }
+    setImporting(true);
+    setError(null);
+    try {
+      const data = new FormData();
+      data.append('file', importFile);
+      const response = await apiService.uploadStaff(data);
+      setImportResult(response.data);
+      loadData();
+    } catch (error) {
+      console.error('Error importing staff:', error);
+      setError(error.response?.data?.error || 'Failed to import staff');
+    } finally {
+      setImporting(false);
+    }
+  };
+
+  const closeImportModal = () => {
+    setShowImportModal(false);
+    setImportFile(null);
+    setImportResult(null);
+  };
+
   // Department management functions
   const [newDepartmentName, setNewDepartmentName] = useState('');
   const [newDepartmentCode, setNewDepartmentCode] = useState('');
@@ -214,10 +269,16 @@ const StaffManagement = () => {
           <i className="fas fa-users-cog me-2"></i>
           Staff Management
         </h2>
-        <Button variant="primary" onClick={() => setShowModal(true)}>
-          <i className="fas fa-plus me-2"></i>
-          Add New Staff
-        </Button>
+        <div className="d-flex gap-2">
+          <Button variant="outline-primary" onClick={() => setShowImportModal(true)}>
+            <i className="fas fa-file-upload me-2"></i>
+            Import Staff
+          </Button>
+          <Button variant="primary" onClick={() => setShowModal(true)}>
+            <i className="fas fa-plus me-2"></i>
+            Add New Staff
+          </Button>
+        </div>
       </div>
 
       {/* Error Alert */}
@@ -299,7 +360,7 @@ const StaffManagement = () => {
                                    style={{width: '32px', height: '32px'}}>
                                 {staffMember.photo ? (
                                   <img 
-                                    src={staffMember.photo} 
+                                    src={staffMember.photo_thumbnails?.thumb || staffMember.photo} 
                                     alt={staffMember.name}
                                     className="rounded-circle"
                                     style={{width: '32px', height: '32px', objectFit: 'cover'}}
@@ -632,6 +693,60 @@ const StaffManagement = () => {
           </Modal.Footer>
         </Form>
       </Modal>
+
+      {/* Bulk Import Modal */}
+      <Modal show={showImportModal} onHide={closeImportModal}>
+        <Modal.Header closeButton>
+          <Modal.Title>
+            <i className="fas fa-file-upload me-2"></i>
+            Import Staff
+          </Modal.Title>
+        </Modal.Header>
+        <Form onSubmit={handleImport}>
+          <Modal.Body>
+            <p className="text-muted">
+              Fill in the staff template and upload it here. Rows with errors are skipped and listed below.
+            </p>
+            <Button variant="link" className="px-0 mb-3" onClick={handleDownloadTemplate}>
+              <i className="fas fa-download me-2"></i>
+              Download Template
+            </Button>
+            <Form.Group>
+              <Form.Label>Spreadsheet (.xlsx)</Form.Label>
+              <Form.Control
+                type="file"
+                accept=".xlsx"
+                onChange={(e) => setImportFile(e.target.files[0] || null)}
+              />
+            </Form.Group>
+            {importResult && (
+              <Alert variant={importResult.errors.length ? 'warning' : 'success'} className="mt-3 mb-0">
+                <div>{importResult.message}</div>
+                {importResult.errors.length > 0 && (
+                  <ul className="mb-0 mt-2">
+                    {importResult.errors.map((message) => (
+                      <li key={message}>{message}</li>
+                    ))}
+                  </ul>
+                )}
+              </Alert>
+            )}
+          </Modal.Body>
+          <Modal.Footer>
+            <Button variant="secondary" onClick={closeImportModal}>
+              Close
+            </Button>
+            <Button variant="primary" type="submit" disabled={importing || !importFile}>
+              {importing ? (
+                <>
+                  <Spinner animation="border" size="sm" className="me-2" />
+                  Importing...
+                </>
+              ) : 'Import'}
+            </Button>
+          </Modal.Footer>
+        </Form>
+      </Modal>
     </div>
   );
 };
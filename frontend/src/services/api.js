@@ -32,6 +32,9 @@ API.interceptors.request.use((config) => {
 export const apiService = {
   // Test API connection
   getStatus: () => API.get('/status/'),
+
+  // Run several calls in one round trip: requests = [{ method, path, body }]
+  batch: (requests, transactional = false) => API.post('/batch/', { requests, transactional }),
   
   // Clusters
   getClusters: () => API.get('/clusters/'),
@@ -46,6 +49,8 @@ export const apiService = {
   updateStaff: (id, data) => API.put(`/staff/${id}/`, data),
   deleteStaff: (id) => API.delete(`/staff/${id}/`),
   toggleStaffStatus: (id) => API.post(`/staff/${id}/toggle_status/`),
+  uploadStaff: (data) => API.post('/staff/bulk_upload/', data),
+  downloadStaffTemplate: () => API.get('/staff/template/', { responseType: 'blob' }),
   
   // Departments
   getDepartments: () => API.get('/departments/'),
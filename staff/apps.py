@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class StaffConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'staff'
+
+    def ready(self):
+        from education_platform import images
+        from .models import Staff
+
+        images.track(Staff, 'photo', 'photo_renditions')
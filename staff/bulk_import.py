@@ -0,0 +1,215 @@
+"""
+Bulk staff import from the spreadsheet template
+
+Rows are streamed from the workbook (openpyxl read-only mode) and handled a
+chunk at a time: each chunk is validated in memory, checked for staff_id,
+email and username clashes with one query per key set, and inserted with
+one bulk_create for the users and one for the staff. Department and mentor
+cluster codes are resolved from dictionaries loaded once per import. Rows
+that can't be imported are reported with their spreadsheet row number; the
+rest are imported.
+"""
+import itertools
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from clusters.models import Cluster
+from .models import Department, Staff
+
+TEMPORARY_PASSWORD = 'temp123'
+
+COLUMNS = [
+    'staff_id', 'name', 'email', 'phone', 'subject_expertise', 'qualification',
+    'department_code', 'mentor_cluster_code', 'departmental_access_enabled', 'mentor_access_enabled',
+]
+REQUIRED_COLUMNS = ['staff_id', 'name', 'email', 'subject_expertise', 'qualification', 'department_code']
+TEXT_FIELDS = ['staff_id', 'name', 'email', 'phone', 'subject_expertise', 'qualification']
+TRUE_VALUES = {'true', 'yes', 'y', '1'}
+FALSE_VALUES = {'false', 'no', 'n', '0', ''}
+
+
+@lru_cache(maxsize=1)
+def temporary_password_hash(hashers):
+    # PBKDF2 takes about half a second and the password is the same for
+    # everyone; keyed on PASSWORD_HASHERS so a change of hasher rehashes
+    return make_password(TEMPORARY_PASSWORD)
+
+
+class StaffImportError(Exception):
+    """The file as a whole can't be imported (unreadable, missing columns)"""
+
+
+class StaffImporter:
+    """
+    Import staff rows from an .xlsx file; `created` and `errors` hold the
+    outcome. Every user gets the same temporary password as staff created
+    one at a time, hashed once per process.
+    """
+
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+        self.departments = {code.upper(): pk for pk, code in Department.objects.values_list('pk', 'code')}
+        self.clusters = {code.upper(): pk for pk, code in Cluster.objects.values_list('pk', 'cluster_code')}
+        self.max_lengths = {name: Staff._meta.get_field(name).max_length for name in TEXT_FIELDS}
+        self.password_hash = temporary_password_hash(tuple(settings.PASSWORD_HASHERS))
+        self.seen_staff_ids = set()
+        self.seen_emails = set()
+        self.rows = 0
+        self.created = []
+        self.errors = []
+
+    def run(self, file):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                raise StaffImportError('The file is empty')
+            # The template writes title-cased headers ("Staff Id")
+            columns = ['' if col is None else str(col).strip().lower().replace(' ', '_') for col in header]
+            missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+            if missing:
+                raise StaffImportError(f'Missing required columns: {", ".join(missing)}')
+            positions = {name: columns.index(name) for name in COLUMNS if name in columns}
+
+            numbered = enumerate(rows, 2)
+            while chunk := list(itertools.islice(numbered, self.chunk_size)):
+                self.import_chunk([
+                    (number, {name: row[i] if i < len(row) else None for name, i in positions.items()})
+                    for number, row in chunk
+                    if any(value not in (None, '') for value in row)
+                ])
+        finally:
+            workbook.close()
+        return self
+
+    def clean(self, values):
+        """Return (Staff field values, error messages) for one row"""
+        text = {name: '' if values.get(name) is None else str(values[name]).strip() for name in values}
+        errors = []
+        for name in REQUIRED_COLUMNS:
+            if not text.get(name):
+                errors.append(f'{name} is required')
+        for name in TEXT_FIELDS:
+            if len(text.get(name, '')) > self.max_lengths[name]:
+                errors.append(f'{name} is longer than {self.max_lengths[name]} characters')
+        if text.get('email'):
+            try:
+                validate_email(text['email'])
+            except ValidationError:
+                errors.append('email is not a valid email address')
+
+        department = self.departments.get(text.get('department_code', '').upper())
+        if text.get('department_code') and department is None:
+            errors.append(f'unknown department code "{text["department_code"]}"')
+        mentor_cluster = None
+        if text.get('mentor_cluster_code'):
+            mentor_cluster = self.clusters.get(text['mentor_cluster_code'].upper())
+            if mentor_cluster is None:
+                errors.append(f'unknown cluster code "{text["mentor_cluster_code"]}"')
+
+        flags = {}
+        for name in ('departmental_access_enabled', 'mentor_access_enabled'):
+            value = text.get(name, '').lower()
+            if value not in TRUE_VALUES | FALSE_VALUES:
+                errors.append(f'{name} must be yes or no')
+            flags[name] = value in TRUE_VALUES
+
+        staff_id, email = text.get('staff_id'), text.get('email')
+        if staff_id and staff_id in self.seen_staff_ids:
+            errors.append(f'staff_id "{staff_id}" appears more than once in the file')
+        if email and email in self.seen_emails:
+            errors.append(f'email "{email}" appears more than once in the file')
+        self.seen_staff_ids.add(staff_id)
+        self.seen_emails.add(email)
+
+        return {
+            'staff_id': staff_id,
+            'name': text.get('name'),
+            'email': email,
+            'phone': text.get('phone') or None,
+            'subject_expertise': text.get('subject_expertise'),
+            'qualification': text.get('qualification'),
+            'department_id': department,
+            'mentor_cluster_id': mentor_cluster,
+            **flags,
+        }, errors
+
+    def import_chunk(self, rows):
+        self.rows += len(rows)
+        failed = []
+        self.insert_valid(rows, failed)
+        self.errors.extend(f'Row {number}: {message}' for number, message in sorted(failed))
+
+    def insert_valid(self, rows, failed):
+        cleaned = []
+        for number, values in rows:
+            fields, errors = self.clean(values)
+            if errors:
+                failed.append((number, '; '.join(errors)))
+            else:
+                cleaned.append((number, fields))
+        if not cleaned:
+            return
+
+        staff_ids = [fields['staff_id'] for _, fields in cleaned]
+        emails = [fields['email'] for _, fields in cleaned]
+        taken_ids = set(Staff.objects.filter(staff_id__in=staff_ids).values_list('staff_id', flat=True))
+        # Staff usernames are their staff ids
+        taken_ids |= set(User.objects.filter(username__in=staff_ids).values_list('username', flat=True))
+        taken_emails = set(Staff.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        valid = []
+        for number, fields in cleaned:
+            errors = []
+            if fields['staff_id'] in taken_ids:
+                errors.append(f'staff_id "{fields["staff_id"]}" already exists')
+            if fields['email'] in taken_emails:
+                errors.append(f'email "{fields["email"]}" already exists')
+            if errors:
+                failed.append((number, '; '.join(errors)))
+            else:
+                valid.append((number, fields))
+
+        try:
+            with transaction.atomic():
+                self.insert([fields for _, fields in valid])
+        except IntegrityError:
+            # Another import or admin took one of the ids since the check;
+            # insert row by row so only the clashing rows fail
+            for number, fields in valid:
+                try:
+                    with transaction.atomic():
+                        self.insert([fields])
+                except IntegrityError as exc:
+                    failed.append((number, str(exc)))
+
+    def insert(self, rows):
+        if not rows:
+            return
+        users = User.objects.bulk_create([
+            User(
+                username=User.normalize_username(fields['staff_id']),
+                email=User.objects.normalize_email(fields['email']),
+                password=self.password_hash,
+            )
+            for fields in rows
+        ])
+        if users[0].pk is None:
+            # Backends that can't return ids from a bulk insert
+            ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'pk'))
+            for user in users:
+                user.pk = ids[user.username]
+        Staff.objects.bulk_create([Staff(user=user, **fields) for user, fields in zip(users, rows)])
+        self.created.extend(
+            {'staff_id': fields['staff_id'], 'name': fields['name'], 'email': fields['email']}
+            for fields in rows
+        )
@@ -0,0 +1,41 @@
+"""
+Management command archiving or purging a department (education_platform.archival)
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from staff.models import Department
+from education_platform import archival
+
+
+class Command(BaseCommand):
+    help = 'Deactivate a department with its staff, their clubs and accounts, or delete them with --purge'
+
+    def add_arguments(self, parser):
+        parser.add_argument('code', help='Department code')
+        parser.add_argument('--purge', action='store_true', help='Delete instead of deactivating')
+        parser.add_argument('--batch-size', type=int, default=archival.BATCH_SIZE, help='Staff per batch')
+        parser.add_argument('--no-input', action='store_false', dest='interactive', help='Do not ask to confirm --purge')
+
+    def handle(self, *args, **options):
+        try:
+            department = Department.objects.get(code=options['code'])
+        except Department.DoesNotExist:
+            raise CommandError(f"Unknown department: {options['code']}")
+        if options['purge'] and options['interactive']:
+            answer = input(f'Delete {department.name}, its staff, their clubs and accounts? Type "yes" to continue: ')
+            if answer != 'yes':
+                raise CommandError('Purge cancelled')
+
+        operation = archival.purge_department if options['purge'] else archival.archive_department
+        start = time.perf_counter()
+        counts = operation(department, batch_size=options['batch_size'], progress=self.progress)
+        summary = ', '.join(f'{count} {label}' for label, count in counts.items())
+        verb = 'Purged' if options['purge'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {department.code}: {summary} in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def progress(self, label, done, total):
+        self.stdout.write(f'  {label}: {done}/{total}')
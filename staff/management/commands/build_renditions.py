@@ -0,0 +1,43 @@
+"""
+Management command rendering photo renditions for rows saved before they
+existed, or after the rendition sizes changed
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserProfile
+from education_platform import images
+from staff.models import Staff
+
+TRACKED = [
+    (Staff, 'photo', 'photo_renditions'),
+    (UserProfile, 'profile_picture', 'profile_picture_renditions'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Render missing photo renditions for staff photos and profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render every photo, not only missing ones')
+        parser.add_argument(
+            '--workers', type=int, default=max(getattr(settings, 'IMAGE_RENDITION_WORKERS', 2), 1),
+            help='Photos rendered in parallel'
+        )
+
+    def handle(self, *args, **options):
+        wanted = set(images.renditions())
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for model, image_field, renditions_field in TRACKED:
+                queued = 0
+                rows = model._default_manager.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+                for pk, source, current in rows.values_list('pk', image_field, renditions_field).iterator():
+                    current = current or {}
+                    if not options['all'] and current.get('source') == source and wanted <= set(current):
+                        continue
+                    pool.submit(images.build, model, pk, image_field, renditions_field, source)
+                    queued += 1
+                self.stdout.write(f'{model._meta.verbose_name_plural}: {queued} photos queued')
+        self.stdout.write(self.style.SUCCESS('Renditions built'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0002_cluster_clusters_updated_idx'),
+        ('staff', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='staff',
+            index=models.Index(fields=['last_updated', 'id'], name='staff_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0002_staff_staff_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='staff',
+            name='photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from clusters.models import Cluster
+from education_platform.images import rendition_url
 
 class Department(models.Model):
     """Department model for organizing staff members"""
@@ -24,6 +25,8 @@ class Staff(models.Model):
     qualification = models.CharField(max_length=200)
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     photo = models.ImageField(upload_to='staff_photos/', blank=True, null=True)
+    # Resized copies of photo, kept up to date by education_platform.images
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     phone = models.CharField(max_length=15, blank=True, null=True)
     email = models.EmailField(unique=True)
     
@@ -46,6 +49,9 @@ class Staff(models.Model):
     class Meta:
         db_table = 'staff'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['last_updated', 'id'], name='staff_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.staff_id})"
@@ -55,7 +61,7 @@ class Staff(models.Model):
         """For dropdown display with name and photo info"""
         return {
             'name': self.name,
-            'photo': self.photo.url if self.photo else None,
+            'photo': rendition_url(self.photo, self.photo_renditions, 'thumb'),
             'department': self.department.name,
             'id': self.id
         }
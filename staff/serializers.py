@@ -1,26 +1,34 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from diagnostics.instrumentation import InstrumentedSerializerMixin
+from education_platform.compiled import CompiledListSerializer
+from education_platform.fieldsets import SparseFieldsSerializerMixin
+from education_platform.images import RenditionsField
+from .bulk_import import TEMPORARY_PASSWORD
 from .models import Staff, Department
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(InstrumentedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = ['id', 'name', 'code', 'description', 'is_active', 'created_at']
 
-class StaffSerializer(serializers.ModelSerializer):
+class StaffSerializer(InstrumentedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     mentor_cluster_name = serializers.CharField(source='mentor_cluster.cluster_name', read_only=True)
     display_info = serializers.SerializerMethodField()
+    photo_thumbnails = RenditionsField(source='photo_renditions')
     
     class Meta:
         model = Staff
         fields = [
             'id', 'staff_id', 'name', 'email', 'phone', 'subject_expertise',
-            'qualification', 'department', 'department_name', 'photo',
+            'qualification', 'department', 'department_name', 'photo', 'photo_thumbnails',
             'departmental_access_enabled', 'mentor_access_enabled',
             'mentor_cluster', 'mentor_cluster_name', 'is_active',
             'date_joined', 'last_updated', 'display_info'
         ]
+        sparse_requires = {'display_info': ['name', 'photo', 'photo_renditions', 'department__name']}
+        list_serializer_class = CompiledListSerializer
 
     def get_display_info(self, obj):
         """Return display info for dropdowns"""
@@ -31,7 +39,7 @@ class StaffSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(
             username=validated_data['staff_id'],
             email=validated_data['email'],
-            password='temp123'  # Temporary password
+            password=TEMPORARY_PASSWORD
         )
         validated_data['user'] = user
         return super().create(validated_data)
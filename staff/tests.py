@@ -1,3 +1,220 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from openpyxl import Workbook
+
+from changefeed.models import Tombstone
+from clubs.models import Club, ClubMember
+from clusters.models import Cluster
+from diagnostics.seeding import SeedVolumes, SyntheticDataGenerator
+from education_platform import archival
+from students.models import Student
+from .bulk_import import StaffImporter, StaffImportError
+from .models import Department, Staff
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after_first_batch(label, done, total):
+    raise Interrupted()
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    REQUEST_TIMING_SAMPLE_RATE=0.0,
+)
+class DepartmentArchivalTests(TestCase):
+    """archive_department and purge_department on a seeded department"""
+
+    @classmethod
+    def setUpTestData(cls):
+        volumes = SeedVolumes(clusters=1, departments=2, staff=30, students=60, clubs=15, membership_ratio=1.0)
+        SyntheticDataGenerator(volumes, prefix='AD', batch_size=100).run()
+        cls.department = Department.objects.get(code='ADD0000')
+        cls.other = Department.objects.get(code='ADD0001')
+        cls.department_pk = cls.department.pk
+        staff = Staff.objects.filter(department=cls.department)
+        cls.superuser = staff.first().user
+        cls.superuser.is_superuser = True
+        cls.superuser.save()
+        # An account that is on the department's staff and a student too
+        cls.student_user = staff.last().user
+        Student.objects.create(
+            user=cls.student_user, student_id='ADSTAFF', name='Staff Student', email='staff.student@example.com',
+            cluster=Cluster.objects.get(cluster_code='AD0000'), year_of_admission=2024,
+        )
+        cls.staff_pks = set(staff.values_list('pk', flat=True))
+        cls.user_ids = set(staff.values_list('user_id', flat=True))
+        cls.kept_user_ids = {cls.superuser.pk, cls.student_user.pk}
+        clubs = Club.objects.filter(coordinator__department=cls.department)
+        cls.club_pks = set(clubs.values_list('pk', flat=True))
+        cls.club_ids = {str(club_id) for club_id in clubs.values_list('club_id', flat=True)}
+        cls.other_club_pks = set(Club.objects.exclude(pk__in=cls.club_pks).values_list('pk', flat=True))
+        assert cls.club_pks and cls.other_club_pks
+
+    def test_archive(self):
+        other_members = ClubMember.objects.filter(club_id__in=self.other_club_pks, is_active=True).count()
+
+        counts = archival.archive_department(self.department, batch_size=4)
+
+        self.department.refresh_from_db()
+        self.assertFalse(self.department.is_active)
+        self.assertEqual(counts['staff'], len(self.staff_pks))
+        self.assertFalse(Staff.objects.filter(department=self.department, is_active=True).exists())
+        self.assertFalse(Club.objects.filter(pk__in=self.club_pks, is_active=True).exists())
+        self.assertFalse(ClubMember.objects.filter(club_id__in=self.club_pks, is_active=True).exists())
+        self.assertEqual(
+            set(User.objects.filter(pk__in=self.user_ids, is_active=True).values_list('pk', flat=True)),
+            self.kept_user_ids,
+        )
+        self.assertEqual(counts['users'], len(self.user_ids - self.kept_user_ids))
+        self.assertEqual(ClubMember.objects.filter(club_id__in=self.other_club_pks, is_active=True).count(),
+                         other_members)
+
+    def test_purge(self):
+        self.purged(archival.purge_department(self.department, batch_size=4))
+
+    def test_purge_again_after_interruption(self):
+        with self.assertRaises(Interrupted):
+            archival.purge_department(self.department, batch_size=4, progress=interrupt_after_first_batch)
+        self.assertEqual(Staff.objects.filter(pk__in=self.staff_pks).count(), len(self.staff_pks) - 4)
+
+        archival.purge_department(self.department, batch_size=4)
+
+        self.purged()
+
+    def purged(self, counts=None):
+        if counts is not None:
+            self.assertEqual(counts['staff'], len(self.staff_pks))
+            self.assertEqual(counts['clubs'], len(self.club_pks))
+            self.assertEqual(counts['users'], len(self.user_ids - self.kept_user_ids))
+        self.assertFalse(Department.objects.filter(pk=self.department_pk).exists())
+        self.assertFalse(Staff.objects.filter(pk__in=self.staff_pks).exists())
+        self.assertFalse(Club.objects.filter(pk__in=self.club_pks).exists())
+        self.assertFalse(ClubMember.objects.filter(club_id__in=self.club_pks).exists())
+        # No orphan accounts; the superuser and the student's are kept
+        self.assertEqual(set(User.objects.filter(pk__in=self.user_ids).values_list('pk', flat=True)),
+                         self.kept_user_ids)
+        self.assertTrue(Student.objects.filter(user=self.student_user).exists())
+        staff_ids = {str(pk) for pk in self.staff_pks}
+        for resource, identifiers in [('staff.staff', staff_ids), ('clubs.club', self.club_ids)]:
+            tombstones = Tombstone.objects.filter(resource=resource)
+            self.assertEqual(sorted(tombstones.values_list('object_id', flat=True)), sorted(identifiers))
+        self.assertTrue(Staff.objects.filter(department=self.other).exists())
+        self.assertTrue(Club.objects.filter(pk__in=self.other_club_pks).exists())
+
+
+def workbook(*rows, header=('Staff Id', 'Name', 'Email', 'Subject Expertise', 'Qualification',
+                            'Department Code', 'Mentor Cluster Code', 'Mentor Access Enabled')):
+    book = Workbook()
+    book.active.append(header)
+    for row in rows:
+        book.active.append(row)
+    buffer = io.BytesIO()
+    book.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def row(staff_id, email=None, department='IM', cluster='', mentor='no', name='Staff Member'):
+    return (staff_id, name, email or f'{staff_id.lower()}@example.com', 'Maths', 'MSc', department, cluster, mentor)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class StaffImporterTests(TestCase):
+    """Rows that can be imported are; the rest are reported by spreadsheet row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Imports', code='IM')
+        cls.cluster = Cluster.objects.create(cluster_name='Imports', cluster_code='IMC')
+        user = User.objects.create_user('STAFF1')
+        Staff.objects.create(
+            user=user, staff_id='STAFF1', name='Existing', email='existing@example.com',
+            subject_expertise='Maths', qualification='MSc', department=cls.department,
+        )
+
+    def run_import(self, *rows, chunk_size=500):
+        return StaffImporter(chunk_size=chunk_size).run(workbook(*rows))
+
+    def test_valid_rows_are_imported(self):
+        result = self.run_import(row('NEW1', cluster='imc', mentor='Yes'), (None,) * 8, row('NEW2', department='im'))
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual([staff['staff_id'] for staff in result.created], ['NEW1', 'NEW2'])
+        staff = Staff.objects.select_related('user').get(staff_id='NEW1')
+        self.assertEqual((staff.department, staff.mentor_cluster), (self.department, self.cluster))
+        self.assertTrue(staff.mentor_access_enabled)
+        self.assertEqual(staff.user.username, 'NEW1')
+        self.assertTrue(staff.user.check_password('temp123'))
+
+    def test_row_errors(self):
+        result = self.run_import(
+            row('OK1'),
+            ('', '', '', 'Maths', 'MSc', 'IM', '', 'no'),
+            row('BAD2', email='not-an-email'),
+            row('BAD3', department='XX', cluster='YY'),
+            row('BAD4', mentor='maybe'),
+            row('BAD5', name='x' * 101),
+        )
+
+        self.assertEqual([staff['staff_id'] for staff in result.created], ['OK1'])
+        self.assertEqual(result.errors, [
+            'Row 3: staff_id is required; name is required; email is required',
+            'Row 4: email is not a valid email address',
+            'Row 5: unknown department code "XX"; unknown cluster code "YY"',
+            'Row 6: mentor_access_enabled must be yes or no',
+            'Row 7: name is longer than 100 characters',
+        ])
+        self.assertEqual(Staff.objects.count(), 2)
+
+    def test_duplicates_in_the_file(self):
+        # Across chunks too
+        result = self.run_import(
+            row('DUP1'), row('DUP1', email='other@example.com'), row('DUP2', email='dup1@example.com'), chunk_size=2,
+        )
+
+        self.assertEqual([staff['staff_id'] for staff in result.created], ['DUP1'])
+        self.assertEqual(result.errors, [
+            'Row 3: staff_id "DUP1" appears more than once in the file',
+            'Row 4: email "dup1@example.com" appears more than once in the file',
+        ])
+
+    def test_clashes_with_existing_staff_and_users(self):
+        User.objects.create_user('TAKEN')
+
+        result = self.run_import(
+            row('STAFF1', email='new@example.com'), row('NEW3', email='existing@example.com'),
+            row('TAKEN'), row('NEW4'),
+        )
+
+        self.assertEqual([staff['staff_id'] for staff in result.created], ['NEW4'])
+        self.assertEqual(result.errors, [
+            'Row 2: staff_id "STAFF1" already exists',
+            'Row 3: email "existing@example.com" already exists',
+            'Row 4: staff_id "TAKEN" already exists',
+        ])
+
+    def test_clash_after_the_check_fails_only_that_row(self):
+        User.objects.create_user('RACED')
+
+        # The username is taken between the clash check and the insert
+        with mock.patch.object(User.objects, 'filter', return_value=User.objects.none()):
+            result = self.run_import(row('NEW5'), row('RACED'), row('NEW6'))
+
+        self.assertEqual([staff['staff_id'] for staff in result.created], ['NEW5', 'NEW6'])
+        [error] = result.errors
+        self.assertTrue(error.startswith('Row 3: '), error)
+        self.assertEqual(set(Staff.objects.values_list('staff_id', flat=True)), {'STAFF1', 'NEW5', 'NEW6'})
+
+    def test_unusable_files(self):
+        with self.assertRaisesMessage(StaffImportError, 'Missing required columns: email, subject_expertise'):
+            StaffImporter().run(workbook(row('NEW7'), header=('Staff Id', 'Name')))
+        empty = io.BytesIO()
+        Workbook().save(empty)
+        with self.assertRaisesMessage(StaffImportError, 'The file is empty'):
+            StaffImporter().run(empty)
@@ -2,10 +2,29 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from changefeed.mixins import ChangeFeedMixin
+from clusters.serializers import ClusterSerializer
+from education_platform.artifacts import SpreadsheetTemplate
+from education_platform.fieldsets import Include, SparseFieldsetMixin
+from education_platform.uploads import UploadLimitMixin
+from .bulk_import import COLUMNS, StaffImporter, StaffImportError
 from .models import Staff, Department
 from .serializers import StaffSerializer, DepartmentSerializer
+import zipfile
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+STAFF_TEMPLATE = SpreadsheetTemplate(
+    'staff_template.xlsx', 'Staff Template',
+    headers=COLUMNS,
+    samples=[
+        ['STF001', 'Dr. John Smith', 'john.smith@example.com', '1234567890',
+         'Data Structures', 'PhD Computer Science', 'CS', 'BCA', 'yes', 'yes'],
+        ['STF002', 'Prof. Sarah Johnson', 'sarah.johnson@example.com', '9876543210',
+         'Accounting', 'M.Com', 'COM', '', 'no', 'no'],
+    ],
+)
+
+
+class DepartmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
 
@@ -16,9 +35,15 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(departments, many=True)
         return Response(serializer.data)
 
-class StaffViewSet(viewsets.ModelViewSet):
+class StaffViewSet(UploadLimitMixin, SparseFieldsetMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     queryset = Staff.objects.all()
     serializer_class = StaffSerializer
+    upload_actions = ('bulk_upload',)
+    changefeed_timestamp_field = 'last_updated'
+    sparse_includes = {
+        'department': Include('department', DepartmentSerializer, 'departments'),
+        'cluster': Include('mentor_cluster', ClusterSerializer, 'clusters'),
+    }
 
     def get_queryset(self):
         queryset = Staff.objects.select_related('department', 'mentor_cluster')
@@ -47,6 +72,39 @@ class StaffViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def template(self, request):
+        """Download Excel template for bulk import"""
+        return STAFF_TEMPLATE.response(request)
+
+    @action(detail=False, methods=['post'])
+    def bulk_upload(self, request):
+        """Bulk import staff from the Excel template"""
+        from openpyxl.utils.exceptions import InvalidFileException
+
+        if 'file' not in request.FILES:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+        file = request.FILES['file']
+        if not file.name.endswith('.xlsx'):
+            return Response(
+                {'error': 'Invalid file type. Please upload an .xlsx file.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = StaffImporter().run(file)
+        except StaffImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except (InvalidFileException, zipfile.BadZipFile) as e:
+            return Response({'error': f'Error reading file: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': f'Successfully created {len(result.created)} staff',
+            'created_staff': result.created,
+            'errors': result.errors,
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'])
     def mentors_by_department(self, request):
         """Get staff members who can be mentors, grouped by department"""
@@ -55,7 +113,7 @@ class StaffViewSet(viewsets.ModelViewSet):
         queryset = Staff.objects.filter(
             is_active=True,
             departmental_access_enabled=True
-        ).select_related('department')
+        ).select_related('department', 'mentor_cluster')
         
         if department_id:
             queryset = queryset.filter(department_id=department_id)
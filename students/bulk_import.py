@@ -0,0 +1,160 @@
+"""
+Reading and identifying student bulk uploads
+
+`iter_upload` parses an upload into DataFrames of the template columns, a
+chunk of at most UPLOAD_CHUNK_ROWS rows at a time, indexed by the row's
+position in the file, so the caller can import each chunk before the next is
+read. Excel files are read whole with openpyxl (a workbook can't be read in
+parts) and come as one chunk; CSV is parsed in chunks keeping only template
+columns; Parquet and Arrow IPC (Feather) files are read batch by batch with
+pyarrow. Uploads Django spooled to disk are parsed from the file,
+memory-mapped for CSV, Parquet and Arrow, rather than copied into memory.
+pyarrow is optional; without it those formats are refused.
+
+`content_hash` identifies an uploaded file: a completed upload of the same
+file to the same cluster is answered with its stored result instead of
+being processed again. `row_fingerprint` identifies one row of the template
+(every template column, normalized) and is stored on the student it created,
+so a changed file only processes rows that were not imported before.
+"""
+import hashlib
+import math
+import os
+
+COLUMNS = ['name', 'email', 'phone', 'roll_number', 'year_of_admission', 'current_semester']
+FORMATS = {
+    '.xlsx': 'excel', '.xls': 'excel', '.csv': 'csv',
+    '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow',
+}
+UPLOAD_CHUNK_ROWS = 10000
+
+
+class UploadFormatError(Exception):
+    """The upload's format isn't accepted or can't be read here"""
+
+
+def upload_format(filename):
+    """'excel', 'csv', 'parquet' or 'arrow' by extension, or None"""
+    return FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
+def column_name(header):
+    # The template writes title-cased headers ("Roll Number")
+    return str(header).strip().lower().replace(' ', '_')
+
+
+def iter_upload(file, file_format=None):
+    """DataFrames of an uploaded file's rows, a chunk at a time, with template column names"""
+    file_format = file_format or upload_format(file.name)
+    readers = {'excel': _read_excel, 'csv': _read_csv, 'parquet': _read_parquet, 'arrow': _read_arrow}
+    reader = readers.get(file_format)
+    if reader is None:
+        raise UploadFormatError(f'Unsupported file type: {file.name}')
+    for df in reader(file):
+        df.columns = [column_name(col) for col in df.columns]
+        yield df
+
+
+def _spooled_path(file):
+    """Path of an upload Django wrote to a temporary file, or None"""
+    return file.temporary_file_path() if hasattr(file, 'temporary_file_path') else None
+
+
+def _read_excel(file):
+    import pandas as pd
+
+    yield pd.read_excel(_spooled_path(file) or file)
+
+
+def _read_csv(file):
+    import pandas as pd
+
+    path = _spooled_path(file)
+    # The chunks' index carries on from one chunk to the next
+    with pd.read_csv(
+        path or file, encoding='utf-8-sig', chunksize=UPLOAD_CHUNK_ROWS, memory_map=path is not None,
+        usecols=lambda header: column_name(header) in COLUMNS,
+        # Rows ending in a delimiter must not turn the first column into the index
+        index_col=False,
+    ) as chunks:
+        yield from chunks
+
+
+def _arrow_source(file):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise UploadFormatError('Parquet and Arrow uploads need pyarrow, which is not installed') from None
+    path = _spooled_path(file)
+    if path is not None:
+        return pa.memory_map(path)
+    inner = getattr(file, 'file', file)
+    if hasattr(inner, 'getbuffer'):
+        # In-memory upload: wrap its buffer rather than copying it
+        return pa.BufferReader(pa.py_buffer(inner.getbuffer()))
+    return pa.BufferReader(file.read())
+
+
+def _template_columns(names):
+    return [name for name in names if column_name(name) in COLUMNS]
+
+
+def _frames(batches, schema, columns):
+    """DataFrames of pyarrow record batches, indexed by row position in the file"""
+    start = 0
+    for batch in batches:
+        df = batch.to_pandas()
+        df.index += start
+        start += len(df)
+        yield df
+    if not start:
+        # No rows: one empty frame, so the columns can still be checked
+        yield schema.empty_table().select(columns).to_pandas()
+
+
+def _read_parquet(file):
+    source = _arrow_source(file)
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(source)
+    columns = _template_columns(parquet.schema_arrow.names)
+    batches = parquet.iter_batches(batch_size=UPLOAD_CHUNK_ROWS, columns=columns)
+    yield from _frames(batches, parquet.schema_arrow, columns)
+
+
+def _read_arrow(file):
+    source = _arrow_source(file)
+    import pyarrow as pa
+
+    reader = pa.ipc.open_file(source)
+    columns = _template_columns(reader.schema.names)
+    batches = (
+        part
+        for i in range(reader.num_record_batches)
+        for part in pa.Table.from_batches([reader.get_batch(i)]).select(columns).to_batches(UPLOAD_CHUNK_ROWS)
+    )
+    yield from _frames(batches, reader.schema, columns)
+
+
+def content_hash(file):
+    """sha256 of an uploaded file, leaving it rewound for parsing"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheet numbers come back as 2024.0 when the column has blanks
+        value = int(value)
+    return str(value).strip()
+
+
+def row_fingerprint(values):
+    """Fingerprint of a row given as {column: value}"""
+    text = '\x1f'.join(_text(values.get(column)) for column in COLUMNS)
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
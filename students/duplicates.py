@@ -0,0 +1,116 @@
+"""
+Likely-duplicate detection for student bulk uploads
+
+Exact email clashes are caught by the unique constraint; this finds the
+same person entered again under another email with a slightly different
+spelling of the name. Rows are blocked by (year of admission, name key)
+within the upload's cluster, and only existing students in the same block
+are loaded (students_name_key_idx). Within a block, names are compared all
+at once: each name becomes a row of a 0/1 matrix over the block's character
+trigrams, one matrix product gives the shared trigrams of every pair, and
+pairs whose Dice coefficient reaches STUDENT_DUPLICATE_THRESHOLD are
+flagged. Earlier rows of the same file are candidates too.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+from .models import Student
+from .phonetic import name_key, normalize
+
+
+@dataclass
+class Duplicate:
+    """Row `row` of the upload looks like an existing student or an earlier row"""
+    row: int
+    name: str
+    match: str
+    score: float
+    student_id: Optional[str] = None
+    other_row: Optional[int] = None
+
+    def __str__(self):
+        if self.student_id is not None:
+            target = f'existing student "{self.match}" ({self.student_id})'
+        else:
+            target = f'"{self.match}" in row {self.other_row}'
+        return f'"{self.name}" looks like a duplicate of {target} (similarity {self.score:.2f})'
+
+    def as_dict(self):
+        return {
+            'row': self.row, 'name': self.name, 'match': self.match, 'score': round(self.score, 3),
+            'student_id': self.student_id, 'other_row': self.other_row,
+        }
+
+
+def trigrams(name):
+    # Word order doesn't matter ("Doe John"); the padding weights the ends of words
+    text = f"  {' '.join(sorted(normalize(name)))} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def find_duplicates(cluster, rows, threshold=None):
+    """
+    Return {row number: Duplicate} for the rows of an upload to `cluster`
+    that look like existing students or earlier rows.
+
+    `rows` is an iterable of (row number, name, year of admission).
+    """
+    import numpy as np
+
+    if threshold is None:
+        threshold = getattr(settings, 'STUDENT_DUPLICATE_THRESHOLD', 0.7)
+    # block -> indexes into `entries`, uploaded rows first
+    uploaded, existing = defaultdict(list), defaultdict(list)
+    entries = []  # (name, row number or None, student_id or None)
+    for number, name, year in rows:
+        key = name_key(name)
+        if key and year is not None:
+            uploaded[(year, key)].append(len(entries))
+            entries.append((name, number, None))
+    if not uploaded:
+        return {}
+
+    # Fetches the cross product of years and keys; rows of other blocks are dropped below
+    candidates = Student.objects.filter(
+        cluster=cluster,
+        year_of_admission__in={year for year, _ in uploaded},
+        name_key__in={key for _, key in uploaded},
+    ).values_list('year_of_admission', 'name_key', 'name', 'student_id')
+    for year, key, name, student_id in candidates:
+        if (year, key) in uploaded:
+            existing[(year, key)].append(len(entries))
+            entries.append((name, None, student_id))
+
+    vocabulary = {}
+    columns = [
+        np.fromiter((vocabulary.setdefault(gram, len(vocabulary)) for gram in trigrams(name)), dtype=np.int64)
+        for name, _, _ in entries
+    ]
+
+    found = {}
+    for block, members in uploaded.items():
+        others = existing.get(block, [])
+        if len(members) + len(others) < 2:
+            continue
+        members_all = members + others
+        grams = [columns[i] for i in members_all]
+        used, positions = np.unique(np.concatenate(grams), return_inverse=True)
+        matrix = np.zeros((len(members_all), len(used)), dtype=np.float32)
+        matrix[np.repeat(np.arange(len(members_all)), [len(g) for g in grams]), positions] = 1
+        sizes = matrix.sum(axis=1)
+        shared = matrix[:len(members)] @ matrix.T
+        scores = 2 * shared / (sizes[:len(members), None] + sizes[None, :])
+        # A row is compared with earlier rows of the file, never itself or later ones
+        scores[:, :len(members)] = np.tril(scores[:, :len(members)], k=-1)
+        best = scores.argmax(axis=1)
+        for i, j in enumerate(best):
+            score = float(scores[i, j])
+            if score < threshold:
+                continue
+            name, number, _ = entries[members[i]]
+            match, other_row, student_id = entries[members_all[j]]
+            found[number] = Duplicate(number, name, match, score, student_id, other_row)
+    return found
@@ -0,0 +1,46 @@
+"""
+Expiring club change grants
+
+A grant is Student.can_change_club with an optional club_change_expires_at.
+Permission checks use Student.club_change_allowed, which compares the expiry
+with the clock, so an expired grant is refused as soon as it expires without
+another query. `sweep` then revokes expired grants in the table with one
+UPDATE over the partial index students_club_grant_idx, giving the rows a new
+updated_at so delta sync and the event stream see the change.
+
+Every sweep logs a JSON record to the students.grants logger: grants revoked
+by this run, its duration, and running totals for the process.
+"""
+import json
+import logging
+from time import perf_counter
+
+from django.utils import timezone
+
+from .models import Student
+
+logger = logging.getLogger('students.grants')
+
+totals = {'runs': 0, 'revoked': 0}
+
+
+def expired_grants(now):
+    return Student.objects.filter(can_change_club=True, club_change_expires_at__lte=now)
+
+
+def sweep(now=None):
+    """Revoke every grant expired at `now`; returns the sweep's metrics"""
+    now = now or timezone.now()
+    start = perf_counter()
+    revoked = expired_grants(now).update(can_change_club=False, club_change_expires_at=None, updated_at=now)
+    totals['runs'] += 1
+    totals['revoked'] += revoked
+    record = {
+        'event': 'club_grant_sweep',
+        'revoked': revoked,
+        'duration_ms': round((perf_counter() - start) * 1000, 2),
+        'runs_total': totals['runs'],
+        'revoked_total': totals['revoked'],
+    }
+    logger.info(json.dumps(record))
+    return record
@@ -0,0 +1,54 @@
+"""
+Management command rolling students over to the next term (students.rollover)
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clusters.models import Cluster
+from students import rollover
+
+
+class Command(BaseCommand):
+    help = 'Advance semesters, graduate final-semester students, close club memberships and reset club change grants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cluster', action='append', dest='clusters', metavar='CODE',
+            help='Cluster code to roll over (repeatable); every active cluster by default'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without making them')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Roll over clusters even if they were rolled over within ROLLOVER_MIN_INTERVAL_DAYS'
+        )
+        parser.add_argument(
+            '--memberships', choices=rollover.MEMBERSHIP_SCOPES, default='all',
+            help="Close every active club membership, or only graduating students' ones"
+        )
+
+    def handle(self, *args, **options):
+        clusters = Cluster.objects.filter(is_active=True)
+        if options['clusters']:
+            clusters = Cluster.objects.filter(cluster_code__in=options['clusters'])
+            missing = set(options['clusters']) - set(clusters.values_list('cluster_code', flat=True))
+            if missing:
+                raise CommandError(f"Unknown clusters: {', '.join(sorted(missing))}")
+        clusters = list(clusters)
+
+        start = time.perf_counter()
+        if options['dry_run']:
+            reports = [rollover.plan(cluster, options['memberships']) for cluster in clusters]
+        else:
+            try:
+                reports = rollover.roll_over(clusters, options['memberships'], force=options['force'])
+            except rollover.RolledOverRecently as exc:
+                raise CommandError(f'{exc}; nothing changed. Pass --force to roll them over again.')
+        for report in reports:
+            for line in report.lines():
+                self.stdout.write(line)
+        elapsed = time.perf_counter() - start
+        if options['dry_run']:
+            self.stdout.write(f'Dry run, nothing changed ({elapsed:.2f}s)')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rolled over {len(reports)} clusters in {elapsed:.2f}s'))
@@ -0,0 +1,32 @@
+"""
+Management command revoking expired club change grants (students.grants)
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from students import grants
+
+
+class Command(BaseCommand):
+    help = 'Revoke club change grants whose club_change_expires_at has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true', help='Keep sweeping until interrupted')
+        parser.add_argument(
+            '--interval', type=float, default=getattr(settings, 'CLUB_GRANT_SWEEP_INTERVAL', 60.0),
+            help='Seconds between sweeps with --watch'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            record = grants.sweep()
+            if options['verbosity'] > 1 or not options['watch'] or record['revoked']:
+                self.stdout.write(
+                    f"Revoked {record['revoked']} expired grants in {record['duration_ms']:.0f} ms "
+                    f"({record['revoked_total']} over {record['runs_total']} sweeps)"
+                )
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
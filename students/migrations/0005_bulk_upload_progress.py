@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:01
+
+from django.db import migrations, models
+
+
+def mark_existing_uploads_completed(apps, schema_editor):
+    # Uploads recorded before progress tracking ran to completion in-request
+    StudentBulkUpload = apps.get_model('students', 'StudentBulkUpload')
+    StudentBulkUpload.objects.update(status='completed', processed_rows=models.F('total_students'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_student_students_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentbulkupload',
+            name='processed_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentbulkupload',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='processing', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='studentbulkupload',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(mark_existing_uploads_completed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+from students.phonetic import name_key
+
+
+def fill_name_keys(apps, schema_editor):
+    Student = apps.get_model('students', 'Student')
+    last = 0
+    while rows := list(Student.objects.filter(pk__gt=last).order_by('pk').values_list('pk', 'name')[:2000]):
+        Student.objects.bulk_update([Student(pk=pk, name_key=name_key(name)) for pk, name in rows], ['name_key'])
+        last = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0002_cluster_clusters_updated_idx'),
+        ('students', '0005_bulk_upload_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['cluster', 'year_of_admission', 'name_key'], name='students_name_key_idx'),
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+    ]
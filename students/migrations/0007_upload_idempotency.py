@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0002_cluster_clusters_updated_idx'),
+        ('students', '0006_name_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='studentbulkupload',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='studentbulkupload',
+            name='result',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['cluster', 'import_fingerprint'], name='students_import_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentbulkupload',
+            index=models.Index(fields=['cluster', 'content_hash'], name='bulk_uploads_content_idx'),
+        ),
+    ]
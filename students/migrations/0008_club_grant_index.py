@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0003_final_semester'),
+        ('students', '0007_upload_idempotency'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('can_change_club', True)), fields=['club_change_expires_at'], name='students_club_grant_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fail_overlapping_uploads(apps, schema_editor):
+    # Only the latest run of a file per cluster may still be processing
+    StudentBulkUpload = apps.get_model('students', 'StudentBulkUpload')
+    running = StudentBulkUpload.objects.filter(status='processing').exclude(content_hash='')
+    latest = running.values('cluster', 'content_hash').annotate(latest=models.Max('pk')).values('latest')
+    running.exclude(pk__in=latest).update(status='failed', error_log='Superseded by a later upload of the file')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0004_last_rolled_over_at'),
+        ('students', '0008_club_grant_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_overlapping_uploads, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='studentbulkupload',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'processing'), models.Q(('content_hash', ''), _negated=True)), fields=('cluster', 'content_hash'), name='bulk_uploads_one_running'),
+        ),
+    ]
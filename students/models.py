@@ -1,6 +1,8 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 from clusters.models import Cluster
+from .phonetic import name_key
 import random
 import string
 
@@ -14,8 +16,12 @@ class Student(models.Model):
     cluster = models.ForeignKey(Cluster, on_delete=models.CASCADE)
     roll_number = models.CharField(max_length=20, blank=True, null=True)
     year_of_admission = models.IntegerField()
+    # Phonetic key of the name, the blocking key for duplicate detection
+    name_key = models.CharField(max_length=20, blank=True, default='', editable=False)
     current_semester = models.IntegerField(default=1)
     password = models.CharField(max_length=100, blank=True, null=True)  # Store initial password for email
+    # Fingerprint of the bulk upload row that created the student, if any
+    import_fingerprint = models.CharField(max_length=32, blank=True, default='', editable=False)
     
     # Club related
     can_change_club = models.BooleanField(default=False)
@@ -30,10 +36,27 @@ class Student(models.Model):
     class Meta:
         db_table = 'students'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='students_updated_idx'),
+            models.Index(fields=['cluster', 'year_of_admission', 'name_key'], name='students_name_key_idx'),
+            models.Index(fields=['cluster', 'import_fingerprint'], name='students_import_idx'),
+            # Only live grants, for the expiry sweep (students.grants)
+            models.Index(
+                fields=['club_change_expires_at'], condition=models.Q(can_change_club=True),
+                name='students_club_grant_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.student_id})"
 
+    def save(self, *args, **kwargs):
+        self.name_key = name_key(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'name_key'}
+        super().save(*args, **kwargs)
+
     @staticmethod
     def generate_username(name, cluster_code):
         """Generate unique username for student"""
@@ -47,8 +70,19 @@ class Student(models.Model):
         """Generate random password for student"""
         return ''.join(random.choices(string.ascii_letters + string.digits, k=8))
 
+    def club_change_allowed(self, now=None):
+        """Whether the club change grant is live; expired ones count as revoked before the sweep"""
+        if not self.can_change_club:
+            return False
+        return self.club_change_expires_at is None or self.club_change_expires_at > (now or timezone.now())
+
     def get_current_club(self):
         """Get student's current active club"""
+        # Use the memberships prefetched by StudentViewSet when available
+        memberships = getattr(self, 'active_memberships', None)
+        if memberships is not None:
+            return memberships[0].club if memberships else None
+
         from clubs.models import ClubMember
         try:
             membership = ClubMember.objects.get(student=self, is_active=True)
@@ -58,17 +92,41 @@ class Student(models.Model):
 
 class StudentBulkUpload(models.Model):
     """Track bulk upload operations"""
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
     cluster = models.ForeignKey(Cluster, on_delete=models.CASCADE)
     file_name = models.CharField(max_length=255)
     total_students = models.IntegerField(default=0)
     successful_uploads = models.IntegerField(default=0)
     failed_uploads = models.IntegerField(default=0)
     upload_date = models.DateTimeField(auto_now_add=True)
-    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     error_log = models.TextField(blank=True, null=True)
+    # Progress, saved every BULK_UPLOAD_PROGRESS_EVERY rows for the event stream
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+    processed_rows = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    # sha256 of the file, and the response it got, for answering a re-upload
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    result = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         db_table = 'student_bulk_uploads'
+        indexes = [
+            models.Index(fields=['cluster', 'content_hash'], name='bulk_uploads_content_idx'),
+        ]
+        constraints = [
+            # One run of a file per cluster at a time; completed runs are replayed
+            # instead, and reprocess=true may add another once they are done
+            models.UniqueConstraint(
+                fields=['cluster', 'content_hash'], name='bulk_uploads_one_running',
+                condition=models.Q(status='processing') & ~models.Q(content_hash=''),
+            ),
+        ]
 
     def __str__(self):
         return f"Bulk Upload - {self.file_name} ({self.upload_date})"
@@ -0,0 +1,42 @@
+"""
+Phonetic keys for student names
+
+Student.name_key holds the Soundex codes of a name's first and last words,
+sorted, so "Jon Doe", "John Doe" and "Doe, John" share a key. It is the
+blocking key for duplicate detection (see students.duplicates): only
+students with the same cluster, year of admission and name key are
+compared.
+"""
+import unicodedata
+
+_SOUNDEX = str.maketrans('bfpvcgjkqsxzdtlmnr', '111122222222334556')
+
+
+def normalize(name):
+    """Lower-case words of `name`, without accents or punctuation"""
+    text = unicodedata.normalize('NFKD', str(name or ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return ''.join(char if char.isalpha() else ' ' for char in text).split()
+
+
+def soundex(word):
+    codes = word.translate(_SOUNDEX)
+    key, last = word[0].upper(), codes[0]
+    for char, code in zip(word[1:], codes[1:]):
+        if code.isdigit():
+            if code != last:
+                key += code
+                if len(key) == 4:
+                    break
+            last = code
+        elif char not in 'hw':
+            # A vowel separates two letters with the same code; h and w don't
+            last = ''
+    return key.ljust(4, '0')
+
+
+def name_key(name):
+    words = normalize(name)
+    if not words:
+        return ''
+    return ' '.join(sorted({soundex(words[0]), soundex(words[-1])}))
@@ -0,0 +1,131 @@
+"""
+End-of-term rollover
+
+For each cluster, in one transaction with the other clusters:
+
+- active club memberships of the cluster's students are closed (left_at);
+  with memberships='graduates' only those of graduating students are
+- students in the cluster's final semester (or beyond) graduate: is_active
+  becomes False
+- every other active student moves up a semester
+- club change grants (can_change_club, club_change_expires_at) are reset
+- the cluster's last_rolled_over_at is set
+
+A cluster rolled over less than ROLLOVER_MIN_INTERVAL_DAYS ago is refused
+(RolledOverRecently, before anything changes) unless `force` is passed, so
+running the rollover twice does not promote students by two semesters.
+
+Each step is one UPDATE over the cluster, whatever its size. The changed
+rows get a new updated_at so delta sync and the event stream pick them up.
+`plan` reports the same changes from read-only counts, for a dry run.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from clubs.models import Club, ClubMember
+from clusters.models import Cluster
+from .models import Student
+
+MEMBERSHIP_SCOPES = ('all', 'graduates')
+
+
+class RolledOverRecently(Exception):
+    def __init__(self, clusters):
+        self.clusters = clusters
+        super().__init__('Already rolled over this term: ' + ', '.join(
+            f'{cluster.cluster_code} ({cluster.last_rolled_over_at:%Y-%m-%d %H:%M})' for cluster in clusters
+        ))
+
+
+@dataclass
+class RolloverReport:
+    cluster: object
+    promoted: dict = field(default_factory=dict)  # current semester -> students moving up from it
+    graduated: int = 0
+    memberships_closed: int = 0
+    grants_reset: int = 0
+
+    def lines(self):
+        cluster = self.cluster
+        yield f'{cluster.cluster_code} ({cluster.cluster_name}), final semester {cluster.final_semester}'
+        if cluster.last_rolled_over_at:
+            yield f'  last rolled over: {cluster.last_rolled_over_at:%Y-%m-%d %H:%M}'
+        for semester, count in sorted(self.promoted.items()):
+            yield f'  semester {semester} -> {semester + 1}: {count}'
+        yield f'  graduating: {self.graduated}'
+        yield f'  club memberships closed: {self.memberships_closed}'
+        yield f'  club change grants reset: {self.grants_reset}'
+
+
+def rolled_over_recently(cluster, now=None):
+    """Whether `cluster` was rolled over within ROLLOVER_MIN_INTERVAL_DAYS"""
+    if cluster.last_rolled_over_at is None:
+        return False
+    interval = timedelta(days=getattr(settings, 'ROLLOVER_MIN_INTERVAL_DAYS', 60))
+    return cluster.last_rolled_over_at > (now or timezone.now()) - interval
+
+
+def _active_students(cluster):
+    return Student.objects.filter(cluster=cluster, is_active=True)
+
+
+def _closing_memberships(cluster, memberships):
+    students = _active_students(cluster)
+    if memberships == 'graduates':
+        students = students.filter(current_semester__gte=cluster.final_semester)
+    return ClubMember.objects.filter(is_active=True, student__in=students.values('pk'))
+
+
+def plan(cluster, memberships='all'):
+    """What roll_over would change in `cluster`, without changing it"""
+    students = _active_students(cluster)
+    promoted = (
+        students.filter(current_semester__lt=cluster.final_semester)
+        .order_by().values('current_semester').annotate(count=Count('pk'))
+    )
+    return RolloverReport(
+        cluster,
+        promoted={row['current_semester']: row['count'] for row in promoted},
+        graduated=students.filter(current_semester__gte=cluster.final_semester).count(),
+        memberships_closed=_closing_memberships(cluster, memberships).count(),
+        grants_reset=students.filter(can_change_club=True).count(),
+    )
+
+
+def roll_over(clusters, memberships='all', force=False):
+    """Roll every cluster in `clusters` over to the next term; returns their reports"""
+    if memberships not in MEMBERSHIP_SCOPES:
+        raise ValueError(f'memberships must be one of {", ".join(MEMBERSHIP_SCOPES)}')
+    now = timezone.now()
+    reports = []
+    with transaction.atomic():
+        # Locked and re-read, so two rollovers started together cannot both pass the check
+        clusters = list(Cluster.objects.select_for_update().filter(pk__in=[cluster.pk for cluster in clusters]))
+        recent = [cluster for cluster in clusters if rolled_over_recently(cluster, now)]
+        if recent and not force:
+            raise RolledOverRecently(recent)
+        for cluster in clusters:
+            # Counted first: the updates below change what would be counted
+            report = plan(cluster, memberships)
+            closing = _closing_memberships(cluster, memberships)
+            # Member counts change, so delta sync should refetch the clubs
+            Club.objects.filter(pk__in=closing.values('club_id')).update(updated_at=now)
+            report.memberships_closed = closing.update(is_active=False, left_at=now)
+
+            students = _active_students(cluster)
+            reset = {'can_change_club': False, 'club_change_expires_at': None, 'updated_at': now}
+            report.graduated = students.filter(current_semester__gte=cluster.final_semester).update(
+                is_active=False, **reset
+            )
+            students.filter(current_semester__lt=cluster.final_semester).update(
+                current_semester=F('current_semester') + 1, **reset
+            )
+            cluster.last_rolled_over_at = now
+            cluster.save(update_fields=['last_rolled_over_at', 'updated_at'])
+            reports.append(report)
+    return reports
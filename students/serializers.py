@@ -1,23 +1,46 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from diagnostics.instrumentation import InstrumentedSerializerMixin
+from education_platform.compiled import CompiledListSerializer
+from education_platform.fieldsets import SparseFieldsSerializerMixin
 from .models import Student, StudentBulkUpload
 import random
 import string
 
-class StudentSerializer(serializers.ModelSerializer):
+class ClubChangeGrantField(serializers.BooleanField):
+    """can_change_club: written to the column, read as Student.club_change_allowed() so expired grants show as off"""
+
+    def get_attribute(self, instance):
+        return instance.club_change_allowed()
+
+
+class StudentSerializer(InstrumentedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
     username = serializers.CharField(source='user.username', read_only=True)
     cluster_name = serializers.CharField(source='cluster.cluster_name', read_only=True)
+    current_club = serializers.SerializerMethodField()
+    can_change_club = ClubChangeGrantField(required=False)
     
     class Meta:
         model = Student
         fields = [
             'student_id', 'name', 'email', 'phone', 'roll_number', 
             'year_of_admission', 'current_semester', 'cluster', 'cluster_name',
-            'is_active', 'can_change_club', 'password', 'username', 
-            'created_at', 'updated_at'
+            'is_active', 'can_change_club', 'club_change_expires_at', 'password', 'username', 
+            'current_club', 'created_at', 'updated_at'
         ]
         read_only_fields = ['student_id', 'created_at', 'updated_at']
+        # What non-column fields read, for ?fields= (see education_platform.fieldsets)
+        sparse_requires = {
+            'current_club': ['active_memberships'],
+            'can_change_club': ['can_change_club', 'club_change_expires_at'],
+        }
+        list_serializer_class = CompiledListSerializer
+
+    def get_current_club(self, obj):
+        """Return the name of the student's active club"""
+        club = obj.get_current_club()
+        return club.name if club else None
 
     def create(self, validated_data):
         """Create a new student with associated user account"""
@@ -97,7 +120,8 @@ class StudentBulkUploadSerializer(serializers.ModelSerializer):
     class Meta:
         model = StudentBulkUpload
         fields = [
-            'id', 'filename', 'total_records', 'successful_records',
-            'failed_records', 'status', 'uploaded_by', 'created_at'
+            'id', 'cluster', 'file_name', 'total_students', 'successful_uploads',
+            'failed_uploads', 'uploaded_by', 'upload_date', 'error_log',
+            'status', 'processed_rows', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'upload_date', 'status', 'processed_rows', 'updated_at']
@@ -1,3 +1,426 @@
-from django.test import TestCase
+import hashlib
+import importlib.util
+import io
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.test import APITestCase
+
+from clubs.models import ClubMember
+from clusters.models import Cluster
+from diagnostics.seeding import SeedVolumes, SyntheticDataGenerator
+from .bulk_import import UploadFormatError, iter_upload
+from .duplicates import find_duplicates
+from .models import Student, StudentBulkUpload
+from .views import StudentViewSet
+from . import rollover
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    REQUEST_TIMING_SAMPLE_RATE=0.0,
+)
+class RolloverTests(TestCase):
+    """Term rollover of a seeded cluster"""
+
+    @classmethod
+    def setUpTestData(cls):
+        volumes = SeedVolumes(clusters=2, departments=1, staff=5, students=60, clubs=5, membership_ratio=1.0)
+        SyntheticDataGenerator(volumes, prefix='RO', batch_size=100).run()
+        cls.cluster = Cluster.objects.get(cluster_code='RO0000')
+        cls.other = Cluster.objects.get(cluster_code='RO0001')
+
+    def semesters(self, cluster):
+        return dict(Student.objects.filter(cluster=cluster).values_list('pk', 'current_semester'))
+
+    def test_dry_run_counts_match_rollover(self):
+        Student.objects.filter(cluster=self.cluster).update(can_change_club=True)
+        before = self.semesters(self.cluster)
+        other_before = self.semesters(self.other)
+        final = self.cluster.final_semester
+        graduating = {pk for pk, semester in before.items() if semester >= final}
+        members = ClubMember.objects.filter(student__cluster=self.cluster, is_active=True)
+        self.assertTrue(graduating)
+        self.assertTrue(members.exists())
+
+        plan = rollover.plan(self.cluster)
+        self.assertEqual(self.semesters(self.cluster), before)
+        self.assertEqual(plan.graduated, len(graduating))
+        self.assertEqual(sum(plan.promoted.values()), len(before) - len(graduating))
+        self.assertEqual(plan.memberships_closed, members.count())
+        self.assertEqual(plan.grants_reset, len(before))
+
+        [report] = rollover.roll_over([self.cluster])
+
+        self.assertEqual((report.graduated, report.promoted, report.memberships_closed),
+                         (plan.graduated, plan.promoted, plan.memberships_closed))
+        students = Student.objects.filter(cluster=self.cluster)
+        for student in students:
+            if student.pk in graduating:
+                self.assertFalse(student.is_active)
+                self.assertEqual(student.current_semester, before[student.pk])
+            else:
+                self.assertTrue(student.is_active)
+                self.assertEqual(student.current_semester, before[student.pk] + 1)
+        self.assertFalse(students.filter(can_change_club=True).exists())
+        closed = ClubMember.objects.filter(student__cluster=self.cluster)
+        self.assertFalse(closed.filter(is_active=True).exists())
+        self.assertFalse(closed.filter(left_at__isnull=True).exists())
+        # Other clusters are left alone
+        self.assertEqual(self.semesters(self.other), other_before)
+        self.assertTrue(ClubMember.objects.filter(student__cluster=self.other, is_active=True).exists())
+
+    def test_second_rollover_is_refused_unless_forced(self):
+        rollover.roll_over([self.cluster])
+        self.cluster.refresh_from_db()
+        self.assertIsNotNone(self.cluster.last_rolled_over_at)
+        after_first = self.semesters(self.cluster)
+
+        with self.assertRaises(rollover.RolledOverRecently):
+            rollover.roll_over([self.cluster, self.other])
+        self.assertEqual(self.semesters(self.cluster), after_first)
+        self.assertIsNone(Cluster.objects.get(pk=self.other.pk).last_rolled_over_at)
+        with self.assertRaises(CommandError):
+            call_command('rollover_term', cluster=['RO0000'], stdout=StringIO())
+
+        rollover.roll_over([self.cluster], force=True)
+        self.assertNotEqual(self.semesters(self.cluster), after_first)
+
+    def test_rollover_allowed_after_interval(self):
+        Cluster.objects.filter(pk=self.cluster.pk).update(
+            last_rolled_over_at=timezone.now() - timedelta(days=61)
+        )
+        with override_settings(ROLLOVER_MIN_INTERVAL_DAYS=60):
+            rollover.roll_over([self.cluster])
+
+    def test_admin_action_asks_for_confirmation(self):
+        admin = User.objects.create_superuser('rollover_admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        url = reverse('admin:clusters_cluster_changelist')
+        data = {'action': 'roll_over_term', helpers.ACTION_CHECKBOX_NAME: [self.cluster.pk]}
+        before = self.semesters(self.cluster)
+
+        response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/clusters/cluster/rollover_confirmation.html')
+        self.assertContains(response, 'RO0000')
+        self.assertEqual(self.semesters(self.cluster), before)
+
+        response = self.client.post(url, {**data, 'post': 'yes'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertNotEqual(self.semesters(self.cluster), before)
+        self.assertIsNotNone(Cluster.objects.get(pk=self.cluster.pk).last_rolled_over_at)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0)
+class ClubChangeGrantTests(APITestCase):
+    """can_change_club reads as Student.club_change_allowed(), before the sweep has run"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cluster = Cluster.objects.create(cluster_name='Grants', cluster_code='GR')
+        now = timezone.now()
+        cls.students = {}
+        for key, expires_at in [('expired', now - timedelta(hours=1)), ('live', now + timedelta(hours=1)),
+                                ('open', None)]:
+            user = User.objects.create_user(f'grant_{key}')
+            cls.students[key] = Student.objects.create(
+                user=user, student_id=f'GR{key}', name=f'Grant {key.title()}', email=f'{key}@example.com',
+                cluster=cluster, year_of_admission=2026, can_change_club=True, club_change_expires_at=expires_at,
+            )
+
+    def grants(self, params=None):
+        response = self.client.get('/api/students/', params)
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        return {row['name']: row['can_change_club'] for row in rows}
+
+    def test_expired_unswept_grant_reads_as_not_allowed(self):
+        expected = {'Grant Expired': False, 'Grant Live': True, 'Grant Open': True}
+        self.assertEqual(self.grants(), expected)
+        self.assertEqual(self.grants({'fields': 'name,can_change_club'}), expected)
+        response = self.client.get(f'/api/students/{self.students["expired"].pk}/')
+        self.assertIs(response.data['can_change_club'], False)
+        # Still granted in the table until the sweep revokes it
+        self.assertTrue(Student.objects.get(pk=self.students['expired'].pk).can_change_club)
+
+    def test_grant_is_still_written_to_the_column(self):
+        student = self.students['expired']
+        response = self.client.patch(
+            f'/api/students/{student.pk}/', {'can_change_club': True, 'club_change_expires_at': None}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.data['can_change_club'], True)
+        student.refresh_from_db()
+        self.assertTrue(student.can_change_club)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0)
+class BulkUploadValidationTests(APITestCase):
+    """Bad input to bulk_upload is a 400, not a server error"""
+
+    def upload(self, **data):
+        csv = SimpleUploadedFile('students.csv', b'name,email,phone,roll_number,year_of_admission\n')
+        return self.client.post('/api/students/bulk_upload/', {'file': csv, **data})
+
+    def test_invalid_cluster(self):
+        for cluster in ['abc', '1.5', '', '999']:
+            with self.subTest(cluster=cluster):
+                response = self.upload(cluster=cluster)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['error'], 'A valid cluster is required')
+        self.assertEqual(self.upload().status_code, 400)
+
+
+UPLOAD_CSV = (
+    b'name,email,phone,roll_number,year_of_admission,current_semester\n'
+    b'Ann Lee,ann@example.com,,R1,2026,1\n'
+    b'Bob Roy,bob@example.com,,R2,2026,1\n'
+)
+UPLOAD_HASH = hashlib.sha256(UPLOAD_CSV).hexdigest()
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], REQUEST_TIMING_SAMPLE_RATE=0.0,
+    BULK_UPLOAD_STALE_AFTER=600,
+)
+class BulkUploadIdempotencyTests(APITestCase):
+    """Uploading the same file again replays its result instead of importing it twice"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cluster = Cluster.objects.create(cluster_name='Idempotent', cluster_code='ID')
+
+    def upload(self, **data):
+        csv = SimpleUploadedFile('students.csv', UPLOAD_CSV)
+        return self.client.post('/api/students/bulk_upload/', {'file': csv, 'cluster': self.cluster.pk, **data})
+
+    def running(self, **fields):
+        return StudentBulkUpload.objects.create(
+            cluster=self.cluster, file_name='students.csv', content_hash=UPLOAD_HASH, **fields
+        )
+
+    def test_reupload_is_replayed(self):
+        first = self.upload()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(len(first.data['created_students']), 2)
+
+        again = self.upload()
+
+        self.assertEqual(again.status_code, 200)
+        self.assertIs(again.data['replayed'], True)
+        self.assertEqual(again.data['upload_id'], first.data['upload_id'])
+        self.assertEqual(StudentBulkUpload.objects.count(), 1)
+
+        reprocessed = self.upload(reprocess='true')
+
+        self.assertEqual(reprocessed.status_code, 201)
+        self.assertEqual(reprocessed.data['skipped_rows'], 2)
+        self.assertEqual(Student.objects.filter(cluster=self.cluster).count(), 2)
+
+    def test_running_upload_conflicts(self):
+        upload = self.running()
+
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['upload_id'], upload.pk)
+        self.assertEqual(self.upload(reprocess='true').status_code, 409)
+
+    def test_stale_upload_is_abandoned(self):
+        upload = self.running()
+        StudentBulkUpload.objects.filter(pk=upload.pk).update(updated_at=timezone.now() - timedelta(seconds=601))
+
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 201)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'failed')
+
+    def test_concurrent_upload_that_passed_the_check(self):
+        upload = self.running()
+
+        # Both requests saw no earlier upload; the other one created its row first
+        with mock.patch.object(StudentViewSet, 'previous_upload', side_effect=[None, upload]):
+            response = self.upload()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['upload_id'], upload.pk)
+        self.assertEqual(StudentBulkUpload.objects.count(), 1)
+        self.assertFalse(Student.objects.filter(cluster=self.cluster).exists())
+
+    def test_one_running_upload_per_file(self):
+        self.running()
+        self.running(status='completed')
+        self.running(status='failed')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.running()
+
+
+@override_settings(STUDENT_DUPLICATE_THRESHOLD=0.7)
+class DuplicateDetectionTests(TestCase):
+    """Upload rows resembling a student of the same cluster and year, or an earlier row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cluster = Cluster.objects.create(cluster_name='Duplicates', cluster_code='DU')
+        other = Cluster.objects.create(cluster_name='Elsewhere', cluster_code='EL')
+        for student_id, name, year, cluster in [
+            ('DU1', 'Jonathan Smith', 2024, cls.cluster),
+            ('DU2', 'Priya Sharma', 2023, cls.cluster),
+            ('EL1', 'Priya Sharma', 2024, other),
+        ]:
+            Student.objects.create(
+                user=User.objects.create_user(f'dup_{student_id}'), student_id=student_id, name=name,
+                email=f'{student_id}@example.com', cluster=cluster, year_of_admission=year,
+            )
+
+    def test_duplicates(self):
+        rows = [
+            (2, 'Jonathon Smith', 2024),
+            (3, 'Smith Jonathan', 2025),
+            (4, 'Priya Sharmaa', 2024),
+            (5, 'Maria Garcia', 2024),
+            (6, 'Garcia, MARIA', 2024),
+            (7, '', 2024),
+            (8, 'Maria Garcia', None),
+        ]
+        with self.assertNumQueries(1):
+            found = find_duplicates(self.cluster, rows)
+
+        self.assertEqual(sorted(found), [2, 6])
+        existing = found[2]
+        self.assertEqual((existing.match, existing.student_id, existing.other_row), ('Jonathan Smith', 'DU1', None))
+        self.assertGreaterEqual(existing.score, 0.7)
+        self.assertLess(existing.score, 1.0)
+        self.assertIn('existing student "Jonathan Smith" (DU1)', str(existing))
+        earlier = found[6]
+        self.assertEqual((earlier.match, earlier.student_id, earlier.other_row), ('Maria Garcia', None, 5))
+        self.assertEqual(earlier.as_dict()['score'], 1.0)
+        self.assertIn('in row 5', str(earlier))
+
+    def test_threshold(self):
+        rows = [(2, 'Jonathon Smith', 2024)]
+        self.assertEqual(find_duplicates(self.cluster, rows, threshold=1.0), {})
+        with override_settings(STUDENT_DUPLICATE_THRESHOLD=0.99):
+            self.assertEqual(find_duplicates(self.cluster, rows), {})
+
+    def test_nothing_to_compare(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(find_duplicates(self.cluster, [(2, '', 2024), (3, 'Ann Lee', None)]), {})
+
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+ROWS = [
+    {'Name': f'Student {i}', 'Email': f's{i}@example.com', 'Roll Number': f'R{i}', 'Year Of Admission': 2026,
+     'Current Semester': 1, 'Notes': 'ignored'}
+    for i in range(5)
+]
+
+
+def spooled(name, content):
+    """An upload Django wrote to a temporary file"""
+    file = TemporaryUploadedFile(name, 'application/octet-stream', len(content), None)
+    file.write(content)
+    file.seek(0)
+    return file
+
+
+@mock.patch('students.bulk_import.UPLOAD_CHUNK_ROWS', 2)
+class IterUploadTests(SimpleTestCase):
+    """Uploads are read a chunk at a time, with template column names and file row positions"""
+
+    def read(self, file, extra=()):
+        chunks = list(iter_upload(file))
+        for df in chunks:
+            columns = ['name', 'email', 'roll_number', 'year_of_admission', 'current_semester', *extra]
+            self.assertEqual(list(df.columns), columns)
+        return chunks
+
+    def assert_chunks(self, chunks):
+        self.assertEqual([list(df.index) for df in chunks], [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunks[2]['name']), ['Student 4'])
+
+    def test_csv(self):
+        header = ','.join(ROWS[0])
+        lines = [','.join(str(value) for value in row.values()) for row in ROWS]
+        content = '\ufeff' + '\n'.join([header, *lines]) + '\n'
+        for file in [SimpleUploadedFile('s.csv', content.encode()), spooled('s.csv', content.encode())]:
+            with self.subTest(file=type(file).__name__):
+                self.assert_chunks(self.read(file))
+
+    def test_excel_is_one_chunk(self):
+        book = Workbook()
+        book.active.append(list(ROWS[0]))
+        for row in ROWS:
+            book.active.append(list(row.values()))
+        buffer = io.BytesIO()
+        book.save(buffer)
+
+        # Read whole, other columns included
+        [df] = self.read(SimpleUploadedFile('s.xlsx', buffer.getvalue()), extra=['notes'])
+
+        self.assertEqual(list(df.index), [0, 1, 2, 3, 4])
+
+    def arrow_files(self, write):
+        import pyarrow as pa
+
+        for rows in [ROWS, []]:
+            table = pa.Table.from_pylist(rows, schema=pa.Table.from_pylist(ROWS).schema)
+            buffer = io.BytesIO()
+            write(table, buffer)
+            yield rows, buffer.getvalue()
+
+    @skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        def write(table, buffer):
+            pq.write_table(table, buffer, row_group_size=3)
+
+        self.assert_arrow_chunks('s.parquet', self.arrow_files(write))
+
+    @skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_arrow(self):
+        import pyarrow as pa
+
+        def write(table, buffer):
+            with pa.ipc.new_file(buffer, table.schema) as writer:
+                writer.write_table(table, max_chunksize=3)
+
+        self.assert_arrow_chunks('s.arrow', self.arrow_files(write))
+
+    def assert_arrow_chunks(self, name, files):
+        for rows, content in files:
+            for file in [SimpleUploadedFile(name, content), spooled(name, content)]:
+                with self.subTest(rows=len(rows), file=type(file).__name__):
+                    chunks = self.read(file)
+                    if rows:
+                        self.assertTrue(all(len(df) <= 2 for df in chunks))
+                        self.assertEqual([index for df in chunks for index in df.index], [0, 1, 2, 3, 4])
+                        self.assertEqual(list(chunks[-1]['name'])[-1], 'Student 4')
+                    else:
+                        [df] = chunks
+                        self.assertTrue(df.empty)
+
+    @skipIf(HAS_PYARROW, 'pyarrow is installed')
+    def test_parquet_and_arrow_need_pyarrow(self):
+        for name in ['s.parquet', 's.feather']:
+            with self.subTest(name), self.assertRaisesMessage(UploadFormatError, 'need pyarrow'):
+                self.read(SimpleUploadedFile(name, b'PAR1'))
+
+    def test_unsupported_format(self):
+        with self.assertRaisesMessage(UploadFormatError, 'Unsupported file type: s.txt'):
+            self.read(SimpleUploadedFile('s.txt', b''))
@@ -1,24 +1,63 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.http import HttpResponse
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from changefeed.mixins import ChangeFeedMixin
+from clubs.models import ClubMember
+from clubs.serializers import ClubSerializer
+from clusters.models import Cluster
+from clusters.serializers import ClusterSerializer
+from education_platform.artifacts import SpreadsheetTemplate
+from education_platform.fieldsets import Include, SparseFieldsetMixin
+from education_platform.uploads import UploadLimitMixin
+from .bulk_import import COLUMNS, UploadFormatError, content_hash, iter_upload, row_fingerprint, upload_format
+from .duplicates import find_duplicates
 from .models import Student, StudentBulkUpload
 from .serializers import StudentSerializer, StudentBulkUploadSerializer
-import pandas as pd
-import io
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
+import itertools
 import random
 import string
+import logging
+from datetime import timedelta
 
-class StudentViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+STUDENT_TEMPLATE = SpreadsheetTemplate(
+    'students_template.xlsx', 'Students Template',
+    headers=COLUMNS,
+    samples=[
+        ['John Doe', 'john@example.com', '1234567890', 'ST001', 2024, 1],
+        ['Jane Smith', 'jane@example.com', '9876543210', 'ST002', 2024, 1],
+    ],
+)
+
+
+class StudentViewSet(UploadLimitMixin, SparseFieldsetMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    upload_actions = ('bulk_upload',)
+    sparse_includes = {
+        'cluster': Include('cluster', ClusterSerializer, 'clusters'),
+        # Loaded by the active_memberships prefetch; member_count would cost a query per club
+        'club': Include(
+            'active_memberships', ClubSerializer, 'clubs',
+            fields=['club_id', 'name', 'description', 'coordinator', 'max_members', 'is_active'],
+            getter=lambda student: [membership.club for membership in student.active_memberships],
+        ),
+    }
 
     def get_queryset(self):
-        queryset = Student.objects.select_related('user', 'cluster').all()
+        queryset = Student.objects.select_related('user', 'cluster').prefetch_related(
+            Prefetch(
+                'club_memberships',
+                queryset=ClubMember.objects.filter(is_active=True).select_related('club'),
+                to_attr='active_memberships',
+            )
+        )
         is_active = self.request.query_params.get('is_active', None)
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
@@ -38,7 +77,7 @@ class StudentViewSet(viewsets.ModelViewSet):
                     student.credentials_sent = True
                     student.save()
                 except Exception as e:
-                    print(f"Warning: Failed to send credentials email: {str(e)}")
+                    logger.warning("Failed to send credentials email to %s: %s", student_id, e)
                     # Don't fail the creation if email sending fails
         
         return response
@@ -74,62 +113,28 @@ Academic Administration Team
     @action(detail=False, methods=['get'])
     def template(self, request):
         """Download Excel template for bulk upload"""
-        # Create a new workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Students Template"
-
-        # Define headers
-        headers = [
-            'name', 'email', 'phone', 'roll_number', 
-            'year_of_admission', 'current_semester'
-        ]
-        
-        # Add headers to worksheet
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header.replace('_', ' ').title())
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-        # Add sample data
-        sample_data = [
-            ['John Doe', 'john@example.com', '1234567890', 'ST001', 2024, 1],
-            ['Jane Smith', 'jane@example.com', '9876543210', 'ST002', 2024, 1],
-        ]
-        
-        for row, data in enumerate(sample_data, 2):
-            for col, value in enumerate(data, 1):
-                ws.cell(row=row, column=col, value=value)
-
-        # Adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Save to BytesIO
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-
-        # Create response
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="students_template.xlsx"'
-        return response
+        return STUDENT_TEMPLATE.response(request)
 
     @action(detail=False, methods=['post'])
     def bulk_upload(self, request):
-        """Bulk upload students from Excel file"""
+        """
+        Bulk upload students from an Excel, CSV, Parquet or Arrow file with
+        the template's columns.
+
+        Rows that look like an existing student of the cluster, or an earlier
+        row, are created like the others and listed under possible_duplicates
+        for someone to review.
+
+        Uploading a file again is safe. If the same file was already imported
+        into the cluster, the earlier result is returned ("replayed": true)
+        and nothing is processed; if it is still being processed the answer
+        is 409. Otherwise rows imported by earlier uploads are skipped and
+        counted in skipped_rows. Send reprocess=true to process a file that
+        was imported before.
+        """
+        # Imported on demand: pandas adds ~250ms and tens of MB to every worker boot
+        import pandas as pd
+
         if 'file' not in request.FILES:
             return Response(
                 {'error': 'No file provided'}, 
@@ -139,16 +144,38 @@ Academic Administration Team
         file = request.FILES['file']
         
         # Validate file type
-        if not file.name.endswith(('.xlsx', '.xls')):
+        file_format = upload_format(file.name)
+        if file_format is None:
             return Response(
-                {'error': 'Invalid file type. Please upload an Excel file.'}, 
+                {'error': 'Invalid file type. Please upload an Excel, CSV, Parquet or Arrow file.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         try:
-            # Read the Excel file
-            df = pd.read_excel(file)
-            
+            cluster = Cluster.objects.filter(pk=int(request.data.get('cluster'))).first()
+        except (TypeError, ValueError):
+            cluster = None
+        if cluster is None:
+            return Response(
+                {'error': 'A valid cluster is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        file_hash = content_hash(file)
+        if str(request.data.get('reprocess', '')).lower() != 'true':
+            previous = self.previous_upload(cluster, file_hash)
+            if previous is not None:
+                return self.previous_upload_response(previous)
+
+        bulk_upload = None
+        try:
+            # Chunks are read, checked and imported one at a time (students.bulk_import)
+            chunks = iter_upload(file, file_format)
+            try:
+                df = next(chunks)
+            except UploadFormatError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
             # Validate required columns
             required_columns = ['name', 'email', 'roll_number', 'year_of_admission', 'current_semester']
             missing_columns = [col for col in required_columns if col not in df.columns]
@@ -159,64 +186,163 @@ Academic Administration Team
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Track upload
-            bulk_upload = StudentBulkUpload.objects.create(
-                filename=file.name,
-                total_records=len(df),
-                uploaded_by=request.user if request.user.is_authenticated else None
-            )
+            # Track upload; total_students grows as chunks are read. Only one
+            # run of a file may be processing (bulk_uploads_one_running), so a
+            # concurrent upload of the same file that got here first wins
+            self.abandon_stale_uploads(cluster, file_hash)
+            try:
+                with transaction.atomic():
+                    bulk_upload = StudentBulkUpload.objects.create(
+                        cluster=cluster,
+                        file_name=file.name,
+                        content_hash=file_hash,
+                        total_students=len(df),
+                        uploaded_by=request.user if request.user.is_authenticated else None
+                    )
+            except IntegrityError:
+                return self.previous_upload_response(self.previous_upload(cluster, file_hash))
 
             created_students = []
             errors = []
+            duplicates = {}
+            skipped = 0
+            processed = 0
+            progress_every = getattr(settings, 'BULK_UPLOAD_PROGRESS_EVERY', 25)
 
-            for index, row in df.iterrows():
-                try:
-                    # Generate random password
-                    password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-                    
-                    student_data = {
-                        'name': row['name'],
-                        'email': row['email'],
-                        'phone': row.get('phone', ''),
-                        'roll_number': row['roll_number'],
-                        'year_of_admission': int(row['year_of_admission']),
-                        'current_semester': int(row['current_semester']),
-                        'password': password
-                    }
-                    
-                    serializer = StudentSerializer(data=student_data)
-                    if serializer.is_valid():
-                        student = serializer.save()
-                        created_students.append({
-                            'name': student.name,
-                            'email': student.email,
-                            'roll_number': student.roll_number
-                        })
-                    else:
-                        errors.append(f"Row {index + 2}: {serializer.errors}")
-                        
-                except Exception as e:
-                    errors.append(f"Row {index + 2}: {str(e)}")
+            for chunk_number, df in enumerate(itertools.chain([df], chunks)):
+                if chunk_number:
+                    bulk_upload.total_students += len(df)
+                fingerprints = {
+                    index: row_fingerprint(row) for index, row in zip(df.index, df.to_dict('records'))
+                }
+                imported = self.imported_fingerprints(cluster, fingerprints.values())
+                rows = df.loc[[fingerprints[index] not in imported for index in df.index]]
+                skipped += len(df) - len(rows)
+                # Rows of earlier chunks are students by now, so they are compared too
+                duplicates.update(find_duplicates(cluster, self.upload_names(rows)))
 
-            # Update upload record
-            bulk_upload.successful_records = len(created_students)
-            bulk_upload.failed_records = len(errors)
-            bulk_upload.status = 'completed' if not errors else 'partial'
-            bulk_upload.save()
+                for index, row in rows.iterrows():
+                    processed += 1
+                    if processed % progress_every == 0:
+                        self.save_upload_progress(bulk_upload, skipped + processed - 1, created_students, errors)
+                    try:
+                        # Generate random password
+                        password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
+
+                        student_data = {
+                            'name': row['name'],
+                            'email': row['email'],
+                            'phone': '' if pd.isna(row.get('phone')) else str(row.get('phone')),
+                            'roll_number': row['roll_number'],
+                            'year_of_admission': int(row['year_of_admission']),
+                            'current_semester': int(row['current_semester']),
+                            'cluster': cluster.pk,
+                            'password': password
+                        }
 
-            return Response({
+                        serializer = StudentSerializer(data=student_data)
+                        if serializer.is_valid():
+                            student = serializer.save(import_fingerprint=fingerprints[index])
+                            created_students.append({
+                                'name': student.name,
+                                'email': student.email,
+                                'roll_number': student.roll_number
+                            })
+                        else:
+                            errors.append(f"Row {index + 2}: {serializer.errors}")
+
+                    except Exception as e:
+                        errors.append(f"Row {index + 2}: {str(e)}")
+
+            result = {
                 'message': f'Successfully created {len(created_students)} students',
                 'created_students': created_students,
                 'errors': errors,
-                'upload_id': bulk_upload.id
-            }, status=status.HTTP_201_CREATED)
+                'possible_duplicates': [duplicate.as_dict() for duplicate in duplicates.values()],
+                'skipped_rows': skipped,
+            }
+
+            # Update upload record
+            bulk_upload.status = 'completed'
+            bulk_upload.processed_rows = bulk_upload.total_students
+            bulk_upload.successful_uploads = len(created_students)
+            bulk_upload.failed_uploads = len(errors)
+            bulk_upload.error_log = '\n'.join(errors)
+            bulk_upload.result = result
+            bulk_upload.save()
+
+            return Response({**result, 'upload_id': bulk_upload.id}, status=status.HTTP_201_CREATED)
 
         except Exception as e:
+            if bulk_upload is not None:
+                bulk_upload.status = 'failed'
+                bulk_upload.error_log = str(e)
+                bulk_upload.save(update_fields=['status', 'error_log', 'updated_at'])
             return Response(
                 {'error': f'Error processing file: {str(e)}'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @staticmethod
+    def stale_before():
+        return timezone.now() - timedelta(seconds=getattr(settings, 'BULK_UPLOAD_STALE_AFTER', 600))
+
+    def previous_upload(self, cluster, file_hash):
+        """The latest upload of this file that completed or may still be running"""
+        return StudentBulkUpload.objects.filter(
+            Q(status='completed') | Q(status='processing', updated_at__gte=self.stale_before()),
+            cluster=cluster, content_hash=file_hash,
+        ).order_by('-pk').first()
+
+    def abandon_stale_uploads(self, cluster, file_hash):
+        """Mark runs of this file that stopped making progress as failed, so it can run again"""
+        StudentBulkUpload.objects.filter(
+            cluster=cluster, content_hash=file_hash, status='processing', updated_at__lt=self.stale_before(),
+        ).update(status='failed', error_log='Abandoned: no progress was saved', updated_at=timezone.now())
+
+    @staticmethod
+    def previous_upload_response(previous):
+        """Replay a completed upload of the file, or 409 while one is running"""
+        if previous is not None and previous.status == 'completed':
+            return Response({**previous.result, 'upload_id': previous.id, 'replayed': True})
+        return Response(
+            {'error': 'This file is already being processed', 'upload_id': previous.id if previous else None},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    @staticmethod
+    def imported_fingerprints(cluster, fingerprints):
+        """The fingerprints that students of `cluster` were imported from"""
+        fingerprints = list(fingerprints)
+        imported = set()
+        # Chunked to stay under SQLite's bound-parameter limit on large files
+        for start in range(0, len(fingerprints), 5000):
+            imported.update(Student.objects.filter(
+                cluster=cluster, import_fingerprint__in=fingerprints[start:start + 5000]
+            ).values_list('import_fingerprint', flat=True))
+        return imported
+
+    @staticmethod
+    def upload_names(df):
+        """(row number, name, year of admission) of each uploaded row"""
+        import pandas as pd
+
+        for index, name, year in zip(df.index, df['name'], df['year_of_admission']):
+            try:
+                year = int(year)
+            except (TypeError, ValueError):
+                year = None
+            yield index + 2, '' if pd.isna(name) else str(name), year
+
+    def save_upload_progress(self, bulk_upload, processed, created_students, errors):
+        """Save running totals so the event stream can report progress"""
+        bulk_upload.processed_rows = processed
+        bulk_upload.successful_uploads = len(created_students)
+        bulk_upload.failed_uploads = len(errors)
+        bulk_upload.save(update_fields=[
+            'total_students', 'processed_rows', 'successful_uploads', 'failed_uploads', 'updated_at'
+        ])
+
     @action(detail=True, methods=['post'])
     def send_credentials(self, request, pk=None):
         """Send login credentials to student via email"""